@@ -3,6 +3,11 @@ import os
 import shutil
 from wx.lib.scrolledpanel import ScrolledPanel
 from send2trash import send2trash
+from PIL import Image
+from thumbnail_service import scaled_size, thumbnail_service
+
+# 缩略图生成完成前显示的占位图颜色
+PLACEHOLDER_COLOUR = (225, 225, 225)
 
 
 class Thumbnail(wx.Panel):
@@ -16,9 +21,8 @@ class Thumbnail(wx.Panel):
         self.group_name = None
         self.thumb_max_size = thumb_max_size
 
-        image = wx.Image(image_path)
-        image.Rescale(*self._scale_image(image.GetSize(), self.thumb_max_size), wx.IMAGE_QUALITY_HIGH)
-        bmp = image.ConvertToBitmap()
+        # 先显示与缩略图同尺寸的占位图，缩略图在后台线程解码（或从磁盘缓存读取）后再替换
+        bmp = self._placeholder_bitmap()
 
         # 顶部显示：序号 + 文件名
         filename = os.path.basename(self.image_path)
@@ -42,11 +46,30 @@ class Thumbnail(wx.Panel):
         self.SetBackgroundColour(wx.NullColour)
         self.Bind(wx.EVT_PAINT, self.on_paint)
 
-    def _scale_image(self, size, max_size):
-        w, h = size
-        mw, mh = max_size
-        scale = min(mw / w, mh / h)
-        return int(w * scale), int(h * scale)
+        thumbnail_service.request(image_path, self.thumb_max_size, self._on_thumbnail_loaded)
+
+    def _placeholder_bitmap(self):
+        # 只读取文件头得到图片尺寸，占位图与缩略图大小一致，加载完成后布局不跳动
+        try:
+            with Image.open(self.image_path) as img:
+                w, h = scaled_size(img.size, self.thumb_max_size)
+        except Exception:
+            w, h = self.thumb_max_size
+        image = wx.Image(w, h)
+        image.SetRGB(wx.Rect(0, 0, w, h), *PLACEHOLDER_COLOUR)
+        return image.ConvertToBitmap()
+
+    def _on_thumbnail_loaded(self, path, thumbnail):
+        """缩略图生成完成（在缩略图线程中调用）"""
+        if thumbnail is not None:
+            wx.CallAfter(self._set_thumbnail, path, thumbnail)
+
+    def _set_thumbnail(self, path, thumbnail):
+        if not self or path != self.image_path:  # 缩略图已删除或图片已改名
+            return
+        h, w = thumbnail.shape[:2]
+        self.bmp_ctrl.SetBitmap(wx.Image(w, h, thumbnail.tobytes()).ConvertToBitmap())
+        self.Layout()
 
     def on_click(self, event):
         mods = wx.GetKeyState(wx.WXK_CONTROL) or wx.GetKeyState(wx.WXK_SHIFT)
@@ -0,0 +1,79 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+
+class BatchExportCancelled(Exception):
+    """批量导出被用户取消"""
+
+
+class BatchExporter:
+    """
+    缩略图栏批量导出（合并长图、多页 PDF）共用的线程池。
+
+    解码、颜色转换与缩放由 PIL / OpenCV 完成，执行时释放 GIL，线程池即可用满所有核心。
+    map_ordered 按提交顺序逐个产出结果，同时在途的任务数有上限，内存占用与图片总数无关。
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        参数:
+            max_workers (int): 线程数，None 表示使用 CPU 核心数
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="BatchExport")
+
+    def map_ordered(self, func, items, cancel=None, window=None):
+        """
+        并行执行 func(item)，按 items 的顺序产出结果。
+
+        参数:
+            func (callable): 在工作线程中调用的函数
+            items (iterable): 输入序列
+            cancel (threading.Event): 置位后停止提交新任务并抛出 BatchExportCancelled
+            window (int): 同时在途的最大任务数，默认为线程数的 2 倍
+        返回:
+            generator: 按顺序产出的结果；func 抛出的异常在取到对应结果时抛出
+        """
+        window = window or self.max_workers * 2
+        futures = deque()
+        items = iter(items)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(futures) < window:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    futures.append(self._executor.submit(func, item))
+                if not futures:
+                    return
+                if cancel is not None and cancel.is_set():
+                    raise BatchExportCancelled()
+                yield futures.popleft().result()
+        finally:
+            # 取消或出错时丢弃尚未开始的任务
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        """关闭线程池，正在执行的任务在后台完成"""
+        logger.debug("关闭批量导出线程池")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def map_ordered(func, items, executor=None, cancel=None):
+    """
+    按顺序产出 func(item) 的结果：提供 executor 时并行执行，否则在当前线程依次执行。
+    cancel 置位后抛出 BatchExportCancelled。
+    """
+    if executor is not None:
+        yield from executor.map_ordered(func, items, cancel)
+        return
+    for item in items:
+        if cancel is not None and cancel.is_set():
+            raise BatchExportCancelled()
+        yield func(item)
@@ -0,0 +1,116 @@
+"""
+证件矫正批量推理吞吐量基准测试（CPU）：对比批大小 1/4/8 时每秒处理的图像数。
+
+模型文件存在时测试完整推理（预处理 + forward + 后处理）；
+无论模型是否存在，都会用合成的模型输出测试后处理（热力图解码 + 坐标变换 + 裁剪）。
+
+用法:
+    python benchmarks/bench_card_batch.py [--model models/card_correction.onnx] [--batches 1 4 8] [--runs 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from card_correction_utils import card_correction  # noqa: E402
+
+
+def make_images(count, rng):
+    """生成尺寸各异的合成证件照片。"""
+    images = []
+    for _ in range(count):
+        h, w = int(rng.integers(900, 1500)), int(rng.integers(1200, 2000))
+        img = rng.integers(40, 90, (h, w, 3), dtype=np.uint8)
+        cv2.rectangle(img, (w // 4, h // 4), (w * 3 // 4, h * 3 // 4), (220, 220, 220), -1)
+        images.append(img)
+    return images
+
+
+def make_outputs(batch, rng, size=192):
+    """按模型输出顺序 (angle, ftype, wh, reg, hm) 构造合成的原始输出。"""
+    hm = np.full((batch, 1, size, size), -6, np.float32)
+    for b in range(batch):
+        cy, cx = rng.integers(size // 4, size * 3 // 4, 2)
+        hm[b, 0, cy, cx] = 4
+    offsets = np.array([40, 30, -40, 30, -40, -30, 40, -30], np.float32).reshape(1, 8, 1, 1)
+    wh = np.broadcast_to(offsets, (batch, 8, size, size)).copy()
+    reg = rng.random((batch, 2, size, size), dtype=np.float32)
+    angle = rng.normal(size=(batch, 4, size, size)).astype(np.float32)
+    ftype = rng.normal(size=(batch, 2, size, size)).astype(np.float32)
+    return [angle, ftype, wh, reg, hm]
+
+
+def throughput(func, batch, runs):
+    func()
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return batch * runs / (time.perf_counter() - start)
+
+
+def bench_decode(batches, runs, rng):
+    net = card_correction.__new__(card_correction)
+    net.K = 10
+    net.obj_score = 0.5
+    net.use_nms = True
+    net.out_height = net.out_width = 192
+    print("后处理（合成模型输出）")
+    print(f"{'批大小':>6} {'逐张(张/秒)':>12} {'批量(张/秒)':>12}")
+    for batch in batches:
+        images = make_images(batch, rng)
+        outputs = make_outputs(batch, rng)
+        centers = [np.array([img.shape[1] / 2, img.shape[0] / 2], np.float32) for img in images]
+        scales = [float(max(img.shape[:2])) for img in images]
+
+        def single():
+            for i in range(batch):
+                net.postprocess_batch([out[i:i + 1] for out in outputs], images[i:i + 1],
+                                      centers[i:i + 1], scales[i:i + 1])
+
+        def batched():
+            net.postprocess_batch(outputs, images, centers, scales)
+
+        print(f"{batch:>6} {throughput(single, batch, runs):>12.1f} {throughput(batched, batch, runs):>12.1f}")
+
+
+def bench_model(model_path, batches, runs, rng):
+    net = card_correction(model_path)
+    print(f"完整推理（{model_path}）")
+    print(f"{'批大小':>6} {'逐张(张/秒)':>12} {'批量(张/秒)':>12}")
+    for batch in batches:
+        images = make_images(batch, rng)
+
+        def single():
+            for img in images:
+                net.infer(img)
+
+        def batched():
+            net.infer_batch(images)
+
+        print(f"{batch:>6} {throughput(single, batch, runs):>12.1f} {throughput(batched, batch, runs):>12.1f}")
+    if not getattr(net, 'batch_supported', True):
+        print("注意：模型为固定批大小导出，批量推理已退回逐张前向")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=os.path.join(ROOT, 'models', 'card_correction.onnx'))
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bench_decode(args.batches, args.runs, rng)
+    if os.path.exists(args.model):
+        bench_model(args.model, args.batches, args.runs, rng)
+    else:
+        print(f"未找到模型文件 {args.model}，跳过完整推理测试")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+证件矫正预处理基准测试：对比原始预处理（复制原图 + copyMakeBorder + 多步归一化）
+与预分配输入张量路径的单次耗时和峰值内存分配。
+
+用法:
+    python benchmarks/bench_card_preprocess.py [--width 3264] [--height 2448] [--runs 20]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_correction_utils import card_correction  # noqa: E402
+
+
+class DummyNet:
+    def getUnconnectedOutLayersNames(self):
+        return ()
+
+
+def legacy_preprocess(net, img):
+    """原始流程：infer 中复制原图，再 ResizePad、转换、归一化、转置。"""
+    image = img.copy()
+    im, new_w, new_h, left, top = net.ResizePad(image, net.resize_shape[0])
+    im = (im.astype(np.float32) / 255.0 - net.mean) / net.std
+    im = np.expand_dims(im.transpose((2, 0, 1)), axis=0)
+    return im.astype(np.float32)
+
+
+def buffered_preprocess(net, img):
+    """新流程：保留原图引用，letterbox 和归一化写入预分配缓冲区。"""
+    image = img
+    return net.preprocess(image, net.resize_shape)[0]
+
+
+def measure(func, net, img, runs):
+    func(net, img)
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(net, img)
+    elapsed = (time.perf_counter() - start) / runs
+    tracemalloc.start()
+    func(net, img)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    # 预处理不依赖模型，用空网络构造实例
+    cv2.dnn.readNet = lambda path: DummyNet()
+    net = card_correction('dummy.onnx')
+    img = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+
+    print(f"图像尺寸: {args.width}x{args.height}，输入尺寸: {net.resize_shape}，次数: {args.runs}")
+    print(f"{'流程':>6} {'单次耗时(ms)':>12} {'峰值分配(MB)':>12}")
+    for name, func in (('原始', legacy_preprocess), ('预分配', buffered_preprocess)):
+        elapsed, peak = measure(func, net, img, args.runs)
+        print(f"{name:>6} {elapsed * 1000:>12.2f} {peak / 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+文档轮廓检测多尺度基准测试：对比不同检测宽度下的耗时与角点误差。
+
+用法:
+    python benchmarks/bench_detection_scale.py [--width 3264] [--height 2448] [--runs 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cammer_utils import detect_document_quad, detection_scale, order_points  # noqa: E402
+
+
+def make_scene(width, height, rng):
+    """生成一张带透视变形文档的合成图像，返回 (图像, 真实角点)。"""
+    img = rng.normal(70, 10, (height, width, 3)).clip(0, 255).astype(np.uint8)
+    margin_x, margin_y = width * 0.08, height * 0.08
+    quad = np.array([
+        [margin_x, margin_y],
+        [width - margin_x, margin_y],
+        [width - margin_x, height - margin_y],
+        [margin_x, height - margin_y],
+    ], np.float32)
+    quad += rng.uniform(-0.05, 0.05, quad.shape).astype(np.float32) * [width, height]
+    cv2.fillConvexPoly(img, quad.astype(np.int32), (230, 228, 225))
+    # 模拟文档上的文字行
+    for _ in range(40):
+        x = int(rng.uniform(quad[:, 0].min() + 100, quad[:, 0].max() - 400))
+        y = int(rng.uniform(quad[:, 1].min() + 100, quad[:, 1].max() - 100))
+        cv2.line(img, (x, y), (x + int(rng.uniform(100, 300)), y), (40, 40, 40), 6)
+    return img, quad
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    scenes = [make_scene(args.width, args.height, rng) for _ in range(args.runs)]
+    widths = [0, 1600, 1200, 800, 640, 400]
+
+    print(f"图像尺寸: {args.width}x{args.height}，样本数: {args.runs}")
+    print(f"{'检测宽度':>8} {'缩放':>7} {'平均耗时(ms)':>12} {'检出率':>7} {'平均角点误差(px)':>16} {'最大角点误差(px)':>16}")
+    for detection_width in widths:
+        times, errors, found = [], [], 0
+        for img, quad in scenes:
+            start = time.perf_counter()
+            contour = detect_document_quad(img, detection_scale(img, detection_width))
+            times.append(time.perf_counter() - start)
+            if contour is not None:
+                found += 1
+                pts = order_points(contour.reshape(4, 2).astype(np.float32))
+                errors.append(np.linalg.norm(pts - quad, axis=1))
+        errors = np.concatenate(errors) if errors else np.array([np.nan])
+        label = detection_width if detection_width else '原尺寸'
+        print(f"{label:>8} {detection_scale(scenes[0][0], detection_width):>7.3f} "
+              f"{np.mean(times) * 1000:>12.1f} {found / len(scenes):>7.0%} "
+              f"{np.mean(errors):>16.2f} {np.max(errors):>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+图片保存吞吐量基准测试：对比 wx.Image（原实现，需要 wxPython）、OpenCV imencode 与 PIL
+在不同 JPEG 设置下的单张耗时、吞吐量和文件大小。
+
+用法:
+    python benchmarks/bench_image_write.py [--width 3264] [--height 2448] [--runs 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_writer import ImageWriteOptions, write_image  # noqa: E402
+
+
+def make_document(width, height):
+    """生成一张带文字行和照片区域的合成文档图像（BGR）。"""
+    rng = np.random.default_rng(0)
+    img = np.full((height, width, 3), 235, np.uint8)
+    for y in range(height // 10, height * 9 // 10, max(height // 60, 12)):
+        cv2.line(img, (width // 10, y), (int(width * rng.uniform(0.5, 0.9)), y), (30, 30, 30), 4)
+    photo = rng.integers(0, 255, (height // 4, width // 4, 3), dtype=np.uint8)
+    img[height // 10:height // 10 + photo.shape[0], width // 2:width // 2 + photo.shape[1]] = cv2.GaussianBlur(photo, (9, 9), 3)
+    return img
+
+
+def wx_writer():
+    try:
+        import wx
+    except ImportError:
+        return None
+    app = wx.App(False)  # noqa: F841  wx.Image 需要 wx.App
+
+    def write(frame, path):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image = wx.Image(rgb.shape[1], rgb.shape[0])
+        image.SetData(rgb.tobytes())
+        image.SaveFile(path, wx.BITMAP_TYPE_JPEG)
+    return write
+
+
+def pil_writer(options):
+    def write(frame, path):
+        Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).save(
+            path, quality=options.quality, subsampling={'444': 0, '422': 1, '420': 2}[options.subsampling],
+            progressive=options.progressive, optimize=options.optimize)
+    return write
+
+
+def measure(write, frame, path, runs):
+    write(frame, path)
+    start = time.perf_counter()
+    for _ in range(runs):
+        write(frame, path)
+    elapsed = (time.perf_counter() - start) / runs
+    return elapsed, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    frame = make_document(args.width, args.height)
+    megapixels = args.width * args.height / 1e6
+    writers = []
+    wx_write = wx_writer()
+    if wx_write is not None:
+        writers.append(('wx.Image', wx_write))
+    for label, options in (
+            ('q95 420', ImageWriteOptions(95, '420')),
+            ('q95 444', ImageWriteOptions(95, '444')),
+            ('q85 420', ImageWriteOptions(85, '420')),
+            ('q90 420 渐进+优化', ImageWriteOptions(90, '420', progressive=True, optimize=True))):
+        writers.append((f'OpenCV {label}', lambda f, p, o=options: write_image(f, p, options=o)))
+        writers.append((f'PIL {label}', pil_writer(options)))
+
+    print(f"图像尺寸: {args.width}x{args.height}，次数: {args.runs}")
+    print(f"{'编码方式':<24} {'单张耗时(ms)':>12} {'吞吐(MP/s)':>10} {'文件大小(KB)':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.jpg')
+        for name, write in writers:
+            elapsed, size = measure(write, frame, path, args.runs)
+            print(f"{name:<24} {elapsed * 1000:>12.1f} {megapixels / elapsed:>10.1f} {size / 1024:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
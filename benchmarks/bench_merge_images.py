@@ -0,0 +1,100 @@
+"""
+长图拼接基准测试：对比原实现（PIL 打开全部图片、缩放后另存一份列表、再分配画布）
+与两遍流式拼接（先读文件头计算布局，再逐张 draft 解码写入画布）的耗时和峰值内存，
+以及使用批量导出线程池并行解码、缩放的两遍拼接。
+每种方式在独立子进程中运行，峰值内存取子进程的最大常驻内存（仅 Linux/macOS）。
+
+用法:
+    python benchmarks/bench_merge_images.py [--images 20] [--width 3264] [--height 2448] [--target-size 1600]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_export import BatchExporter  # noqa: E402
+from utils import merge_images  # noqa: E402
+
+
+def make_images(folder, count, width, height):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        img = np.full((height, width, 3), 235, np.uint8)
+        for y in range(height // 10, height * 9 // 10, max(height // 60, 12)):
+            cv2.line(img, (width // 10, y), (int(width * rng.uniform(0.5, 0.9)), y), (30, 30, 30), 4)
+        path = os.path.join(folder, f"img_{i:03d}.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def original_merge(paths, output, target_size, padding=5):
+    """原实现的纵向拼接流程"""
+    images = [Image.open(p).convert("RGB") for p in paths]
+    if target_size is not None:
+        images = [img.resize((target_size, int(img.height * target_size / img.width)), Image.LANCZOS)
+                  for img in images]
+    width = max(img.width for img in images)
+    height = sum(img.height for img in images) + padding * (len(images) - 1)
+    merged = Image.new("RGB", (width, height), (255, 255, 255))
+    y = 0
+    for img in images:
+        merged.paste(img, ((width - img.width) // 2, y))
+        y += img.height + padding
+    merged.save(output)
+
+
+def streaming_merge(paths, output, target_size):
+    merge_images(paths, output, target_size=target_size, padding=5)
+
+
+def parallel_merge(paths, output, target_size):
+    exporter = BatchExporter()
+    merge_images(paths, output, target_size=target_size, padding=5, executor=exporter)
+    exporter.shutdown()
+
+
+def run(method, paths, output, target_size, results):
+    start = time.perf_counter()
+    method(paths, output, target_size)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, peak / 1024 if sys.platform != 'darwin' else peak / 1024 / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--target-size', type=int, default=1600, help='统一宽度，0 表示不缩放')
+    args = parser.parse_args()
+    target_size = args.target_size or None
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_images(folder, args.images, args.width, args.height)
+        print(f"图片数: {args.images}，单张 {args.width}x{args.height}，统一宽度: {target_size or '不缩放'}")
+        print(f"{'方式':<10} {'耗时(s)':>8} {'峰值内存(MB)':>12}")
+        for name, method in (('原实现', original_merge), ('两遍流式', streaming_merge),
+                             (f'并行({os.cpu_count()}线程)', parallel_merge)):
+            output = os.path.join(folder, f"{method.__name__}.jpg")
+            results = context.Queue()
+            process = context.Process(target=run, args=(method, paths, output, target_size, results))
+            process.start()
+            elapsed, peak = results.get()
+            process.join()
+            print(f"{name:<10} {elapsed:>8.2f} {peak:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+多页 PDF 生成基准测试：对比 PIL 一次性打开全部图片再保存（原实现）
+与流式写入（JPEG 原始数据直接嵌入）的耗时、峰值内存和文件大小。
+每种方式在独立子进程中运行，峰值内存取子进程的最大常驻内存（仅 Linux/macOS）。
+
+用法:
+    python benchmarks/bench_multi_pdf.py [--pages 40] [--width 3264] [--height 2448]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf_writer import StreamingPdfWriter  # noqa: E402
+
+
+def make_pages(folder, pages, width, height):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(pages):
+        img = np.full((height, width, 3), 235, np.uint8)
+        for y in range(height // 10, height * 9 // 10, max(height // 60, 12)):
+            cv2.line(img, (width // 10, y), (int(width * rng.uniform(0.5, 0.9)), y), (30, 30, 30), 4)
+        path = os.path.join(folder, f"page_{i:03d}.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def pil_all_in_memory(paths, output):
+    images = [Image.open(p).convert('RGB') for p in paths]
+    images[0].save(output, save_all=True, append_images=images[1:], resolution=300)
+
+
+def streaming(paths, output):
+    with StreamingPdfWriter(output, dpi=300) as writer:
+        for path in paths:
+            writer.add_image_file(path)
+
+
+def run(method, paths, output, results):
+    start = time.perf_counter()
+    method(paths, output)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    results.put((elapsed, peak / 1024 if sys.platform != 'darwin' else peak / 1024 / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_pages(folder, args.pages, args.width, args.height)
+        source_size = sum(os.path.getsize(p) for p in paths)
+        print(f"页数: {args.pages}，单页 {args.width}x{args.height}，源 JPEG 共 {source_size / 1024 / 1024:.1f} MB")
+        print(f"{'方式':<12} {'耗时(s)':>8} {'峰值内存(MB)':>12} {'PDF 大小(MB)':>12}")
+        for name, method in (('PIL 全部载入', pil_all_in_memory), ('流式写入', streaming)):
+            output = os.path.join(folder, f"{method.__name__}.pdf")
+            results = context.Queue()
+            process = context.Process(target=run, args=(method, paths, output, results))
+            process.start()
+            elapsed, peak = results.get()
+            process.join()
+            print(f"{name:<12} {elapsed:>8.2f} {peak:>12.0f} {os.path.getsize(output) / 1024 / 1024:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+预览旋转基准测试：对比「整帧复制 + 旋转 + 绘制 + 缩放」与「旋转合并到显示缩放」两种方式
+每帧的耗时与内存分配量（不含轮廓检测本身，检测在两种方式下输入相同）。
+
+用法:
+    python benchmarks/bench_rotation_pipeline.py [--width 3264] [--height 2448] [--runs 50]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cammer_utils import draw_boxes_on_image, rotate_frame, rotate_points  # noqa: E402
+from display_pipeline import fit_frame_to_canvas  # noqa: E402
+
+DISPLAY_SIZE = (960, 720)
+
+
+def legacy_path(frame, rotation, quad, canvas):
+    """旧流程：整帧旋转（未旋转时复制）后在全分辨率图像上绘制，再缩放显示。"""
+    rotated = rotate_frame(frame, rotation)
+    if rotated is frame:
+        rotated = frame.copy()
+    h, w = frame.shape[:2]
+    box = np.round(rotate_points(quad, rotation, w, h)).astype(np.int32)
+    rotated = draw_boxes_on_image(rotated, [box])
+    return fit_frame_to_canvas(rotated, DISPLAY_SIZE[0], DISPLAY_SIZE[1], canvas)
+
+
+def folded_path(frame, rotation, quad, canvas):
+    """新流程：未旋转帧直接缩放，旋转和四边形绘制在显示画布上完成。"""
+    return fit_frame_to_canvas(frame, DISPLAY_SIZE[0], DISPLAY_SIZE[1], canvas, rotation=rotation, quad=quad)
+
+
+def measure(func, frame, rotation, quad, runs):
+    canvas = func(frame, rotation, quad, None)
+    # 耗时
+    start = time.perf_counter()
+    for _ in range(runs):
+        canvas = func(frame, rotation, quad, canvas)
+    elapsed = (time.perf_counter() - start) / runs
+    # 分配量：numpy/OpenCV 数组都经由 numpy 分配器，可被 tracemalloc 追踪
+    tracemalloc.start()
+    for _ in range(runs):
+        canvas = func(frame, rotation, quad, canvas)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    quad = np.array([[0.1, 0.1], [0.9, 0.12], [0.88, 0.9], [0.12, 0.88]], np.float32) * [args.width, args.height]
+
+    print(f"图像尺寸: {args.width}x{args.height}，显示尺寸: {DISPLAY_SIZE[0]}x{DISPLAY_SIZE[1]}，次数: {args.runs}")
+    print(f"{'旋转':>4} {'流程':>6} {'每帧耗时(ms)':>12} {'峰值分配(MB)':>12}")
+    for rotation in (0, 90, 180, 270):
+        for name, func in (('旧流程', legacy_path), ('新流程', folded_path)):
+            elapsed, peak = measure(func, frame, rotation, quad, args.runs)
+            print(f"{rotation:>4} {name:>6} {elapsed * 1000:>12.2f} {peak / 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
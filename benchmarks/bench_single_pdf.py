@@ -0,0 +1,68 @@
+"""
+单页 PDF 导出基准测试：对比原实现（PIL 生成 PDF，再单独编码保存图片，共两次编码）
+与压缩一次、PDF 和图片共用压缩结果（JPEG 或黑白 G4）的耗时和文件大小。
+
+用法:
+    python benchmarks/bench_single_pdf.py [--width 2480] [--height 3508] [--runs 5]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_writer import encode_image  # noqa: E402
+from pdf_writer import compress_page, single_page_pdf  # noqa: E402
+
+
+def make_page(width, height):
+    """生成一张带轻微光照渐变的文字页（BGR）"""
+    rng = np.random.default_rng(0)
+    shading = np.linspace(225, 190, width, dtype=np.float32)[None, :].repeat(height, 0)
+    page = cv2.merge([shading.astype(np.uint8)] * 3)
+    for y in range(height // 12, height * 11 // 12, max(height // 70, 12)):
+        cv2.line(page, (width // 10, y), (int(width * rng.uniform(0.5, 0.9)), y), (25, 25, 25), 3)
+    return page
+
+
+def pil_twice(frame):
+    rgb = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    pdf = io.BytesIO()
+    rgb.save(pdf, format='PDF', resolution=300)
+    return len(pdf.getvalue()), len(encode_image(frame))
+
+
+def compress_once(compression):
+    def run(frame):
+        page = compress_page(frame, compression)
+        return len(single_page_pdf(page, 300)), len(page.data)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=2480)
+    parser.add_argument('--height', type=int, default=3508)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = make_page(args.width, args.height)
+    print(f"页面尺寸: {args.width}x{args.height}，次数: {args.runs}")
+    print(f"{'方式':<18} {'耗时(ms)':>9} {'PDF(KB)':>9} {'图片(KB)':>9}")
+    for name, method in (('PIL PDF + 图片', pil_twice), ('JPEG 压缩一次', compress_once('jpeg')),
+                         ('黑白 G4 压缩一次', compress_once('bilevel'))):
+        method(frame)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            pdf_size, image_size = method(frame)
+        elapsed = (time.perf_counter() - start) / args.runs
+        print(f"{name:<18} {elapsed * 1000:>9.1f} {pdf_size / 1024:>9.0f} {image_size / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+启动耗时基准测试：测量从启动到第一帧预览画面渲染完成的时间（time to first preview frame），
+对比同步加载模型与后台加载模型两种方式。使用假摄像头，无需真实设备，可在 CI 中运行。
+
+模型文件存在时加载真实的证件矫正模型，否则用 --fake-load 秒的等待模拟模型解析。
+指定 --max-ms 时，后台加载方式超过该时间则以非零状态码退出。
+
+用法:
+    python benchmarks/bench_startup.py [--model models/card_correction.onnx] [--fake-load 1.5] [--max-ms 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from capture_pipeline import CapturePipeline  # noqa: E402
+from cammer_utils import detect_document_quad, detection_scale  # noqa: E402
+from display_pipeline import fit_frame_to_canvas  # noqa: E402
+from model_loader import LazyModel  # noqa: E402
+
+
+class FakeCamera:
+    """按固定帧率产生合成画面的假摄像头，接口与 cv2.VideoCapture 的读取部分一致。"""
+
+    def __init__(self, width=1920, height=1080, fps=30):
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.frame = np.full((height, width, 3), 60, np.uint8)
+        cv2.rectangle(self.frame, (width // 5, height // 6), (width * 4 // 5, height * 5 // 6), (230, 230, 230), -1)
+        self._next = time.monotonic()
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self.interval, time.monotonic())
+        if image is None or image.shape != self.frame.shape:
+            image = self.frame.copy()
+        else:
+            image[:] = self.frame
+        return True, image
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def release(self):
+        self._opened = False
+
+
+def make_model_factory(model_path, fake_load):
+    if os.path.exists(model_path):
+        from card_correction_utils import card_correction
+        return lambda: card_correction(model_path)
+
+    def fake_model():
+        time.sleep(fake_load)
+        return object()
+    return fake_model
+
+
+def time_to_first_preview(factory, lazy):
+    """
+    模拟主窗口启动：加载模型（同步或后台）、打开摄像头、处理并渲染第一帧。
+    返回 (首帧耗时, 模型就绪耗时)，单位秒。
+    """
+    start = time.monotonic()
+    model = LazyModel('证件矫正模型', factory)
+    if lazy:
+        model.start()
+    else:
+        model.get()
+
+    pipeline = CapturePipeline(FakeCamera())
+    pipeline.start()
+    try:
+        frame = None
+        while frame is None:
+            frame = pipeline.next_frame()
+        detect_document_quad(frame, detection_scale(frame, 800))
+        fit_frame_to_canvas(frame, 960, 720)
+        first_preview = time.monotonic() - start
+    finally:
+        pipeline.stop()
+
+    model.get()
+    return first_preview, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=os.path.join(ROOT, 'models', 'card_correction.onnx'))
+    parser.add_argument('--fake-load', type=float, default=1.5, help='未找到模型时模拟的加载时间（秒）')
+    parser.add_argument('--max-ms', type=float, default=None, help='后台加载方式首帧耗时上限（毫秒）')
+    args = parser.parse_args()
+
+    factory = make_model_factory(args.model, args.fake_load)
+    source = args.model if os.path.exists(args.model) else f"模拟加载 {args.fake_load:.1f} 秒"
+    print(f"模型: {source}")
+    print(f"{'方式':>8} {'首帧预览(ms)':>12} {'模型就绪(ms)':>12}")
+    results = {}
+    for name, lazy in (('同步加载', False), ('后台加载', True)):
+        first_preview, model_ready = time_to_first_preview(factory, lazy)
+        results[lazy] = first_preview
+        print(f"{name:>8} {first_preview * 1000:>12.1f} {model_ready * 1000:>12.1f}")
+
+    if args.max_ms is not None and results[True] * 1000 > args.max_ms:
+        print(f"后台加载方式首帧耗时超过 {args.max_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
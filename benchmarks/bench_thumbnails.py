@@ -0,0 +1,91 @@
+"""
+缩略图生成基准测试：对比全分辨率解码后缩放（原实现使用 wx.Image + IMAGE_QUALITY_HIGH，
+安装了 wxPython 时一并测量）、PIL draft 缩小解码与磁盘缓存命中三种方式的单张耗时。
+
+用法:
+    python benchmarks/bench_thumbnails.py [--images 20] [--width 3264] [--height 2448] [--size 256]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thumbnail_service import ThumbnailCache, ThumbnailService, load_thumbnail, scaled_size  # noqa: E402
+
+
+def make_images(folder, count, width, height):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        img = np.full((height, width, 3), 235, np.uint8)
+        for y in range(height // 10, height * 9 // 10, max(height // 60, 12)):
+            cv2.line(img, (width // 10, y), (int(width * rng.uniform(0.5, 0.9)), y), (30, 30, 30), 4)
+        path = os.path.join(folder, f"img_{i:03d}.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(path)
+    return paths
+
+
+def wx_full_decode():
+    try:
+        import wx
+    except ImportError:
+        return None
+    app = wx.App(False)  # noqa: F841  wx.Image 需要 wx.App
+
+    def load(path, max_size):
+        image = wx.Image(path)
+        image.Rescale(*scaled_size(image.GetSize(), max_size), wx.IMAGE_QUALITY_HIGH)
+        return image
+    return load
+
+
+def cv2_full_decode(path, max_size):
+    frame = cv2.imread(path)
+    return cv2.resize(frame, scaled_size(frame.shape[1::-1], max_size), interpolation=cv2.INTER_AREA)
+
+
+def measure(load, paths, max_size):
+    start = time.perf_counter()
+    for path in paths:
+        load(path, max_size)
+    return (time.perf_counter() - start) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--width', type=int, default=3264)
+    parser.add_argument('--height', type=int, default=2448)
+    parser.add_argument('--size', type=int, default=256)
+    args = parser.parse_args()
+    max_size = (args.size, args.size)
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_images(folder, args.images, args.width, args.height)
+        service = ThumbnailService(ThumbnailCache(os.path.join(folder, 'cache')))
+        for path in paths:
+            service.get(path, max_size)  # 预先填充缓存
+
+        loaders = []
+        wx_load = wx_full_decode()
+        if wx_load is not None:
+            loaders.append(('wx.Image 全尺寸解码', wx_load))
+        loaders += [('OpenCV 全尺寸解码', cv2_full_decode),
+                    ('PIL draft 缩小解码', load_thumbnail),
+                    ('磁盘缓存命中', service.cache.get)]
+
+        print(f"图片数: {args.images}，单张 {args.width}x{args.height}，缩略图 {args.size}px")
+        print(f"{'方式':<20} {'单张耗时(ms)':>12}")
+        for name, load in loaders:
+            print(f"{name:<20} {measure(load, paths, max_size) * 1000:>12.1f}")
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
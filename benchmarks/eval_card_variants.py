@@ -0,0 +1,121 @@
+"""
+证件矫正模型变体离线评估：在本地图片集上以 fp32 模型的结果为基准，
+比较各变体（INT8 量化、小输入尺寸）的角点误差、检出召回率和单张耗时。
+任一变体未通过阈值时以非零状态码退出，通过评估的变体才应在配置中启用。
+
+用法:
+    python benchmarks/eval_card_variants.py --images 证件照片目录 [--variants int8 fp32_640 fp32_512]
+        [--model-dir models] [--max-corner-error 1.0] [--min-recall 0.98] [--quantize]
+
+--quantize: 模型目录中没有 INT8 模型时，先用 onnxruntime 对 fp32 模型做动态 INT8 量化。
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_correction_utils import CARD_MODEL_VARIANTS, create_card_correction  # noqa: E402
+
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+
+
+def load_images(folder):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(folder, pattern)))
+    images = []
+    for path in paths:
+        img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            images.append((path, img))
+    return images
+
+
+def quantize_int8(model_dir):
+    """用 onnxruntime 对 fp32 模型做动态 INT8 量化"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = os.path.join(model_dir, CARD_MODEL_VARIANTS['fp32']['file'])
+    target = os.path.join(model_dir, CARD_MODEL_VARIANTS['int8']['file'])
+    if not os.path.exists(target):
+        quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+        print(f"已生成 INT8 模型: {target}")
+
+
+def run_variant(net, images):
+    """返回每张图像的四边形列表 (N, 4, 2) 和平均耗时"""
+    polygons = []
+    start = time.perf_counter()
+    for _, img in images:
+        out = net.infer(img)
+        polygons.append(out['POLYGONS'].reshape(-1, 4, 2) if len(out['POLYGONS']) else np.zeros((0, 4, 2)))
+    return polygons, (time.perf_counter() - start) / max(len(images), 1)
+
+
+def compare(reference, candidate, images, match_ratio=0.05):
+    """
+    以基准结果为准逐一匹配候选结果（角点平均距离最小者），
+    距离小于图像对角线 match_ratio 视为检出。
+    返回 (召回率, 平均角点误差占对角线百分比, 平均角点误差像素)
+    """
+    total, matched, errors_pct, errors_px = 0, 0, [], []
+    for ref_polys, cand_polys, (_, img) in zip(reference, candidate, images):
+        diagonal = float(np.hypot(*img.shape[:2]))
+        for ref in ref_polys:
+            total += 1
+            if len(cand_polys) == 0:
+                continue
+            distances = np.linalg.norm(cand_polys - ref, axis=2).mean(axis=1)
+            best = distances.min()
+            if best <= diagonal * match_ratio:
+                matched += 1
+                errors_pct.append(best / diagonal * 100)
+                errors_px.append(best)
+    recall = matched / total if total else 1.0
+    return recall, float(np.mean(errors_pct)) if errors_pct else 0.0, float(np.mean(errors_px)) if errors_px else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help='本地证件图片目录')
+    parser.add_argument('--model-dir', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'))
+    parser.add_argument('--variants', nargs='+', default=[v for v in CARD_MODEL_VARIANTS if v != 'fp32'])
+    parser.add_argument('--max-corner-error', type=float, default=1.0, help='平均角点误差上限（占图像对角线的百分比）')
+    parser.add_argument('--min-recall', type=float, default=0.98, help='相对 fp32 的最低召回率')
+    parser.add_argument('--quantize', action='store_true', help='缺少 INT8 模型时先生成')
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        print(f"目录中没有图片: {args.images}")
+        sys.exit(2)
+    if args.quantize:
+        quantize_int8(args.model_dir)
+
+    reference, reference_time = run_variant(create_card_correction('fp32', args.model_dir), images)
+    print(f"图片数: {len(images)}，基准 fp32 检出 {sum(len(p) for p in reference)} 个证件，单张 {reference_time * 1000:.1f} ms")
+    print(f"{'变体':>10} {'召回率':>7} {'角点误差(%)':>11} {'角点误差(px)':>12} {'单张耗时(ms)':>12} {'结果':>4}")
+
+    failed = False
+    for variant in args.variants:
+        try:
+            net = create_card_correction(variant, args.model_dir)
+        except Exception as e:
+            print(f"{variant:>10} 加载失败: {e}")
+            failed = True
+            continue
+        candidate, elapsed = run_variant(net, images)
+        recall, error_pct, error_px = compare(reference, candidate, images)
+        passed = recall >= args.min_recall and error_pct <= args.max_corner_error
+        failed |= not passed
+        print(f"{variant:>10} {recall:>7.1%} {error_pct:>11.2f} {error_px:>12.1f} {elapsed * 1000:>12.1f} "
+              f"{'通过' if passed else '未通过':>4}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+import glob
+import json
+import os
+import platform
+import struct
+import threading
+import time
+import cv2
+from loguru import logger
+from app_config import CONFIG_FILE
+
+# 摄像头枚举结果缓存文件，与 config.ini 位于同一目录
+CAMERA_CACHE_FILE = CONFIG_FILE.parent / "camera_devices.json"
+# 摄像头分辨率能力缓存文件，与 config.ini 位于同一目录
+CAMERA_CAPABILITY_FILE = CONFIG_FILE.parent / "camera_capabilities.json"
+
+# 常见的高拍仪分辨率，作为探测候选与兜底列表（从大到小）
+COMMON_RESOLUTIONS = [(3264, 2448), (2592, 1944), (2048, 1536), (1920, 1440), (1920, 1080),
+                      (1600, 1200), (1280, 960), (1280, 720), (1024, 768), (800, 600), (640, 480)]
+
+# V4L2 ioctl 定义（见 linux/videodev2.h）
+_V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+_V4L2_FRMSIZE_TYPE_DISCRETE = 1
+_FMTDESC_FORMAT = "III32sIIIII"  # struct v4l2_fmtdesc，64 字节
+_FRMSIZEENUM_FORMAT = "IIIIIIIIIII"  # struct v4l2_frmsizeenum，44 字节
+
+
+def _iowr(nr, size):
+    return (3 << 30) | (size << 16) | (ord('V') << 8) | nr
+
+
+_VIDIOC_ENUM_FMT = _iowr(2, struct.calcsize(_FMTDESC_FORMAT))
+_VIDIOC_ENUM_FRAMESIZES = _iowr(74, struct.calcsize(_FRMSIZEENUM_FORMAT))
+
+
+def get_default_backend():
+    """
+    按平台选择本地摄像头的 OpenCV 后端。
+
+    返回:
+        int: Windows 使用 CAP_DSHOW，Linux 使用 CAP_V4L2，macOS 使用 CAP_AVFOUNDATION，其余为 CAP_ANY
+    """
+    system = platform.system()
+    if system == "Windows":
+        return cv2.CAP_DSHOW
+    if system == "Linux":
+        return cv2.CAP_V4L2
+    if system == "Darwin":
+        return cv2.CAP_AVFOUNDATION
+    return cv2.CAP_ANY
+
+
+def get_device_signature():
+    """
+    计算当前视频设备的标识，用于判断缓存是否失效（设备插拔后标识会变化）。
+
+    Linux 下由 /dev/video* 的设备号、创建时间和 sysfs 中的设备名组成；
+    其他平台无法低成本获取，返回 None（缓存改为按 CameraDiscovery.ttl 过期）。
+    """
+    if platform.system() != "Linux":
+        return None
+    entries = []
+    for path in sorted(glob.glob("/dev/video*")):
+        name = os.path.basename(path)
+        try:
+            with open(f"/sys/class/video4linux/{name}/name", "r", encoding="utf-8") as f:
+                device_name = f.read().strip()
+        except OSError:
+            device_name = ""
+        try:
+            st = os.stat(path)
+            entries.append(f"{name}:{device_name}:{st.st_rdev}:{int(st.st_ctime)}")
+        except OSError:
+            continue
+    return "|".join(entries)
+
+
+def probe_camera(index, backend):
+    """
+    打开指定编号的摄像头并尝试抓取一帧，判断设备是否可用。
+
+    参数:
+        index (int): 摄像头编号
+        backend (int): OpenCV 后端
+    返回:
+        bool: 可以抓取到图像时返回 True
+    """
+    cap = None
+    try:
+        cap = cv2.VideoCapture(index, backend)
+        return bool(cap.isOpened() and cap.grab())
+    except Exception as e:
+        logger.debug(f"摄像头 {index} 无法访问: {e}")
+        return False
+    finally:
+        if cap is not None:
+            cap.release()
+
+
+class CameraDiscovery:
+    """
+    本地摄像头枚举服务。
+
+    并发探测所有编号（每个设备有独立超时），结果按设备标识缓存在内存和
+    camera_devices.json 中；设备插拔（标识变化）或手动 refresh() 时才重新探测，
+    启动和切换摄像头时不再重复付出探测开销。
+    Windows、macOS 无法取得设备标识，插拔不会使缓存失效，缓存超过 ttl 秒后重新探测。
+    """
+
+    def __init__(self, max_tested=10, timeout=3.0, backend=None, cache_file=CAMERA_CACHE_FILE, ttl=3600):
+        """
+        参数:
+            max_tested (int): 最多探测的摄像头编号数
+            timeout (float): 单个设备的探测超时（秒），所有设备并发探测
+            backend (int): OpenCV 后端，None 表示按平台自动选择
+            cache_file (Path): 缓存文件路径，None 表示只在内存中缓存
+            ttl (float): 无设备标识时缓存的有效期（秒）
+        """
+        self.max_tested = max_tested
+        self.timeout = timeout
+        self.ttl = ttl
+        self.backend = get_default_backend() if backend is None else backend
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._cache = None
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取摄像头缓存失败: {e}")
+            return None
+
+    def _save_cache(self, cache):
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.warning(f"保存摄像头缓存失败: {e}")
+
+    def _is_valid(self, cache, signature):
+        # 空结果不缓存使用：可能是探测时设备尚未就绪
+        if not (cache is not None
+                and cache.get("cameras")
+                and cache.get("backend") == self.backend
+                and cache.get("max_tested") == self.max_tested
+                and cache.get("signature") == signature):
+            return False
+        # 没有设备标识时无法发现插拔，只在有效期内使用缓存
+        return signature is not None or time.time() - cache.get("timestamp", 0) < self.ttl
+
+    def probe_all(self):
+        """
+        并发探测 0 ~ max_tested-1 号摄像头，超时未返回的设备视为不可用。
+
+        返回:
+            list[int]: 可用摄像头编号（升序）
+        """
+        results = {}
+        threads = []
+
+        def target(index):
+            results[index] = probe_camera(index, self.backend)
+
+        start = time.monotonic()
+        for index in range(self.max_tested):
+            thread = threading.Thread(target=target, args=(index,), daemon=True)
+            thread.start()
+            threads.append((index, thread))
+        deadline = start + self.timeout
+        for index, thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+            if thread.is_alive():
+                logger.warning(f"探测摄像头 {index} 超时（超过 {self.timeout} 秒）")
+
+        cameras = sorted(index for index, ok in list(results.items()) if ok)
+        logger.info(f"摄像头探测完成，可用编号: {cameras}，耗时 {time.monotonic() - start:.2f} 秒")
+        return cameras
+
+    def available_cameras(self, refresh=False):
+        """
+        获取可用摄像头编号列表，优先使用缓存。
+
+        参数:
+            refresh (bool): 是否强制重新探测
+        返回:
+            list[int]: 可用摄像头编号（升序）
+        """
+        with self._lock:
+            signature = get_device_signature()
+            if not refresh:
+                if self._is_valid(self._cache, signature):
+                    return list(self._cache["cameras"])
+                cache = self._load_cache()
+                if self._is_valid(cache, signature):
+                    logger.info(f"使用缓存的摄像头列表: {cache['cameras']}")
+                    self._cache = cache
+                    return list(cache["cameras"])
+
+            cameras = self.probe_all()
+            self._cache = {
+                "backend": self.backend,
+                "max_tested": self.max_tested,
+                "signature": signature,
+                "cameras": cameras,
+                "timestamp": time.time(),
+            }
+            self._save_cache(self._cache)
+            return list(cameras)
+
+    def refresh(self):
+        """手动刷新：忽略缓存重新探测"""
+        return self.available_cameras(refresh=True)
+
+    def invalidate(self):
+        """清除内存与磁盘缓存，下次查询时重新探测"""
+        with self._lock:
+            self._cache = None
+            if self.cache_file and os.path.exists(self.cache_file):
+                try:
+                    os.remove(self.cache_file)
+                except OSError as e:
+                    logger.warning(f"删除摄像头缓存失败: {e}")
+
+
+def get_device_key(index, backend=None):
+    """
+    生成摄像头的设备标识，用于按设备缓存能力信息。
+
+    Linux 下包含 sysfs 中的设备名，换插其他型号的摄像头时不会误用旧缓存。
+    """
+    backend = get_default_backend() if backend is None else backend
+    if platform.system() == "Linux":
+        try:
+            with open(f"/sys/class/video4linux/video{index}/name", "r", encoding="utf-8") as f:
+                return f"v4l2:{index}:{f.read().strip()}"
+        except OSError:
+            pass
+    return f"{backend}:{index}"
+
+
+def list_v4l2_resolutions(index):
+    """
+    通过 V4L2 格式枚举（VIDIOC_ENUM_FMT / VIDIOC_ENUM_FRAMESIZES）读取摄像头支持的分辨率。
+    只查询驱动信息，不改变当前采集参数，也不会与正在使用的采集冲突。
+
+    参数:
+        index (int): 摄像头编号（/dev/video{index}）
+    返回:
+        list[tuple]: 分辨率列表（从大到小）；非 Linux 或查询失败时返回 None
+    """
+    if platform.system() != "Linux":
+        return None
+    try:
+        import fcntl
+    except ImportError:
+        return None
+
+    path = f"/dev/video{index}"
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError as e:
+        logger.debug(f"无法打开 {path} 查询分辨率: {e}")
+        return None
+
+    resolutions = set()
+    try:
+        fmt_index = 0
+        while True:
+            buf = bytearray(struct.pack(_FMTDESC_FORMAT, fmt_index, _V4L2_BUF_TYPE_VIDEO_CAPTURE, 0, b"", 0, 0, 0, 0, 0))
+            try:
+                fcntl.ioctl(fd, _VIDIOC_ENUM_FMT, buf, True)
+            except OSError:
+                break
+            pixel_format = struct.unpack(_FMTDESC_FORMAT, buf)[4]
+
+            size_index = 0
+            while True:
+                size_buf = bytearray(struct.pack(_FRMSIZEENUM_FORMAT, size_index, pixel_format, *([0] * 9)))
+                try:
+                    fcntl.ioctl(fd, _VIDIOC_ENUM_FRAMESIZES, size_buf, True)
+                except OSError:
+                    break
+                fields = struct.unpack(_FRMSIZEENUM_FORMAT, size_buf)
+                if fields[2] == _V4L2_FRMSIZE_TYPE_DISCRETE:
+                    resolutions.add((fields[3], fields[4]))
+                else:
+                    # 连续/步进类型：取范围内的常见分辨率和最大分辨率
+                    min_w, max_w, _, min_h, max_h, _ = fields[3:9]
+                    resolutions.add((max_w, max_h))
+                    resolutions.update((w, h) for w, h in COMMON_RESOLUTIONS
+                                       if min_w <= w <= max_w and min_h <= h <= max_h)
+                    break
+                size_index += 1
+            fmt_index += 1
+    finally:
+        os.close(fd)
+
+    if not resolutions:
+        return None
+    return sorted(resolutions, key=lambda x: x[0] * x[1], reverse=True)
+
+
+def probe_supported_resolutions(cap, candidates=COMMON_RESOLUTIONS):
+    """
+    精简探测：先取摄像头最大分辨率，只探测不超过该值的常见分辨率，结束后恢复原分辨率。
+    不会释放传入的摄像头对象。
+
+    参数:
+        cap (cv2.VideoCapture): 已打开的摄像头对象
+        candidates (list[tuple]): 候选分辨率
+    返回:
+        list[tuple]: 支持的分辨率列表（从大到小），可能为空
+    """
+    original = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    # 设置一个超大分辨率，驱动会回落到最大支持值
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 10000)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 10000)
+    max_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    resolutions = []
+    if max_size[0] > 0 and max_size[1] > 0:
+        resolutions.append(max_size)
+    for width, height in candidates:
+        if (width, height) in resolutions or width > max_size[0] or height > max_size[1]:
+            continue
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == width and int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == height:
+            resolutions.append((width, height))
+
+    # 恢复探测前的分辨率
+    if original[0] > 0 and original[1] > 0:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, original[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, original[1])
+
+    resolutions.sort(key=lambda x: x[0] * x[1], reverse=True)
+    return resolutions
+
+
+class CameraCapabilityStore:
+    """
+    按设备持久化的摄像头分辨率能力缓存（camera_capabilities.json）。
+
+    首次使用某个设备时通过 V4L2 格式枚举（可用时）或精简探测获取分辨率列表，
+    之后的运行直接读取缓存，不再反复触发驱动重新协商。
+    """
+
+    def __init__(self, path=CAMERA_CAPABILITY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+        self._data = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                logger.warning(f"读取摄像头能力缓存失败: {e}")
+        return self._data
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.warning(f"保存摄像头能力缓存失败: {e}")
+
+    def get_resolutions(self, index, cap=None, refresh=False):
+        """
+        获取摄像头支持的分辨率列表（从大到小）。
+
+        参数:
+            index (int): 摄像头编号
+            cap (cv2.VideoCapture): 已打开的摄像头对象，仅在需要精简探测时使用，不会被释放
+            refresh (bool): 是否忽略缓存重新查询
+        返回:
+            list[tuple]: 分辨率列表；无法获取时返回常见分辨率列表
+        """
+        key = get_device_key(index)
+        with self._lock:
+            data = self._load()
+            entry = data.get(key)
+            if entry and not refresh:
+                return [tuple(r) for r in entry["resolutions"]]
+
+            source = "v4l2"
+            resolutions = list_v4l2_resolutions(index)
+            if not resolutions and cap is not None and cap.isOpened():
+                source = "probe"
+                resolutions = probe_supported_resolutions(cap)
+            if not resolutions:
+                logger.warning("未找到支持的分辨率，返回默认分辨率列表")
+                return list(COMMON_RESOLUTIONS)
+
+            logger.info(f"摄像头 {key} 分辨率来源: {source}，共 {len(resolutions)} 项")
+            data[key] = {"resolutions": [list(r) for r in resolutions], "source": source,
+                         "timestamp": time.time()}
+            self._save()
+            return resolutions
+
+    def invalidate(self, index=None):
+        """清除指定设备（或全部设备）的能力缓存"""
+        with self._lock:
+            data = self._load()
+            if index is None:
+                data.clear()
+            else:
+                data.pop(get_device_key(index), None)
+            self._save()
+
+
+# 全局共享的摄像头枚举服务
+camera_discovery = CameraDiscovery()
+# 全局共享的摄像头能力缓存
+camera_capabilities = CameraCapabilityStore()
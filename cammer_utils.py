@@ -1,9 +1,9 @@
 import cv2
-import time
 import numpy as np
 from loguru import logger
 import threading
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from camera_discovery import camera_discovery, get_default_backend, probe_supported_resolutions
 
 def open_capture(source, timeout=3):
     """
@@ -81,6 +81,31 @@ def rotate_frame(image, frame_rotation):
     return image
 
 
+def rotate_points(points, frame_rotation, width, height):
+    """
+    将未旋转图像上的点坐标映射到 rotate_frame 旋转后的图像坐标，
+    用于只变换检测结果而不旋转整帧图像。
+
+    参数:
+        points (numpy.ndarray): 点坐标，形状为 (N, 2)
+        frame_rotation (int): 旋转角度，与 rotate_frame 一致（0、90、180、270、360）
+        width (int): 未旋转图像的宽度
+        height (int): 未旋转图像的高度
+    返回:
+        numpy.ndarray: 旋转后图像上的点坐标，形状为 (N, 2)，float32
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    frame_rotation %= 360
+    if frame_rotation == 90:
+        return np.stack([height - 1 - y, x], axis=1)
+    elif frame_rotation == 180:
+        return np.stack([width - 1 - x, height - 1 - y], axis=1)
+    elif frame_rotation == 270:
+        return np.stack([y, width - 1 - x], axis=1)
+    return points.copy()
+
+
 def get_camera_max_resolution(cap):
     """
     获取指定摄像头的最大分辨率
@@ -168,25 +193,12 @@ def set_camera_resolution(cap, width, height):
 
 def count_cameras(max_tested=10):
     """
-    检测电脑上的摄像头数量，最多测试 max_tested 个编号
+    检测电脑上的摄像头数量，最多测试 max_tested 个编号。
+    使用全局摄像头枚举服务，结果按设备标识缓存，设备未变化时不会重复探测。
     """
-    count = 0
-    for i in range(max_tested):
-        cap = None
-        try:
-            cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)  # 或 cv2.CAP_V4L2 / cv2.CAP_FFMPEG
-            time.sleep(0.2)  # 给摄像头时间初始化
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                count += 1
-            else:
-                break  # 这里可以 break 或 continue，看你是否想跳过失败的设备
-        except Exception as e:
-            print(f"错误：摄像头 {i} 无法访问: {e}")
-        finally:
-            if cap is not None:
-                cap.release()
-    return count
+    if max_tested != camera_discovery.max_tested:
+        camera_discovery.max_tested = max_tested
+    return len(camera_discovery.available_cameras())
 
 
 
@@ -203,7 +215,11 @@ def get_camera(source, timeout=3, fps=30):
         cap: 成功返回 cv2.VideoCapture 对象，否则返回 None
     """
     def open_camera():
-        cap = cv2.VideoCapture(source)
+        # 本地摄像头按平台选择后端（Linux 使用 V4L2），网络地址由 OpenCV 自动选择
+        if isinstance(source, int):
+            cap = cv2.VideoCapture(source, get_default_backend())
+        else:
+            cap = cv2.VideoCapture(source)
         if cap.isOpened():
             # 尝试设置帧率
             if fps is not None:
@@ -233,6 +249,8 @@ def get_camera(source, timeout=3, fps=30):
 def get_camera_supported_resolutions(cap, max_width=1920, max_height=1080):
     """
     根据指定摄像头的分辨率列表，返回一个分辨率列表：从最大分辨率开始，直至720p。
+    只探测不超过摄像头最大分辨率的常见分辨率，结束后恢复原分辨率，不会释放传入的摄像头对象。
+    需要跨运行缓存时请使用 camera_discovery.camera_capabilities。
     参数:
         cap: 摄像头对象
         max_width (int): 最大宽度
@@ -245,47 +263,11 @@ def get_camera_supported_resolutions(cap, max_width=1920, max_height=1080):
                                (1600, 1200), (1280, 960), (1280, 720),
                                (1024, 768), (800, 600), (640, 480)]
     try:
-        # 检查输入参数类型
-        if not isinstance(max_width, int):
-            logger.error("max_width 必须是整数类型")
-        if not isinstance(max_height, int):
-            logger.error("max_height 必须是整数类型")
-
-        # 初始化默认分辨率宽度列表
-        resolution_widths = [
-            3264, 2592, 2048, 1920, 1600, 1280, 1024, 800, 640
-        ]
-        resolution_list = []
-        # 打开摄像头
-
         if cap is None:
             logger.error(f"无法打开摄像头 ")
             return default_resolution_list
 
-        for width in resolution_widths:
-            for height in [
-                    2448, 1994, 1536, 1080, 1200, 1080, 960, 768, 720, 600, 480
-            ]:
-                # # 检查分辨率是否在指定范围内
-                # if width > max_width or height > max_height:
-                #     continue
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-                actual_width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-                actual_height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-                if actual_width == width and actual_height == height:
-                    resolution_list.append((width, height))
-        # 去重操作
-        unique_resolutions = []
-        for res in resolution_list:
-            if res not in unique_resolutions:
-                unique_resolutions.append(res)
-        resolution_list = unique_resolutions
-        # 确保分辨率列表按从大到小的顺序排列
-        resolution_list.sort(key=lambda x: x[0] * x[1], reverse=True)
-
-        # 确保摄像头资源被释放
-        cap.release()
+        resolution_list = probe_supported_resolutions(cap)
 
         if not resolution_list:
             logger.warning("未找到支持的分辨率，返回默认分辨率列表")
@@ -489,11 +471,12 @@ def draw_boxes_on_image(frame, boxes, color=(0, 255, 0), thickness=5):
         return frame
 
 
-def detect_contour(frame):
+def detect_contour(frame, detection_width=None):
     """
     检测图像中的方框并绘制面积最大的边界框
     :param frame: 输入图像帧
-    :return: 最可能的文档轮廓和带有边界框的图像帧
+    :param detection_width: 检测时使用的图像宽度（像素），None 或 0 表示原尺寸检测
+    :return: 最可能的文档轮廓（原图坐标）和带有边界框的图像帧
     """
     try:
         # 检查输入的 current_captured_frame 是否为有效的 numpy 数组
@@ -502,24 +485,12 @@ def detect_contour(frame):
         if frame.ndim not in [2, 3]:
             logger.error("输入图像维度必须是 2 或 3")
 
-        # 1. 图像预处理
-        _, blurred = preprocess_image(frame)
-        if blurred is None:
-            logger.error("图像预处理失败，无法进行后续操作")
-            return None, frame
-
-        # 2. 边缘检测
-        edged = detect_edges(blurred)
-        if edged is None:
-            logger.error("边缘检测失败，无法进行后续操作")
-            return None, frame
-
-        # 3. 轮廓检测与筛选
-        document_contour = find_document_contour(edged, frame)
+        # 1~3. 在缩小后的图像上预处理、边缘检测、轮廓筛选，并映射回原图坐标
+        document_contour = detect_document_quad(frame, detection_scale(frame, detection_width))
 
         # 绘制边界框
         if document_contour is not None:
-            frame = draw_boxes_on_image(frame, [document_contour])
+            frame = draw_boxes_on_image(frame, [document_contour.reshape(4, 2)])
         return document_contour, frame
     except Exception as e:
         logger.error(f"检测轮廓时出错: {e}")
@@ -626,12 +597,14 @@ def four_point_transform(image, pts):
         return image
 
 
-def transform_document(frame):
+def transform_document(frame, detection_width=None):
     """
     扫描文档并进行透视变换
 
     参数:
         current_captured_frame (numpy.ndarray): 输入图像
+        detection_width (int): 检测时使用的图像宽度（像素），None 或 0 表示原尺寸检测；
+            轮廓在缩小图上检测后映射回原图，透视变换始终作用于原图
 
     返回:
         warped (numpy.ndarray): 透视变换后的图像
@@ -643,20 +616,8 @@ def transform_document(frame):
         if frame.ndim not in [2, 3]:
             logger.error("输入图像维度必须是 2 或 3")
 
-        # 1. 图像预处理
-        _, blurred = preprocess_image(frame)
-        if blurred is None:
-            logger.error("图像预处理失败，无法进行后续操作")
-            return frame
-
-        # 2. 边缘检测
-        edged = detect_edges(blurred)
-        if edged is None:
-            logger.error("边缘检测失败，无法进行后续操作")
-            return frame
-
-        # 3. 轮廓检测与筛选
-        document_contour = find_document_contour(edged, frame)
+        # 1~3. 在缩小后的图像上预处理、边缘检测、轮廓筛选，并映射回原图坐标
+        document_contour = detect_document_quad(frame, detection_scale(frame, detection_width))
 
         # 4. 对原始图像进行透视变换（检查是否找到文档轮廓）
         if document_contour is not None:
@@ -675,6 +636,201 @@ def transform_document(frame):
         return frame
 
 
+def detection_scale(frame, detection_width=None):
+    """
+    根据检测宽度计算缩放比例，不放大图像。
+
+    参数:
+        frame (numpy.ndarray): 输入图像
+        detection_width (int): 检测时使用的图像宽度，None 或 0 表示原尺寸
+    返回:
+        float: 缩放比例，范围 (0, 1]
+    """
+    if not detection_width or detection_width <= 0:
+        return 1.0
+    return min(1.0, detection_width / frame.shape[1])
+
+
+def downscale_for_detection(frame, scale):
+    """
+    生成用于检测的缩小图：先用 cv2.pyrDown 逐级减半，再用 INTER_AREA 缩放到剩余比例。
+
+    参数:
+        frame (numpy.ndarray): 输入图像
+        scale (float): 目标缩放比例，范围 (0, 1]
+    返回:
+        numpy.ndarray: 缩小后的图像；scale >= 1 时返回原图本身
+    """
+    if scale >= 1.0:
+        return frame
+    h, w = frame.shape[:2]
+    small = frame
+    level_scale = 1.0
+    # 金字塔逐级减半，直到再减半就会小于目标比例
+    while level_scale * 0.5 >= scale and min(small.shape[:2]) >= 32:
+        small = cv2.pyrDown(small)
+        level_scale *= 0.5
+    target = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    if (small.shape[1], small.shape[0]) != target and level_scale > scale:
+        small = cv2.resize(small, target, interpolation=cv2.INTER_AREA)
+    return small
+
+
+def detect_document_quad(frame, scale=1.0):
+    """
+    在缩小后的图像上检测文档轮廓，并将结果映射回原图坐标。
+
+    参数:
+        frame (numpy.ndarray): 输入图像
+        scale (float): 检测时的缩放比例，1.0 表示原尺寸
+    返回:
+        numpy.ndarray: 原图坐标下的四边形轮廓，形状为 (4, 1, 2)，未找到时为 None
+    """
+    h, w = frame.shape[:2]
+    small = downscale_for_detection(frame, scale)
+
+    _, blurred = preprocess_image(small)
+    if blurred is None:
+        return None
+    edged = detect_edges(blurred)
+    if edged is None:
+        return None
+    contour = find_document_contour(edged, small)
+    if contour is None or small is frame:
+        return contour
+
+    # 按实际缩放比例（宽高分别计算，避免取整误差）映射回原图坐标
+    ratio = np.array([w / small.shape[1], h / small.shape[0]], dtype=np.float32)
+    return np.round(contour.astype(np.float32) * ratio).astype(np.int32)
+
+
+class DocumentTracker:
+    """
+    实时轮廓预览用的文档跟踪器。
+
+    首帧（或跟踪丢失时）在缩小图上做完整检测；之后每帧只在上一帧四边形各条边附近的窄带内
+    提取边缘并拟合直线，用相邻边的交点作为新角点。边缘支持度不足或几何变化过大时
+    回退到完整检测，从而在高分辨率摄像头上也能以摄像头帧率显示轮廓。
+    """
+
+    def __init__(self, detect_width=800, band=12, min_confidence=0.5, max_misses=3):
+        """
+        参数:
+            detect_width (int): 完整检测与窄带细化时的工作宽度（像素），0 表示原尺寸
+            band (int): 窄带半宽，单位为工作尺度下的像素
+            min_confidence (float): 细化结果的最低置信度，低于该值回退到完整检测
+            max_misses (int): 连续多少帧未检测到后清除跟踪结果
+        """
+        self.detect_width = detect_width
+        self.band = band
+        self.min_confidence = min_confidence
+        self.max_misses = max_misses
+        self.reset()
+
+    def reset(self):
+        """清除跟踪状态，下一帧重新完整检测"""
+        self.quad = None
+        self.confidence = 0.0
+        self.misses = 0
+
+    def _working_scale(self, frame):
+        return detection_scale(frame, self.detect_width)
+
+    def _fit_side(self, frame, p0, p1, scale):
+        """在边 p0-p1 附近的窄带内拟合直线，返回 (点, 方向, 支持度)，失败返回 None"""
+        h, w = frame.shape[:2]
+        band_full = self.band / scale
+        x0 = int(max(0, min(p0[0], p1[0]) - band_full))
+        x1 = int(min(w, max(p0[0], p1[0]) + band_full + 1))
+        y0 = int(max(0, min(p0[1], p1[1]) - band_full))
+        y1 = int(min(h, max(p0[1], p1[1]) + band_full + 1))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+
+        strip = frame[y0:y1, x0:x1]
+        if scale < 1.0:
+            strip = cv2.resize(strip, (max(2, int((x1 - x0) * scale)), max(2, int((y1 - y0) * scale))),
+                               interpolation=cv2.INTER_AREA)
+        sx = strip.shape[1] / (x1 - x0)
+        sy = strip.shape[0] / (y1 - y0)
+        gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY) if strip.ndim == 3 else strip
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        median = np.median(gray)
+        edges = cv2.Canny(gray, int(max(0, 0.67 * median)), int(min(255, 1.33 * median)))
+
+        # 只保留上一帧边线附近窄带内的边缘点
+        a = (int(round((p0[0] - x0) * sx)), int(round((p0[1] - y0) * sy)))
+        b = (int(round((p1[0] - x0) * sx)), int(round((p1[1] - y0) * sy)))
+        mask = np.zeros_like(edges)
+        cv2.line(mask, a, b, 255, thickness=2 * self.band + 1)
+        ys, xs = np.nonzero(cv2.bitwise_and(edges, mask))
+        length = max(1.0, np.hypot(b[0] - a[0], b[1] - a[1]))
+        if len(xs) < 0.3 * length:
+            return None
+
+        pts = np.column_stack([xs / sx + x0, ys / sy + y0]).astype(np.float32)
+        vx, vy, cx, cy = cv2.fitLine(pts, cv2.DIST_HUBER, 0, 0.01, 0.01).ravel()
+        # 边缘是双侧的（Canny 单像素），支持度按边长归一化后截断到 1
+        support = min(1.0, len(xs) / length)
+        return np.array([cx, cy], np.float32), np.array([vx, vy], np.float32), support
+
+    def _refine(self, frame):
+        """基于上一帧四边形做窄带细化，返回 (quad, confidence)"""
+        scale = self._working_scale(frame)
+        sides = []
+        for i in range(4):
+            side = self._fit_side(frame, self.quad[i], self.quad[(i + 1) % 4], scale)
+            if side is None:
+                return None, 0.0
+            sides.append(side)
+
+        # 第 i 个角点是第 i-1 条边与第 i 条边的交点
+        quad = np.zeros((4, 2), np.float32)
+        for i in range(4):
+            (pa, da, _), (pb, db, _) = sides[i - 1], sides[i]
+            denom = da[0] * db[1] - da[1] * db[0]
+            if abs(denom) < 1e-6:
+                return None, 0.0
+            t = ((pb[0] - pa[0]) * db[1] - (pb[1] - pa[1]) * db[0]) / denom
+            quad[i] = pa + t * da
+
+        # 几何一致性：凸四边形、角点位移不超过窄带、面积变化有限
+        max_shift = 2 * self.band / scale
+        if not cv2.isContourConvex(quad.reshape(4, 1, 2)):
+            return None, 0.0
+        if np.max(np.linalg.norm(quad - self.quad, axis=1)) > max_shift:
+            return None, 0.0
+        prev_area = cv2.contourArea(self.quad)
+        area_ratio = cv2.contourArea(quad) / prev_area if prev_area > 0 else 0
+        if not 0.8 < area_ratio < 1.25:
+            return None, 0.0
+        return quad, float(np.mean([side[2] for side in sides]))
+
+    def update(self, frame):
+        """
+        处理一帧图像，返回原图坐标下按左上、右上、右下、左下排序的四边形 (4, 2)，未找到返回 None。
+        """
+        if self.quad is not None:
+            quad, confidence = self._refine(frame)
+            if quad is not None and confidence >= self.min_confidence:
+                self.quad = quad
+                self.confidence = confidence
+                self.misses = 0
+                return self.quad
+
+        # 首帧或跟踪置信度不足：在缩小图上完整检测
+        contour = detect_document_quad(frame, self._working_scale(frame))
+        if contour is None:
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.reset()
+            return self.quad
+        self.quad = order_points(contour.reshape(4, 2).astype(np.float32))
+        self.confidence = 1.0
+        self.misses = 0
+        return self.quad
+
+
 if __name__ == "__main__":
     # print(count_cameras())
     capture = open_capture(0)
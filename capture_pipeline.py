@@ -0,0 +1,272 @@
+import threading
+import time
+import cv2
+from loguru import logger
+
+
+class FrameRingBuffer:
+    """
+    固定槽位的最新帧环形缓冲区。
+
+    采集线程循环写入预分配的槽位（cap.read 直接写入已有数组，不再分配新帧），
+    处理线程总是取最新的一帧，期间未被取走的旧帧计为丢弃。
+    写入时会跳过最新帧和正在被读取的槽位，因此至少需要 3 个槽位。
+    """
+
+    def __init__(self, slots=3):
+        if slots < 3:
+            raise ValueError("环形缓冲区至少需要 3 个槽位")
+        self.slots = [None] * slots
+        self.seqs = [0] * slots
+        self._cond = threading.Condition()
+        self._latest = -1
+        self._reading = -1
+        self._closed = False
+        self._last_taken_seq = 0
+        # 帧序号，同时也是已采集帧数
+        self.seq = 0
+        # 未被处理阶段取走而被覆盖的帧数
+        self.dropped = 0
+
+    def _next_write_index(self):
+        for offset in range(1, len(self.slots) + 1):
+            idx = (self._latest + offset) % len(self.slots)
+            if idx != self._latest and idx != self._reading:
+                return idx
+        return 0
+
+    def grab(self, capture):
+        """
+        从摄像头读取一帧写入下一个空闲槽位。
+
+        参数:
+            capture (cv2.VideoCapture): 摄像头对象
+        返回:
+            bool: 读取成功返回 True
+        """
+        with self._cond:
+            idx = self._next_write_index()
+        buffer = self.slots[idx]
+        ret, frame = capture.read(buffer) if buffer is not None else capture.read()
+        with self._cond:
+            if not ret or frame is None:
+                return False
+            # 分辨率变化时 cap.read 会返回新数组，替换掉旧槽位
+            self.slots[idx] = frame
+            self.seq += 1
+            self.seqs[idx] = self.seq
+            self._latest = idx
+            self._cond.notify_all()
+        return True
+
+    def take_latest(self, last_seq=0, timeout=None):
+        """
+        等待并取出比 last_seq 更新的最新帧的副本。
+
+        参数:
+            last_seq (int): 调用方上一次取到的帧序号
+            timeout (float): 最长等待时间（秒），None 表示一直等待
+        返回:
+            (seq, frame): 帧序号和帧副本；超时或已关闭时返回 None
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self.seq > last_seq, timeout):
+                return None
+            if self._closed:
+                return None
+            idx = self._latest
+            seq = self.seqs[idx]
+            self._reading = idx
+            self.dropped += max(0, seq - self._last_taken_seq - 1)
+            self._last_taken_seq = seq
+        try:
+            frame = self.slots[idx].copy()
+        finally:
+            with self._cond:
+                self._reading = -1
+        return seq, frame
+
+    def close(self):
+        """唤醒所有等待中的读取方"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class CapturePipeline:
+    """
+    生产者/消费者采集流水线。
+
+    采集线程只负责 cap.read 到环形缓冲区，不做任何图像处理，
+    处理阶段通过 next_frame 获取最新帧，慢速检测不会再拖慢采集或让驱动缓冲积压旧帧。
+    """
+
+    def __init__(self, capture, slots=3):
+        """
+        参数:
+            capture (cv2.VideoCapture): 已打开的摄像头对象
+            slots (int): 环形缓冲区槽位数
+        """
+        self.capture = capture
+        self.ring = FrameRingBuffer(slots)
+        self.processed = 0
+        self._last_seq = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """启动采集线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="CaptureThread", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1):
+        """停止采集线程并唤醒处理阶段"""
+        self._running = False
+        self.ring.close()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def _capture_loop(self):
+        while self._running and self.capture.isOpened():
+            try:
+                if not self.ring.grab(self.capture):
+                    # 读取失败时短暂等待，避免空转
+                    time.sleep(0.01)
+            except Exception as e:
+                logger.error(f"采集线程读取帧失败: {e}")
+                time.sleep(0.1)
+        self._running = False
+        self.ring.close()
+        logger.info("采集线程已退出")
+
+    def next_frame(self, timeout=0.5):
+        """
+        处理阶段获取最新帧，旧帧直接丢弃。
+
+        返回:
+            np.ndarray: 最新帧的副本；超时或流水线停止时返回 None
+        """
+        item = self.ring.take_latest(self._last_seq, timeout)
+        if item is None:
+            return None
+        self._last_seq, frame = item
+        return frame
+
+    def mark_processed(self):
+        """处理阶段完成一帧后调用，用于统计"""
+        self.processed += 1
+
+    def stats(self):
+        """
+        返回各阶段计数。
+
+        返回:
+            dict: captured（已采集）、processed（已处理）、dropped（已丢弃）
+        """
+        return {
+            'captured': self.ring.seq,
+            'processed': self.processed,
+            'dropped': self.ring.dropped,
+        }
+
+
+class FpsController:
+    """
+    基于单调时钟的帧率控制器。
+
+    每帧处理完后调用 wait()：处理耗时在预算内时休眠到下一个时间片；
+    超出预算时不再休眠，跳过已错过的时间片并重新对齐节拍，避免越拖越慢。
+    同时按 report_interval 统计实际达到的帧率。
+    """
+
+    def __init__(self, target_fps, report_interval=1.0):
+        """
+        参数:
+            target_fps (float): 目标帧率，必须大于 0
+            report_interval (float): 实际帧率的统计周期（秒）
+        """
+        if target_fps <= 0:
+            raise ValueError("target_fps 必须大于 0")
+        self.target_fps = float(target_fps)
+        self.interval = 1.0 / self.target_fps
+        self.report_interval = report_interval
+        # 因超出预算而跳过的时间片数
+        self.skipped = 0
+        # 最近一个统计周期内实际达到的帧率
+        self.achieved_fps = 0.0
+        self._next_deadline = None
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self._report_ready = False
+
+    def wait(self):
+        """
+        一帧处理完成后调用，按目标帧率控制节拍。
+
+        返回:
+            int: 本次跳过的时间片数量，0 表示在预算内完成
+        """
+        now = time.monotonic()
+        self._count_frame(now)
+        if self._next_deadline is None:
+            self._next_deadline = now + self.interval
+            return 0
+
+        delay = self._next_deadline - now
+        if delay > 0:
+            time.sleep(delay)
+            self._next_deadline += self.interval
+            return 0
+
+        # 处理耗时超出预算：不休眠，跳过错过的时间片
+        missed = int(-delay // self.interval)
+        self.skipped += missed
+        self._next_deadline += (missed + 1) * self.interval
+        return missed
+
+    def _count_frame(self, now):
+        self._window_frames += 1
+        elapsed = now - self._window_start
+        if elapsed >= self.report_interval:
+            self.achieved_fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+            self._report_ready = True
+
+    def take_report(self):
+        """
+        若有新的统计结果则返回实际帧率，否则返回 None。
+        """
+        if not self._report_ready:
+            return None
+        self._report_ready = False
+        return self.achieved_fps
+
+
+def resolve_target_fps(capture, configured_fps=0, default_fps=30):
+    """
+    确定采集目标帧率：优先使用配置值，其次使用摄像头报告的 CAP_PROP_FPS。
+
+    参数:
+        capture (cv2.VideoCapture): 摄像头对象
+        configured_fps (float): 配置的目标帧率，0 表示跟随摄像头
+        default_fps (float): 两者都不可用时的默认帧率
+    返回:
+        float: 目标帧率
+    """
+    if configured_fps and configured_fps > 0:
+        return float(configured_fps)
+    try:
+        camera_fps = capture.get(cv2.CAP_PROP_FPS) if capture is not None else 0
+    except Exception as e:
+        logger.warning(f"读取摄像头帧率失败: {e}")
+        camera_fps = 0
+    # 部分驱动会返回 0 或异常大的值
+    if camera_fps and 0 < camera_fps <= 240:
+        return float(camera_fps)
+    return float(default_fps)
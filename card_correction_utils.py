@@ -1,20 +1,122 @@
 import cv2
 import numpy as np
+import copy
+import importlib.util
 import math
+import os
+from loguru import logger
+
+from inference_engine import InferenceSettings, load_model, warmup_model
 # import matplotlib.pyplot as plt
 
 
+# 证件矫正模型变体：文件名（位于模型目录）、输入尺寸、需要的推理引擎（None 表示不限）
+# 变体启用前需用 benchmarks/eval_card_variants.py 对照 fp32 模型评估角点误差和召回率
+CARD_MODEL_VARIANTS = {
+    'fp32': {'file': 'card_correction.onnx', 'input_size': 768, 'engine': None},
+    'fp32_640': {'file': 'card_correction.onnx', 'input_size': 640, 'engine': None},
+    'fp32_512': {'file': 'card_correction.onnx', 'input_size': 512, 'engine': None},
+    # 动态 INT8 量化模型包含 OpenCV DNN 不支持的整数算子，需使用 onnxruntime
+    'int8': {'file': 'card_correction_int8.onnx', 'input_size': 768, 'engine': 'onnxruntime'},
+    'int8_512': {'file': 'card_correction_int8.onnx', 'input_size': 512, 'engine': 'onnxruntime'},
+}
+
+
+def create_card_correction(variant='fp32', model_dir='models', settings=None, use_nms=True):
+    """
+    按变体名称创建 card_correction 实例。
+
+    参数:
+        variant (str): CARD_MODEL_VARIANTS 中的变体名称，未知名称、模型文件不存在或缺少所需推理引擎时使用 fp32
+        model_dir (str): 模型文件所在目录
+        settings (InferenceSettings): 推理引擎设置，变体要求特定引擎时会覆盖 engine
+        use_nms (bool): 后处理时是否抑制重叠的候选框
+    返回:
+        card_correction: 模型实例
+    """
+    spec = CARD_MODEL_VARIANTS.get(variant)
+    if spec is None:
+        logger.warning(f"未知的证件矫正模型变体 {variant}，使用 fp32")
+        variant, spec = 'fp32', CARD_MODEL_VARIANTS['fp32']
+    elif not os.path.exists(os.path.join(model_dir, spec['file'])):
+        logger.warning(f"证件矫正模型变体 {variant} 的模型文件 {spec['file']} 不存在，使用 fp32")
+        variant, spec = 'fp32', CARD_MODEL_VARIANTS['fp32']
+    elif spec['engine'] and importlib.util.find_spec(spec['engine']) is None:
+        logger.warning(f"证件矫正模型变体 {variant} 需要 {spec['engine']}，未安装，使用 fp32")
+        variant, spec = 'fp32', CARD_MODEL_VARIANTS['fp32']
+    if spec['engine'] and (settings is None or settings.engine != spec['engine']):
+        settings = copy.copy(settings) if settings is not None else InferenceSettings()
+        settings.engine = spec['engine']
+    logger.info(f"证件矫正模型变体: {variant}")
+    return card_correction(os.path.join(model_dir, spec['file']), settings, input_size=spec['input_size'],
+                           use_nms=use_nms)
+
+
 class card_correction:
-    def __init__(self, model_path):
-        self.model = cv2.dnn.readNet(model_path)
-        self.resize_shape = [768, 768]
+    def __init__(self, model_path, settings=None, input_size=None, use_nms=True):
+        """
+        参数:
+            model_path (str): ONNX 模型路径
+            settings (InferenceSettings): 推理引擎设置，None 时使用 OpenCV DNN 默认设置
+            input_size (int): 输入尺寸，模型输入为固定尺寸时以模型为准，默认 768
+            use_nms (bool): 后处理时是否抑制重叠的候选框
+        """
+        # 预热由下面的输出尺寸探测完成（[INFERENCE] warmup=0 时不预热）
+        self.model = load_model(model_path, settings)
         self.outlayer_names = self.model.getUnconnectedOutLayersNames()
+        size = self._model_input_size(input_size)
+        self.resize_shape = [size, size]
         self.mean = np.array([0.408, 0.447, 0.470],dtype=np.float32).reshape((1, 1, 3))
         self.std = np.array([0.289, 0.274, 0.278],dtype=np.float32).reshape((1, 1, 3))
         self.K = 10
         self.obj_score = 0.5
-        self.out_height = self.resize_shape[0] // 4
-        self.out_width = self.resize_shape[1] // 4
+        self.use_nms = use_nms
+        # 输出热力图尺寸由模型实际输出确定
+        self.out_height, self.out_width = self._output_size(settings is None or settings.warmup)
+        # 归一化折叠为逐通道的 x * scale + shift，等价于 (x / 255 - mean) / std
+        self.norm_scale = (1.0 / (255.0 * self.std)).reshape(3)
+        self.norm_shift = (-self.mean / self.std).reshape(3)
+        # 预分配的缓冲区：uint8 letterbox 图像和 NCHW 输入张量，按需重新分配
+        self._letterbox = None
+        self._letterbox_geometry = None
+        self._input_tensor = None
+        # 逆仿射矩阵缓存，键为 (中心 x, 中心 y, 尺度, 输出宽, 输出高, 旋转角)
+        self._inverse_transforms = {}
+    def _model_input_size(self, input_size=None):
+        """模型输入为固定尺寸时返回模型的输入尺寸，否则返回 input_size（默认 768）"""
+        requested = input_size or 768
+        session = getattr(self.model, 'session', None)
+        if session is not None:
+            shape = session.get_inputs()[0].shape
+            if len(shape) == 4 and isinstance(shape[2], int) and isinstance(shape[3], int):
+                if shape[2] != requested:
+                    logger.warning(f"模型输入固定为 {shape[2]}x{shape[3]}，忽略请求的输入尺寸 {requested}")
+                return shape[2]
+        return requested
+    def _output_size(self, warmup=True):
+        """
+        确定输出热力图尺寸。模型输出为固定尺寸时直接读取，需要预热时另外前向一次；
+        否则预热时前向一次探测，不预热时按输入尺寸的 1/4 计算（模型下采样倍数为 4）。
+        """
+        session = getattr(self.model, 'session', None)
+        if session is not None:
+            shape = session.get_outputs()[4].shape
+            if len(shape) == 4 and isinstance(shape[2], int) and isinstance(shape[3], int):
+                if warmup:
+                    warmup_model(self.model, (1, 3, *self.resize_shape))
+                return shape[2], shape[3]
+        if warmup:
+            return self._probe_output_size()
+        return self.resize_shape[0] // 4, self.resize_shape[1] // 4
+    def _probe_output_size(self):
+        """用全零输入前向一次（同时作为预热），从热力图输出得到输出尺寸"""
+        try:
+            self.model.setInput(np.zeros((1, 3, *self.resize_shape), dtype=np.float32))
+            hm = self.model.forward(self.outlayer_names)[4]
+            return int(hm.shape[2]), int(hm.shape[3])
+        except Exception as e:
+            logger.warning(f"无法探测模型输出尺寸，按输入尺寸的 1/4 计算: {e}")
+            return self.resize_shape[0] // 4, self.resize_shape[1] // 4
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-x))
     def ResizePad(self, img, target_size):
@@ -32,34 +134,115 @@ class card_correction:
         )
         return img1, new_w, new_h, left, top
     def infer(self, srcimg):
-        # 复制输入图像，避免修改原始图像
-        self.image = srcimg.copy()
+        # 保存输入图像的引用（不复制），供 postprocess 裁剪使用；推理期间调用方不应修改该图像
+        self.image = srcimg
         # 获取输入图像的原始高度和宽度
         ori_h, ori_w = srcimg.shape[:-1]
         # 计算图像的中心点坐标，存储在实例属性 self.c 中
         self.c = np.array([ori_w / 2., ori_h / 2.], dtype=np.float32)
         # 计算图像的最大边长，存储在实例属性 self.s 中
         self.s = max(ori_h, ori_w) * 1.0
-        # 调用 preprocess 方法对输入图像进行预处理，得到处理后的图像数据 blob 以及其他相关信息
-        blob, new_w, new_h, left, top = self.preprocess(srcimg, self.resize_shape)
-        # 将预处理后的图像数据 blob 设置为神经网络模型的输入
-        self.model.setInput(blob)
+        # 单张推理即批大小为 1 的批量推理
+        return self.infer_batch([self.image])[0]
+
+    def infer_batch(self, srcimgs):
+        """
+        批量推理：N 张图像预处理后堆叠为一个 NCHW blob，只调用一次 forward，
+        热力图解码对整批向量化完成，最后按图像裁剪。
+
+        参数:
+            srcimgs (list[np.ndarray]): BGR 图像列表，尺寸可以不同
+        返回:
+            list[dict]: 每张图像一个结果字典，格式与 infer 相同
+        """
+        if len(srcimgs) == 0:
+            return []
+        centers = []
+        scales = []
+        # 各图像直接写入预分配输入张量的对应批次位置
+        blob = self._get_input_tensor(len(srcimgs))
+        for i, img in enumerate(srcimgs):
+            ori_h, ori_w = img.shape[:2]
+            centers.append(np.array([ori_w / 2., ori_h / 2.], dtype=np.float32))
+            scales.append(max(ori_h, ori_w) * 1.0)
+            self.preprocess_into(img, blob[i])
         # 执行前向传播，通过神经网络模型得到预测输出
-        pre_out = self.model.forward(self.outlayer_names)
-        
-        # 调用 postprocess 方法对模型的原始输出进行后处理，得到最终的结果
-        out = self.postprocess(pre_out)
-        # # 遍历处理后的图像列表，将颜色空间从 BGR 转换为 RGB
-        # for i in range(len(out['OUTPUT_IMGS'])):
-        #     out['OUTPUT_IMGS'][i] = cv2.cvtColor(out['OUTPUT_IMGS'][i], cv2.COLOR_BGR2RGB)
-        # 返回最终处理后的结果
-        return out
+        pre_out = self.forward_batch(blob)
+        # 对模型的原始输出进行后处理，得到每张图像的结果
+        return self.postprocess_batch(pre_out, srcimgs, centers, scales)
+
+    def forward_batch(self, blob):
+        """
+        对 NCHW blob 执行一次前向传播。
+        模型导出为固定批大小 1 时批量前向会失败，此时记录下来并退回逐张前向、再拼接输出。
+        """
+        batch = blob.shape[0]
+        if batch > 1 and getattr(self, 'batch_supported', True):
+            try:
+                self.model.setInput(blob)
+                pre_out = self.model.forward(self.outlayer_names)
+                if all(out.shape[0] == batch for out in pre_out):
+                    return pre_out
+                raise ValueError(f"模型输出批大小与输入不一致: {[out.shape for out in pre_out]}")
+            except Exception as e:
+                logger.warning(f"模型不支持批量推理，退回逐张前向: {e}")
+                self.batch_supported = False
+        outputs = []
+        for i in range(batch):
+            self.model.setInput(blob[i:i + 1])
+            outputs.append(self.model.forward(self.outlayer_names))
+        if batch == 1:
+            return outputs[0]
+        return [np.concatenate(outs, axis=0) for outs in zip(*outputs)]
 
     def preprocess(self, img, resize_shape):
-        im, new_w, new_h, left, top = self.ResizePad(img, resize_shape[0])
-        im = (im.astype(np.float32) / 255.0 - self.mean) / self.std
-        im = np.expand_dims(im.transpose((2, 0, 1)), axis=0)
-        return im.astype(np.float32), new_w, new_h, left, top
+        """
+        预处理单张图像，返回 (blob, new_w, new_h, left, top)。
+        blob 为预分配的输入张量，下一次预处理时会被覆盖，需在此之前送入模型。
+        """
+        blob = self._get_input_tensor(1, resize_shape)
+        new_w, new_h, left, top = self.preprocess_into(img, blob[0], resize_shape)
+        return blob, new_w, new_h, left, top
+
+    def _get_input_tensor(self, batch, resize_shape=None):
+        """返回形状为 (batch, 3, H, W) 的预分配 float32 输入张量"""
+        resize_shape = resize_shape or self.resize_shape
+        shape = (batch, 3, resize_shape[0], resize_shape[1])
+        if self._input_tensor is None or self._input_tensor.shape != shape:
+            self._input_tensor = np.empty(shape, dtype=np.float32)
+        return self._input_tensor
+
+    def preprocess_into(self, img, out, resize_shape=None):
+        """
+        将图像等比缩放后直接写入持久的 letterbox 缓冲区，再一次性完成归一化并写入 out。
+
+        参数:
+            img (np.ndarray): BGR 图像
+            out (np.ndarray): 输出张量，形状为 (3, H, W)，float32
+        返回:
+            (new_w, new_h, left, top): 缩放后的尺寸和填充偏移
+        """
+        target_size = (resize_shape or self.resize_shape)[0]
+        h, w = img.shape[:2]
+        ratio = target_size / max(h, w)
+        new_w, new_h = int(ratio * w), int(ratio * h)
+        top = (target_size - new_h) // 2
+        left = (target_size - new_w) // 2
+
+        geometry = (target_size, new_w, new_h, left, top)
+        if self._letterbox is None or self._letterbox_geometry != geometry:
+            # 缩放区域变化时才需要重新清零填充区域
+            if self._letterbox is None or self._letterbox.shape[0] != target_size:
+                self._letterbox = np.empty((target_size, target_size, 3), dtype=np.uint8)
+            self._letterbox[:] = 0
+            self._letterbox_geometry = geometry
+        cv2.resize(img, (new_w, new_h), dst=self._letterbox[top:top + new_h, left:left + new_w])
+
+        # 逐通道 x * scale + shift，直接写入输出张量，不产生中间浮点图像
+        for c in range(3):
+            np.multiply(self._letterbox[:, :, c], self.norm_scale[c], out=out[c], casting='unsafe')
+            out[c] += self.norm_shift[c]
+        return new_w, new_h, left, top
 
     def distance(self, x1, y1, x2, y2):
         return math.sqrt(pow(x1 - x2, 2) + pow(y1 - y2, 2))
@@ -127,7 +310,8 @@ class card_correction:
         return heat * keep, keep
     def numpy_topk(self,scores, K, axis=-1):
         indices = np.argsort(-scores, axis=axis).take(np.arange(K), axis=axis)  ### 从大到小排序，取出前K个
-        sort_scores = np.take(scores, indices)
+        # 按行取值，批大小大于 1 时每张图像只在自己的热力图中取 topk
+        sort_scores = np.take_along_axis(scores, indices, axis=axis)
         return sort_scores, indices
     def _gather_feat(self,feat, ind, mask=None):
         # print("_gather_feat input shape:", feat.shape, ind.shape)
@@ -216,64 +400,52 @@ class card_correction:
         new_pt = np.array([pt[0], pt[1], 1.0], dtype=np.float32).T
         new_pt = np.dot(t, new_pt)
         return new_pt[:2]
+    def get_inverse_transform(self, center, scale, output_size, rot=0):
+        """返回从热力图坐标映射回原图坐标的逆仿射矩阵（按输入尺寸缓存）"""
+        key = (float(center[0]), float(center[1]), float(scale), int(output_size[0]), int(output_size[1]), rot)
+        trans = self._inverse_transforms.get(key)
+        if trans is None:
+            # 同一输入尺寸的中心点和尺度相同，逆仿射矩阵只需计算一次；缓存随实例释放
+            if len(self._inverse_transforms) >= 16:
+                self._inverse_transforms.clear()
+            trans = self.get_affine_transform(np.array(key[:2], dtype=np.float32), key[2], rot, key[3:5], inv=1)
+            trans.setflags(write=False)
+            self._inverse_transforms[key] = trans
+        return trans
     def transform_preds(self,coords, center, scale, output_size, rot=0):
-        target_coords = np.zeros(coords.shape)
-        trans = self.get_affine_transform(center, scale, rot, output_size, inv=1)
-        for p in range(coords.shape[0]):
-            target_coords[p, 0:2] = self.affine_transform(coords[p, 0:2], trans)
-        return target_coords
+        trans = self.get_inverse_transform(center, scale, output_size, rot)
+        coords = np.asarray(coords).reshape(-1, 2)
+        # 所有点一次矩阵乘法完成仿射变换
+        return coords @ trans[:, :2].T + trans[:, 2]
     def bbox_post_process(self,bbox, c, s, h, w):
+        # 四个角点和中心点所在的列：x0,y0,...,x3,y3,cx,cy
+        cols = [0, 1, 2, 3, 4, 5, 6, 7, 10, 11]
         for i in range(bbox.shape[0]):
-            bbox[i, :, 0:2] = self.transform_preds(bbox[i, :, 0:2], c[i], s[i], (w, h))
-            bbox[i, :, 2:4] = self.transform_preds(bbox[i, :, 2:4], c[i], s[i], (w, h))
-            bbox[i, :, 4:6] = self.transform_preds(bbox[i, :, 4:6], c[i], s[i], (w, h))
-            bbox[i, :, 6:8] = self.transform_preds(bbox[i, :, 6:8], c[i], s[i], (w, h))
-            bbox[i, :, 10:12] = self.transform_preds(bbox[i, :, 10:12], c[i], s[i], (w, h))
+            points = bbox[i][:, cols]
+            bbox[i][:, cols] = self.transform_preds(points, c[i], s[i], (w, h)).reshape(points.shape)
         return bbox
     
     def nms(self,dets, thresh):
         '''
-        len(dets)是batchsize,在推理时batchsize通常等于1, 那就意味着这个函数执行到开头的if就返回了
-        即使在推理时输入多张图片, batchsize大于1,也不应该做nms的呀.因为计算多个目标的重叠关系只是在一张图片内做的,多张图片之间计算目标框的
-        重叠关系,这个是什么意思呢?
+        四边形抑制：中心点落在更高分四边形内部的候选框被抑制，每张证件只保留一个结果。
+        dets 为单张图像的候选框 (K, >=9)，按分数从高到低排列，第 8 列为分数，分数低于 thresh 的直接丢弃。
+        所有中心点与所有四边形的包含关系用一次批量叉积计算，不再逐对循环。
         '''
-
+        dets = dets[dets[:, 8] >= thresh]
         if len(dets) < 2:
             return dets
-        index_keep = []
-        keep = []
-        for i in range(len(dets)):
-            box = dets[i]
-            if box[8] < thresh:
-                break
-            max_score_index = -1
-            ctx = (dets[i][0] + dets[i][2] + dets[i][4] + dets[i][6]) / 4
-            cty = (dets[i][1] + dets[i][3] + dets[i][5] + dets[i][7]) / 4
-            for j in range(len(dets)):
-                if i == j or dets[j][8] < thresh:
-                    break
-                x1, y1 = dets[j][0], dets[j][1]
-                x2, y2 = dets[j][2], dets[j][3]
-                x3, y3 = dets[j][4], dets[j][5]
-                x4, y4 = dets[j][6], dets[j][7]
-                a = (x2 - x1) * (cty - y1) - (y2 - y1) * (ctx - x1)
-                b = (x3 - x2) * (cty - y2) - (y3 - y2) * (ctx - x2)
-                c = (x4 - x3) * (cty - y3) - (y4 - y3) * (ctx - x3)
-                d = (x1 - x4) * (cty - y4) - (y1 - y4) * (ctx - x4)
-                if (a > 0 and b > 0 and c > 0 and d > 0) or (a < 0 and b < 0
-                                                            and c < 0 and d < 0):
-                    if dets[i][8] > dets[j][8] and max_score_index < 0:
-                        max_score_index = i
-                    elif dets[i][8] < dets[j][8]:
-                        max_score_index = -2
-                        break
-            if max_score_index > -1:
-                index_keep.append(max_score_index)
-            elif max_score_index == -1:
-                index_keep.append(i)
-        for i in range(0, len(index_keep)):
-            keep.append(dets[index_keep[i]])
-        return np.array(keep)
+        quads = dets[:, 0:8].reshape(-1, 4, 2)
+        centers = quads.mean(axis=1)
+        # 四边形各边向量 (K, 4, 2) 与各顶点指向各中心点的向量 (K, K, 4, 2)
+        edges = np.roll(quads, -1, axis=1) - quads
+        to_center = centers[None, :, None, :] - quads[:, None, :, :]
+        cross = edges[:, None, :, 0] * to_center[..., 1] - edges[:, None, :, 1] * to_center[..., 0]
+        # inside[j, i]：第 i 个中心点位于第 j 个四边形内部（四个叉积同号）
+        inside = np.all(cross > 0, axis=2) | np.all(cross < 0, axis=2)
+        scores = dets[:, 8]
+        higher = scores[:, None] > scores[None, :]
+        suppressed = np.any(inside & higher, axis=0)
+        return dets[~suppressed]
     def draw_show_img(self,img, result, savepath):
         polys = result['POLYGONS']
         centers = result['CENTER']
@@ -289,43 +461,62 @@ class card_correction:
             img = cv2.putText(img,str(angle_cls[idx]),ori_center,cv2.FONT_HERSHEY_SIMPLEX,2,color,2)
         cv2.imwrite(savepath,img)
     def max_pool2d(self,input, kernel_size, stride=1, padding=0, return_indices=False):
+        """
+        向量化的二维最大池化（NCHW），用于热力图峰值提取。
+
+        stride 为 1 且不需要索引时走 cv2.dilate 最大值滤波；其余情况使用滑动窗口视图
+        一次性计算所有窗口。边界按 0 填充，结果（含索引）与逐窗口循环实现保持一致。
+        """
         batch_size, channels, in_height, in_width = input.shape
         k_height, k_width = kernel_size
-        
+
         out_height = int((in_height + 2 * padding - k_height) / stride) + 1
         out_width = int((in_width + 2 * padding - k_width) / stride) + 1
-        out = np.zeros((batch_size, channels, out_height, out_width), dtype=np.float32)
-        index = np.zeros((batch_size, channels, out_height, out_width), dtype=np.int64)
+
+        # 快速路径：stride=1 时最大池化等价于以 0 为边界值的膨胀操作
+        if stride == 1 and not return_indices and out_height == in_height and out_width == in_width:
+            kernel = np.ones((k_height, k_width), np.uint8)
+            planes = np.ascontiguousarray(input, dtype=np.float32).reshape((-1, in_height, in_width))
+            out = np.empty_like(planes)
+            for p in range(planes.shape[0]):
+                out[p] = cv2.dilate(planes[p], kernel, borderType=cv2.BORDER_CONSTANT, borderValue=0)
+            return out.reshape((batch_size, channels, out_height, out_width))
+
         if padding > 0:
             input_ = np.zeros((batch_size, channels, in_height + 2 * padding, in_width + 2 * padding), dtype=np.float32)
             input_[:, :, padding:padding + in_height, padding:padding + in_width] = input
             input = input_
 
-        for b in range(batch_size):
-            for c in range(channels):
-                for i in range(out_height):
-                    for j in range(out_width):
-                        start_i = i * stride
-                        start_j = j * stride
-                        end_i = start_i + k_height
-                        end_j = start_j + k_width
-                        Xi = input[b, c, start_i: end_i, start_j: end_j]
-    
-                        max_value = np.max(Xi)
-                        k = np.argmax(Xi)
-                        Ia = k // k_height + start_i - padding
-                        Ib = k % k_width + start_j - padding
-                        Ia = Ia if Ia > 0 else 0
-                        Ib = Ib if Ib > 0 else 0
-                        max_index = Ia * in_width + Ib
-                        out[b, c, i, j] = max_value
-                        index[b, c, i, j] = max_index
-
-        if return_indices:
-            return out, index
-        else:
+        # 形状为 (B, C, out_h, out_w, k_h, k_w) 的窗口视图，不复制数据
+        windows = np.lib.stride_tricks.sliding_window_view(input, (k_height, k_width), axis=(2, 3))
+        windows = windows[:, :, ::stride, ::stride][:, :, :out_height, :out_width]
+        out = windows.max(axis=(-2, -1)).astype(np.float32)
+        if not return_indices:
             return out
+
+        # 窗口内按行优先取第一个最大值的位置，与 np.argmax 的语义一致
+        k = windows.reshape(windows.shape[:4] + (-1,)).argmax(axis=-1)
+        start_i = (np.arange(out_height) * stride).reshape((-1, 1))
+        start_j = (np.arange(out_width) * stride).reshape((1, -1))
+        Ia = np.maximum(k // k_height + start_i - padding, 0)
+        Ib = np.maximum(k % k_width + start_j - padding, 0)
+        index = (Ia * in_width + Ib).astype(np.int64)
+        return out, index
     def postprocess(self, output):
+        return self.postprocess_batch(output, [self.image], [self.c], [self.s])[0]
+
+    def postprocess_batch(self, output, images, centers, scales):
+        """
+        批量后处理：整批热力图一次性解码，再按图像筛选并裁剪。
+
+        参数:
+            output: 模型输出，批大小与 images 一致
+            images (list[np.ndarray]): 原始图像，用于裁剪
+            centers (list[np.ndarray]): 每张图像的中心点
+            scales (list[float]): 每张图像的最大边长
+        返回:
+            list[dict]: 每张图像一个结果字典
+        """
         reg = output[3]
         wh = output[2]
         hm = output[4]
@@ -340,11 +531,21 @@ class card_correction:
         angle_cls = self.decode_by_ind(angle_cls, inds, K=self.K)
         ftype_cls = self.decode_by_ind(ftype_cls, inds,K=self.K).astype(np.float32)
 
-        for i in range(bbox.shape[1]):
-            bbox[0][i][9] = angle_cls[0][i]
+        bbox[:, :, 9] = angle_cls
         bbox = np.concatenate((bbox, np.expand_dims(ftype_cls, axis=-1)),axis=-1)
-        # bbox = nms(bbox, 0.3)
-        bbox = self.bbox_post_process(bbox.copy(), [self.c], [self.s], self.out_height, self.out_width)
+        results = []
+        for i, image in enumerate(images):
+            # 先按置信度筛选，只对保留的候选框做坐标变换和裁剪
+            boxes = bbox[i:i + 1, bbox[i, :, 8] > self.obj_score]
+            if self.use_nms:
+                # 重叠的候选框只保留分数最高的一个；仿射变换不改变包含关系，在热力图坐标下计算即可
+                boxes = self.nms(boxes[0], self.obj_score)[None]
+            boxes = self.bbox_post_process(boxes, centers[i:i + 1], scales[i:i + 1], self.out_height, self.out_width)
+            results.append(self._build_result(image, boxes[0]))
+        return results
+
+    def _build_result(self, image, boxes):
+        """根据单张图像已筛选并映射回原图坐标的候选框裁剪并组装结果字典"""
         res = []
         angle = []
         sub_imgs = []
@@ -352,23 +553,22 @@ class card_correction:
         score = []
         center = []
         corner_left_right = []
-        for idx, box in enumerate(bbox[0]):
-            if box[8] > self.obj_score:
-                angle.append(int(box[9]))
-                res.append(box[0:8])
-                box8point = np.array(box[0:8]).reshape(4,2).astype(np.int32)
-                corner_left_right.append([box8point[:,0].min(),box8point[:,1].min(),box8point[:,0].max(),box8point[:,1].max()])
-                sub_img = self.crop_image(self.image,res[-1].copy().reshape(4, 2))
-                if angle[-1] == 1:
-                    sub_img = cv2.rotate(sub_img, 2)
-                if angle[-1] == 2:
-                    sub_img = cv2.rotate(sub_img, 1)
-                if angle[-1] == 3:
-                    sub_img = cv2.rotate(sub_img, 0)
-                sub_imgs.append(sub_img)
-                ftype.append(int(box[12]))
-                score.append(box[8])
-                center.append([box[10],box[11]])
+        for idx, box in enumerate(boxes):
+            angle.append(int(box[9]))
+            res.append(box[0:8])
+            box8point = np.array(box[0:8]).reshape(4,2).astype(np.int32)
+            corner_left_right.append([box8point[:,0].min(),box8point[:,1].min(),box8point[:,0].max(),box8point[:,1].max()])
+            sub_img = self.crop_image(image,res[-1].copy().reshape(4, 2))
+            if angle[-1] == 1:
+                sub_img = cv2.rotate(sub_img, 2)
+            if angle[-1] == 2:
+                sub_img = cv2.rotate(sub_img, 1)
+            if angle[-1] == 3:
+                sub_img = cv2.rotate(sub_img, 0)
+            sub_imgs.append(sub_img)
+            ftype.append(int(box[12]))
+            score.append(box[8])
+            center.append([box[10],box[11]])
 
         result = {
             "POLYGONS": np.array(res),
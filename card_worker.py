@@ -0,0 +1,208 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+from loguru import logger
+import image_writer
+from cammer_utils import rotate_frame
+from write_queue import WriteBehindQueue
+
+
+def indexed_path(path, index):
+    """在文件名后追加序号：卡片_20250101.jpg -> 卡片_20250101_1.jpg"""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{index}{ext}"
+
+
+def reading_order(bboxes):
+    """
+    按台面上的阅读顺序（从上到下分行，行内从左到右）排列检测框。
+
+    参数:
+        bboxes (np.ndarray): 检测框 (N, 4)，每行为 [x0, y0, x1, y1]
+    返回:
+        list[int]: 排序后的下标
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4)
+    if len(bboxes) == 0:
+        return []
+    centers_x = (bboxes[:, 0] + bboxes[:, 2]) / 2
+    centers_y = (bboxes[:, 1] + bboxes[:, 3]) / 2
+    heights = bboxes[:, 3] - bboxes[:, 1]
+    rows = []
+    for i in np.argsort(centers_y, kind='stable'):
+        # 中心点纵向距离小于半个卡片高度的检测框归为同一行
+        if rows and centers_y[i] - centers_y[rows[-1][0]] < heights[rows[-1][0]] / 2:
+            rows[-1].append(i)
+        else:
+            rows.append([i])
+    return [int(i) for row in rows for i in sorted(row, key=lambda k: centers_x[k])]
+
+
+class CardExtractionWorker:
+    """
+    证件提取后台执行器。
+
+    在独立线程中运行 card_correction.infer，避免模型推理阻塞 GUI 线程。
+    拍照时只把快照帧放入有界队列，推理与裁剪在后台完成，
+    证件图片交给后台写盘队列编码并原子写入（失败重试，计入待写入数量）。
+    与 LazyModel 一样，回调在工作线程中调用，界面更新由调用方通过 wx.CallAfter 转到主线程。
+    """
+
+    def __init__(self, card_net, on_saved, on_status=None, max_pending=4, multi_card=False, write_queue=None):
+        """
+        参数:
+            card_net: card_correction 实例或后台加载中的 LazyModel，仅由本执行器的工作线程使用
+            on_saved (callable): 保存成功后调用，参数为 (path, group_name)；多卡模式下按序号依次调用
+            on_status (callable): 状态变化时调用，参数为 (message, pending)
+            max_pending (int): 队列中最多允许等待的帧数
+            multi_card (bool): 多卡模式，保存一次拍照中检测到的所有证件
+            write_queue (WriteBehindQueue): 写盘队列，None 时创建自用的队列（停止时关闭）
+        """
+        self.card_net = card_net
+        self.on_saved = on_saved
+        self.on_status = on_status
+        self.multi_card = multi_card
+        # 多卡模式下各证件的颜色转换、JPEG 编码和写盘在写盘队列中并行进行
+        self._owns_write_queue = write_queue is None
+        self.write_queue = WriteBehindQueue(max_workers=4) if write_queue is None else write_queue
+        self.tasks = queue.Queue(maxsize=max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="CardExtractionWorker", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """排队中与正在处理的任务总数"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, frame, path, group_name=None, rotation=0):
+        """
+        提交一帧待提取的图像。
+
+        参数:
+            frame (np.ndarray): BGR 快照帧（未旋转）
+            path (str): 卡片图像的保存路径
+            group_name (str): 分组名，None 表示不分组
+            rotation (int): 预览旋转角度，整帧旋转在工作线程中进行
+        返回:
+            bool: 成功入队返回 True，队列已满返回 False
+        """
+        if not self._running:
+            return False
+        # 先计数再入队，否则工作线程可能先完成并减一，使计数短暂变为 -1
+        with self._lock:
+            self._pending += 1
+        try:
+            self.tasks.put_nowait((frame, path, group_name, rotation))
+        except queue.Full:
+            with self._lock:
+                self._pending -= 1
+            logger.warning("证件提取队列已满，忽略本次拍照")
+            self._notify("证件提取队列已满，请稍候")
+            return False
+        self._notify("正在提取证件")
+        return True
+
+    def stop(self, timeout=30):
+        """
+        停止接收新任务，处理完已拍摄的任务后停止工作线程。
+
+        参数:
+            timeout (float): 最长等待时间（秒），超时后剩余任务在后台线程中继续处理
+        返回:
+            bool: 全部处理完返回 True
+        """
+        self._running = False
+        deadline = time.monotonic() + timeout
+        try:
+            # 结束标记排在已拍摄的任务之后，队列已满时等待工作线程腾出位置
+            self.tasks.put(None, timeout=timeout)
+            self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            pass
+        finished = not self._thread.is_alive()
+        if not finished:
+            logger.warning(f"退出时仍有 {self.pending} 个证件提取任务未完成")
+        if self._owns_write_queue:
+            self.write_queue.close(timeout=max(0.0, deadline - time.monotonic()))
+        return finished
+
+    def _notify(self, message):
+        if self.on_status:
+            self.on_status(message, self.pending)
+
+    def _get_card_net(self):
+        # 模型仍在后台加载时在工作线程中等待，不阻塞主线程
+        if hasattr(self.card_net, 'get'):
+            if not self.card_net.ready:
+                self._notify("证件矫正模型加载中，加载完成后自动提取")
+            return self.card_net.get()
+        return self.card_net
+
+    def _write(self, crop, path, group_name):
+        """
+        提交到写盘队列：裁剪结果为 BGR，在写盘线程中编码。
+        tag 与主窗口的写盘任务相同，为 (分组名, 是否加入缩略图栏)；证件图片由本执行器按序号加入缩略图栏。
+        """
+        ext = os.path.splitext(path)[1]
+        return self.write_queue.submit(path, lambda: image_writer.encode_image(crop, ext, color_order='bgr'),
+                                       tag=(group_name, False))
+
+    def _save_all(self, crops, bboxes, path, group_name=None):
+        """
+        按阅读顺序给所有证件编号并并行保存。
+
+        返回:
+            list[str]: 按序号排列的已保存路径
+        """
+        order = reading_order(bboxes) if bboxes is not None and len(bboxes) == len(crops) else range(len(crops))
+        # 写入失败的证件不计入结果，也不加入缩略图栏
+        paths = [indexed_path(path, n + 1) for n in range(len(order))]
+        futures = [self._write(crops[i], saved_path, group_name) for saved_path, i in zip(paths, order)]
+        saved = []
+        for saved_path, future in zip(paths, futures):
+            try:
+                future.result()
+                saved.append(saved_path)
+            except Exception as e:
+                logger.error(f"保存卡片图片失败: {saved_path}: {e}")
+        return saved
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            frame, path, group_name, rotation = task
+            message = None
+            try:
+                out = self._get_card_net().infer(rotate_frame(frame, rotation))
+                crops = out.get('OUTPUT_IMGS', []) if out else []
+                if not crops:
+                    logger.warning("未检测到任何卡片")
+                    message = "未检测到任何卡片"
+                elif self.multi_card:
+                    logger.info(f"检测到 {len(crops)} 个卡片")
+                    paths = self._save_all(crops, out.get('BBOX'), path, group_name)
+                    # 全部写完后按序号依次加入缩略图栏
+                    for saved_path in paths:
+                        self.on_saved(saved_path, group_name)
+                    message = f"保存 {len(paths)}/{len(crops)} 张卡片图片成功：{os.path.dirname(path)}"
+                else:
+                    logger.info(f"检测到 {len(crops)} 个卡片")
+                    # 写入失败时异常交给下面的 except，不报告成功也不加入缩略图栏
+                    self._write(crops[0], path, group_name).result()
+                    message = f"保存卡片图片成功：{path}"
+                    self.on_saved(path, group_name)
+            except Exception as e:
+                logger.error(f"证件提取失败: {e}")
+                message = f"保存卡片图片失败: {e}"
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                self._notify(message)
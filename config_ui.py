@@ -108,7 +108,7 @@ class ConfigFrame(wx.Frame):
 
             value = ctrl.GetValue().strip()
 
-            if option in ('dpi', 'merge_image_interval', 'usb_index'):
+            if option in ('dpi', 'merge_image_interval', 'usb_index', 'target_fps', 'detection_width', 'num_threads', 'jpeg_quality'):
                 if not is_int(value):
                     errors.append(f"{self.labels.get(option, option)} 应为正整数")
 
@@ -0,0 +1,150 @@
+import threading
+import cv2
+import numpy as np
+
+from cammer_utils import rotate_points
+
+# rotate_frame 的旋转角度对应的 np.rot90 次数（np.rot90 为逆时针旋转）
+_ROT90_TIMES = {0: 0, 90: -1, 180: 2, 270: 1}
+
+
+def fit_frame_to_canvas(frame, width, height, canvas=None, background=(200, 200, 200),
+                        rotation=0, quad=None, quad_color=(0, 255, 0), quad_thickness=2):
+    """
+    将 BGR 帧等比缩放并居中绘制到 RGB 画布上。
+
+    旋转合并在缩放这一步中完成：先把未旋转的帧缩放到显示尺寸，
+    再以旋转视图的方式拷贝进画布，不会对整帧原图做旋转。
+
+    参数:
+        frame (np.ndarray): 未旋转的 BGR 图像
+        width, height (int): 画布尺寸
+        canvas (np.ndarray): 可复用的画布，尺寸不符时重新分配
+        background (tuple): 背景颜色 (R, G, B)
+        rotation (int): 显示时的旋转角度（0、90、180、270），与 rotate_frame 一致
+        quad (np.ndarray): 未旋转原图坐标下的文档四边形 (4, 2)，为 None 时不绘制
+        quad_color (tuple): 四边形颜色 (R, G, B)
+        quad_thickness (int): 四边形线宽（画布像素）
+    返回:
+        np.ndarray: 连续内存的 RGB 画布，可直接用于 wx.Bitmap.FromBuffer
+    """
+    if canvas is None or canvas.shape[:2] != (height, width):
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[:] = background
+
+    rotation %= 360
+    h, w = frame.shape[:2]
+    # 旋转后的尺寸
+    rotated_w, rotated_h = (h, w) if rotation in (90, 270) else (w, h)
+
+    # 计算缩放后的尺寸（保持宽高比）
+    scale = min(width / rotated_w, height / rotated_h)
+    new_width = max(1, int(rotated_w * scale))
+    new_height = max(1, int(rotated_h * scale))
+    # 缩放目标为未旋转方向的尺寸
+    resize_size = (new_height, new_width) if rotation in (90, 270) else (new_width, new_height)
+
+    # 缩小用 INTER_AREA 抗锯齿，放大用 INTER_LINEAR
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(frame, resize_size, interpolation=interpolation)
+    if resized.ndim == 2:
+        resized = cv2.cvtColor(resized, cv2.COLOR_GRAY2RGB)
+    else:
+        resized = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+    # 居中粘贴；旋转通过 np.rot90 视图在拷贝时完成
+    x_offset = (width - new_width) // 2
+    y_offset = (height - new_height) // 2
+    canvas[y_offset:y_offset + new_height, x_offset:x_offset + new_width] = \
+        np.rot90(resized, _ROT90_TIMES.get(rotation, 0))
+
+    if quad is not None:
+        points = rotate_points(quad, rotation, w, h) * scale + (x_offset, y_offset)
+        cv2.polylines(canvas, [np.round(points).astype(np.int32)], True, quad_color, quad_thickness)
+    return canvas
+
+
+class DisplayPipeline:
+    """
+    预览显示流水线。
+
+    在处理线程中完成缩放、旋转和 BGR→RGB 转换，GUI 线程只负责把画布交给 wx.Bitmap。
+    同一时间最多只有一个待处理的 wx.CallAfter，GUI 来不及显示时新帧直接覆盖待显示帧，
+    避免事件在 GUI 队列中堆积。画布在三个缓冲区之间轮换复用。
+    """
+
+    def __init__(self, on_canvas, background=(200, 200, 200), call_after=None):
+        """
+        参数:
+            on_canvas (callable): 在 GUI 线程中调用，参数为 RGB 画布 (np.ndarray)
+            background (tuple): 画布背景颜色 (R, G, B)
+            call_after (callable): 把函数转到 GUI 线程执行，None 时使用 wx.CallAfter
+        """
+        if call_after is None:
+            import wx
+            call_after = wx.CallAfter
+        self.on_canvas = on_canvas
+        self._call_after = call_after
+        self.background = background
+        self.display_size = None
+        self._lock = threading.Lock()
+        self._free = [None, None, None]
+        self._pending = None
+        # 统计：已渲染帧数、已显示帧数、被合并（覆盖）的帧数
+        self.rendered = 0
+        self.shown = 0
+        self.coalesced = 0
+
+    def set_display_size(self, width, height):
+        """更新显示区域尺寸（在 GUI 线程中调用）"""
+        if width > 0 and height > 0:
+            self.display_size = (width, height)
+
+    def submit(self, frame, rotation=0, quad=None):
+        """
+        在处理线程中提交一帧待显示的 BGR 图像。
+
+        参数:
+            frame (np.ndarray): 未旋转的 BGR 图像
+            rotation (int): 显示时的旋转角度
+            quad (np.ndarray): 未旋转原图坐标下的文档四边形，绘制在画布上
+        """
+        size = self.display_size
+        if size is None or frame is None:
+            return
+        with self._lock:
+            canvas = self._free.pop() if self._free else None
+        canvas = fit_frame_to_canvas(frame, size[0], size[1], canvas, self.background,
+                                     rotation=rotation, quad=quad)
+
+        with self._lock:
+            self.rendered += 1
+            previous = self._pending
+            self._pending = canvas
+            if previous is not None:
+                # GUI 尚未取走上一帧：直接替换，不再追加 CallAfter
+                self.coalesced += 1
+                self._free.append(previous)
+                return
+        self._call_after(self._deliver)
+
+    def _deliver(self):
+        with self._lock:
+            canvas = self._pending
+            self._pending = None
+        if canvas is None:
+            return
+        try:
+            self.on_canvas(canvas)
+            self.shown += 1
+        finally:
+            with self._lock:
+                self._free.append(canvas)
+
+    def stats(self):
+        """返回显示流水线计数"""
+        return {
+            'rendered': self.rendered,
+            'shown': self.shown,
+            'coalesced': self.coalesced,
+        }
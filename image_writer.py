@@ -0,0 +1,150 @@
+import os
+import tempfile
+import cv2
+import numpy as np
+from loguru import logger
+
+# JPEG 色度抽样配置值对应的 OpenCV 参数（OpenCV 4.5.5 起支持），以及 PIL 的 subsampling 取值
+_CV_SAMPLING = {
+    '444': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_444', None),
+    '422': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_422', None),
+    '420': getattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR_420', None),
+}
+_PIL_SAMPLING = {'444': 0, '422': 1, '420': 2}
+
+
+class ImageWriteOptions:
+    """
+    图片编码设置，对应配置文件 [SCANNER] 节中的 jpeg_* 选项。
+    """
+
+    def __init__(self, quality=95, subsampling='420', progressive=False, optimize=False):
+        """
+        参数:
+            quality (int): JPEG 质量 1-100
+            subsampling (str): 色度抽样，444、422 或 420
+            progressive (bool): 是否生成渐进式 JPEG
+            optimize (bool): 是否优化霍夫曼表（文件更小，编码稍慢）
+        """
+        self.quality = max(1, min(100, int(quality)))
+        self.subsampling = str(subsampling).strip()
+        if self.subsampling not in _PIL_SAMPLING:
+            logger.warning(f"不支持的色度抽样 {subsampling}，使用 420")
+            self.subsampling = '420'
+        self.progressive = progressive
+        self.optimize = optimize
+
+    @classmethod
+    def from_config(cls, config):
+        """从 configparser 配置中读取 [SCANNER] 节的 jpeg_* 选项"""
+        return cls(
+            quality=config.getint('SCANNER', 'jpeg_quality', fallback=95),
+            subsampling=config.get('SCANNER', 'jpeg_subsampling', fallback='420'),
+            progressive=config.getboolean('SCANNER', 'jpeg_progressive', fallback=False),
+            optimize=config.getboolean('SCANNER', 'jpeg_optimize', fallback=False),
+        )
+
+
+# 全局默认编码设置，程序启动时由 configure 按配置文件更新
+default_options = ImageWriteOptions()
+
+
+def configure(config):
+    """按配置文件更新全局默认编码设置"""
+    global default_options
+    default_options = ImageWriteOptions.from_config(config)
+
+
+def _to_bgr(frame, color_order):
+    if frame.ndim == 2 or color_order == 'bgr':
+        return frame
+    if color_order == 'rgb':
+        return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+    raise ValueError(f"不支持的颜色顺序: {color_order}")
+
+
+def _encode_jpeg_pil(frame, options):
+    """OpenCV 不支持色度抽样参数时使用 PIL 编码"""
+    import io
+    from PIL import Image
+
+    image = Image.fromarray(frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=options.quality, subsampling=_PIL_SAMPLING[options.subsampling],
+               progressive=options.progressive, optimize=options.optimize)
+    return buffer.getvalue()
+
+
+def encode_image(frame, ext='.jpg', color_order='bgr', options=None):
+    """
+    将图像编码为指定格式的字节串，不依赖 wx。
+
+    参数:
+        frame (np.ndarray): 图像，灰度或三通道
+        ext (str): 文件扩展名，决定编码格式
+        color_order (str): frame 的颜色顺序，bgr 或 rgb
+        options (ImageWriteOptions): JPEG 编码设置，None 时使用全局默认设置
+    返回:
+        bytes: 编码后的图像数据
+    """
+    options = options or default_options
+    ext = ext.lower()
+    frame = _to_bgr(np.ascontiguousarray(frame), color_order)
+
+    params = []
+    if ext in ('.jpg', '.jpeg'):
+        sampling = _CV_SAMPLING[options.subsampling]
+        if sampling is None:
+            return _encode_jpeg_pil(frame, options)
+        params = [cv2.IMWRITE_JPEG_QUALITY, options.quality,
+                  cv2.IMWRITE_JPEG_SAMPLING_FACTOR, sampling,
+                  cv2.IMWRITE_JPEG_PROGRESSIVE, int(options.progressive),
+                  cv2.IMWRITE_JPEG_OPTIMIZE, int(options.optimize)]
+    ok, buffer = cv2.imencode(ext, frame, params)
+    if not ok:
+        raise IOError(f"图像编码失败: {ext}")
+    return buffer.tobytes()
+
+
+def atomic_write(path, data):
+    """
+    原子写入文件：先写入同目录下的临时文件，刷新到磁盘后再重命名为目标文件，
+    写入中途失败或程序退出时不会留下不完整的目标文件。
+
+    参数:
+        path (str): 目标文件路径
+        data (bytes): 文件内容
+    返回:
+        int: 写入的字节数
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def write_image(frame, path, color_order='bgr', options=None):
+    """
+    编码并原子写入图像文件。先编码再写字节，支持中文路径。
+
+    参数:
+        frame (np.ndarray): 图像
+        path (str): 保存路径，扩展名决定编码格式
+        color_order (str): frame 的颜色顺序，bgr 或 rgb
+        options (ImageWriteOptions): JPEG 编码设置，None 时使用全局默认设置
+    返回:
+        int: 写入的字节数
+    """
+    data = encode_image(frame, os.path.splitext(path)[1] or '.jpg', color_order, options)
+    return atomic_write(path, data)
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+from loguru import logger
+
+# OpenCV DNN 后端与计算设备的配置名称映射
+DNN_BACKENDS = {
+    'default': cv2.dnn.DNN_BACKEND_DEFAULT,
+    'opencv': cv2.dnn.DNN_BACKEND_OPENCV,
+    'openvino': cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+}
+DNN_TARGETS = {
+    'cpu': cv2.dnn.DNN_TARGET_CPU,
+    'opencl': cv2.dnn.DNN_TARGET_OPENCL,
+    'opencl_fp16': cv2.dnn.DNN_TARGET_OPENCL_FP16,
+}
+
+
+class InferenceSettings:
+    """
+    ONNX 模型的推理引擎设置，对应配置文件中的 [INFERENCE] 节。
+    """
+
+    def __init__(self, engine='opencv', backend='default', target='cpu', num_threads=0, warmup=True):
+        """
+        参数:
+            engine (str): 推理引擎，opencv 或 onnxruntime
+            backend (str): OpenCV DNN 后端，default、opencv 或 openvino
+            target (str): OpenCV DNN 计算设备，cpu、opencl 或 opencl_fp16
+            num_threads (int): 推理线程数，0 表示使用库的默认值
+            warmup (bool): 加载后是否用空输入预热一次
+        """
+        self.engine = engine.strip().lower()
+        self.backend = backend.strip().lower()
+        self.target = target.strip().lower()
+        self.num_threads = num_threads
+        self.warmup = warmup
+
+    @classmethod
+    def from_config(cls, config):
+        """从 configparser 配置中读取 [INFERENCE] 节"""
+        return cls(
+            engine=config.get('INFERENCE', 'engine', fallback='opencv'),
+            backend=config.get('INFERENCE', 'backend', fallback='default'),
+            target=config.get('INFERENCE', 'target', fallback='cpu'),
+            num_threads=config.getint('INFERENCE', 'num_threads', fallback=0),
+            warmup=config.getboolean('INFERENCE', 'warmup', fallback=True),
+        )
+
+    def __repr__(self):
+        return (f"InferenceSettings(engine={self.engine!r}, backend={self.backend!r}, target={self.target!r}, "
+                f"num_threads={self.num_threads}, warmup={self.warmup})")
+
+
+class OnnxRuntimeNet:
+    """
+    以 cv2.dnn.Net 的接口（setInput / forward / getUnconnectedOutLayersNames）包装 onnxruntime 会话，
+    模型类无需区分推理引擎。
+    """
+
+    def __init__(self, model_path, num_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        self._blob = None
+
+    def getUnconnectedOutLayersNames(self):
+        return tuple(self.output_names)
+
+    def setInput(self, blob):
+        self._blob = np.ascontiguousarray(blob, dtype=np.float32)
+
+    def forward(self, names=None):
+        if names is None or isinstance(names, str):
+            name = names or self.output_names[0]
+            return self.session.run([name], {self.input_name: self._blob})[0]
+        return self.session.run(list(names), {self.input_name: self._blob})
+
+
+def _load_opencv_net(model_path, settings):
+    net = cv2.dnn.readNet(model_path)
+    backend = DNN_BACKENDS.get(settings.backend)
+    target = DNN_TARGETS.get(settings.target)
+    if backend is None or target is None:
+        logger.warning(f"未知的推理后端或设备 {settings.backend}/{settings.target}，使用默认设置")
+        backend, target = cv2.dnn.DNN_BACKEND_DEFAULT, cv2.dnn.DNN_TARGET_CPU
+
+    if backend != cv2.dnn.DNN_BACKEND_DEFAULT and target not in cv2.dnn.getAvailableTargets(backend):
+        logger.warning(f"推理后端 {settings.backend}/{settings.target} 不可用，使用默认设置")
+        backend, target = cv2.dnn.DNN_BACKEND_DEFAULT, cv2.dnn.DNN_TARGET_CPU
+
+    net.setPreferableBackend(backend)
+    net.setPreferableTarget(target)
+    if settings.num_threads > 0:
+        # OpenCV 的线程数为进程级设置，对所有模型生效
+        cv2.setNumThreads(settings.num_threads)
+    return net
+
+
+def load_model(model_path, settings=None, input_shape=None):
+    """
+    按推理设置加载 ONNX 模型。
+
+    参数:
+        model_path (str): 模型文件路径
+        settings (InferenceSettings): 推理设置，None 时等同于直接 cv2.dnn.readNet
+        input_shape (tuple): 预热输入的形状 (N, C, H, W)，None 时不预热
+    返回:
+        cv2.dnn.Net 或 OnnxRuntimeNet
+    """
+    if settings is None:
+        return cv2.dnn.readNet(model_path)
+
+    net = None
+    if settings.engine == 'onnxruntime':
+        try:
+            net = OnnxRuntimeNet(model_path, settings.num_threads)
+        except ImportError:
+            logger.warning("未安装 onnxruntime，使用 OpenCV DNN 推理")
+    elif settings.engine != 'opencv':
+        logger.warning(f"未知的推理引擎 {settings.engine}，使用 OpenCV DNN 推理")
+    if net is None:
+        net = _load_opencv_net(model_path, settings)
+    logger.info(f"已加载模型 {model_path}: {settings}")
+
+    if settings.warmup and input_shape is not None:
+        warmup_model(net, input_shape)
+    return net
+
+
+def warmup_model(net, input_shape):
+    """用全零输入执行一次前向传播，让首帧推理不再承担初始化开销"""
+    try:
+        net.setInput(np.zeros(input_shape, dtype=np.float32))
+        net.forward(net.getUnconnectedOutLayersNames())
+    except Exception as e:
+        logger.warning(f"模型预热失败: {e}")
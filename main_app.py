@@ -7,14 +7,25 @@ import cv2
 # 从自定义模块中导入主用户界面框架类
 from Document_Scanner_UI import Main_Ui_Frame
 # 从自定义摄像头工具模块中导入使用的函数
-from cammer_utils import get_camera_resolution, get_camera, rotate_frame, count_cameras, detect_contour, get_camera_supported_resolutions, draw_boxes_on_image, transform_document
+from cammer_utils import get_camera_resolution, get_camera, rotate_frame, count_cameras, detect_contour, get_camera_supported_resolutions, draw_boxes_on_image, transform_document, DocumentTracker, detect_document_quad, detection_scale
 from loguru import logger
 from app_config import get_config, save_config,update_os_and_save_path
 # 从自定义配置界面模块中导入配置窗口类
 from config_ui import ConfigFrame  # 这是一个自定义的配置窗口类
 from datetime import datetime
-from utils import save_image,merge_images,save_pdf,save_multip_pdf,get_save_path,measure_time,load_icon,resource_path
-from card_correction_utils import card_correction
+from utils import merge_images,save_multip_pdf,get_save_path,measure_time,load_icon,resource_path
+from card_correction_utils import create_card_correction
+from inference_engine import InferenceSettings
+from model_loader import LazyModel
+import image_writer
+from card_worker import CardExtractionWorker
+from write_queue import WriteBehindQueue
+from batch_export import BatchExporter, BatchExportCancelled
+from thumbnail_service import thumbnail_service
+from pdf_writer import compress_page, single_page_pdf
+from capture_pipeline import CapturePipeline, FpsController, resolve_target_fps
+from display_pipeline import DisplayPipeline
+from camera_discovery import camera_discovery, camera_capabilities
 
 
 # 获取当前脚本所在的目录
@@ -50,16 +61,25 @@ class Main_Frame(Main_Ui_Frame):
         self.webcam_url = ''
         # 摄像头分辨率，初始为 None
         self.camera_resolution = None
-        # 摄像头帧率，初始为 30
+        # 摄像头帧率，初始为 30（摄像头未报告帧率且未配置时使用）
         self.fps = 30
+        # 帧率控制器，初始为 None
+        self.fps_controller = None
         # 当前捕获的帧，初始为 None
         self.current_captured_frame = None
         # 摄像头捕获对象，初始为 None
         self.camera_capture = None
-        # 摄像头捕获线程，初始为 None
+        # 帧处理线程，初始为 None
         self.capture_thread = None
-        # update_bitmap中画布缓存，初始为 None
-        self.canvas_cache = None
+        # 采集流水线（采集线程 + 最新帧环形缓冲区），初始为 None
+        self.capture_pipeline = None
+        # 预览显示流水线：缩放与颜色转换在处理线程完成，GUI 线程只设置位图
+        self.display_pipeline = DisplayPipeline(self.update_bitmap)
+        # 布局完成前先以控件最小尺寸渲染
+        min_size = self.m_bitmap_camera.GetMinSize()
+        self.display_pipeline.set_display_size(min_size.GetWidth(), min_size.GetHeight())
+        # 当前预览位图尺寸，尺寸变化时才重新布局
+        self.display_bitmap_size = None
 
         # 设置默认分辨率(优先选择 1920x1440)
         self.PREFERRED_RESOLUTION = (1920, 1440)
@@ -79,15 +99,52 @@ class Main_Frame(Main_Ui_Frame):
         self.image_rotation = 0
         # 初始化配置信息
         self.config = get_config()
+        # 图片编码设置（JPEG 质量、色度抽样等）
+        image_writer.configure(self.config)
+        # 文档轮廓检测使用的图像宽度，0 表示原尺寸检测
+        self.detection_width = self.config.getint('SCANNER', 'detection_width', fallback=800)
+        # 轮廓预览跟踪器：首帧完整检测，之后只在上一帧轮廓附近细化
+        self.document_tracker = DocumentTracker(detect_width=self.detection_width)
+        self.is_outline_tracking_enabled = self.config.getboolean('SCANNER', 'outline_tracking', fallback=True)
         # 缩略图最大尺寸
         self.thumb_max_size=(256, 256)
         update_os_and_save_path()# 根据系统更新操作系统、默认保存路径信息
-
-        # 定义 ONNX 模型文件的路径
-        # onnxmodel = 'models/card_correction.onnx'
-        onnxmodel = resource_path('models/card_correction.onnx')# 使用资源路径获取模型文件路径
-        # 创建 card_correction 类的实例，传入 ONNX 模型路径、置信度阈值和 NMS 阈值
-        self.card_net = card_correction(onnxmodel)
+        # 状态栏第二栏显示实际帧率/目标帧率，第三栏显示待写入文件数
+        self.m_statusBar.SetFieldsCount(3)
+        self.m_statusBar.SetStatusWidths([-1, 200, 120])
+        # 后台写盘队列：拍照、展平、PDF 的编码与写盘不在 GUI 线程执行
+        self.write_queue = WriteBehindQueue(on_done=self._on_write_done, on_error=self._on_write_error,
+                                            on_pending=self._on_write_pending)
+        # 合并长图、多页 PDF 共用的批量导出线程池（线程数为 CPU 核心数）
+        self.batch_exporter = BatchExporter()
+
+        # 定义 ONNX 模型文件所在目录
+        model_dir = resource_path('models')# 使用资源路径获取模型目录
+        # 证件矫正模型变体（量化或小输入尺寸），见 card_correction_utils.CARD_MODEL_VARIANTS
+        card_model_variant = self.config.get('INFERENCE', 'card_model_variant', fallback='fp32')
+        # 在后台线程中创建 card_correction 实例（按 [INFERENCE] 配置选择推理引擎并预热），主窗口无需等待模型解析
+        inference_settings = InferenceSettings.from_config(self.config)
+        # 多张证件同时扫描时去除重叠的检测框
+        card_nms = self.config.getboolean('SCANNER', 'card_nms', fallback=True)
+        self.card_net = LazyModel('证件矫正模型',
+                                  lambda: create_card_correction(card_model_variant, model_dir, inference_settings,
+                                                                 use_nms=card_nms),
+                                  on_ready=self._on_model_ready, on_error=self._on_model_error)
+        self.m_statusBar.SetStatusText("证件矫正模型加载中...")
+        self.card_net.start()
+        # 证件提取后台执行器，推理与保存都在工作线程中完成，模型未加载完成时在工作线程中等待
+        # 多卡模式下一次拍照保存所有证件，按阅读顺序编号；证件图片同样经后台写盘队列编码、写盘
+        self.card_worker = CardExtractionWorker(self.card_net, on_saved=self._on_card_saved,
+                                                on_status=self._on_card_status,
+                                                multi_card=self.config.getboolean('SCANNER', 'multi_card', fallback=False),
+                                                write_queue=self.write_queue)
+
+        # 刷新摄像头列表按钮：插入新摄像头后重新探测（Windows、macOS 插拔不会使缓存失效）
+        self.m_button_refresh_camera = wx.Button(self, wx.ID_ANY, "刷新摄像头")
+        self.m_button_refresh_camera.SetBackgroundColour(wx.Colour(245, 245, 250))
+        self.m_comboBox_select_camera.GetContainingSizer().Insert(
+            2, self.m_button_refresh_camera, 0, wx.ALL | wx.EXPAND, 5)
+        self.m_button_refresh_camera.Bind(wx.EVT_BUTTON, self.on_refresh_cameras)
 
         # 打印是否使用 USB 摄像头的配置信息
         logger.debug(f'是否使用 USB 摄像头:{self.config.getboolean('CAMERA', 'use_usb_camera')}')
@@ -118,6 +175,7 @@ class Main_Frame(Main_Ui_Frame):
             if show_local:
                 parent_sizer.Show(self.m_comboBox_select_camera)
                 parent_sizer.Show(self.m_comboBox_select_camera_resolution)
+                parent_sizer.Show(self.m_button_refresh_camera)
                 parent_sizer.Hide(self.m_web_camera_address)
                 logger.info("已切换到本地摄像头模式")
                 self.m_checkBox_show_camera2_image.Enable(True)
@@ -125,6 +183,7 @@ class Main_Frame(Main_Ui_Frame):
             else:
                 parent_sizer.Hide(self.m_comboBox_select_camera)
                 parent_sizer.Hide(self.m_comboBox_select_camera_resolution)
+                parent_sizer.Hide(self.m_button_refresh_camera)
                 parent_sizer.Show(self.m_web_camera_address)
                 if len(self.m_web_camera_address.GetValue())<1:
                     self.m_web_camera_address.SetValue(self.config.get('CAMERA', 'ip_address'))
@@ -152,6 +211,18 @@ class Main_Frame(Main_Ui_Frame):
         self._update_camera_ui(show_local=False)
         wx.CallAfter(self.start_camera)
 
+    def on_refresh_cameras(self, event):
+        """
+        手动刷新本地摄像头列表。
+        先释放当前摄像头（正在使用的设备无法被探测），忽略缓存重新探测后重新启动摄像头。
+        """
+        logger.info("手动刷新摄像头列表")
+        self._release_camera_resources()
+        with wx.BusyCursor():
+            camera_indices = camera_discovery.refresh()
+        self.m_statusBar.SetStatusText(f"检测到 {len(camera_indices)} 个摄像头")
+        self.start_camera()
+
     def on_use_webcam(self, event):
         """
         切换使用网络摄像头状态。
@@ -204,16 +275,16 @@ class Main_Frame(Main_Ui_Frame):
             2. 初始化摄像头选择下拉框。
             3. 设置默认摄像头分辨率。
         """
-        # 获取可用摄像头数量
-        camera_nums = count_cameras()
-
+        # 获取可用摄像头编号（设备未变化时直接使用缓存，不再逐个探测）
+        camera_indices = camera_discovery.available_cameras()
+        camera_nums = len(camera_indices)
 
         # 如果有可用摄像头
         if camera_nums > 0:
             logger.info(f"检测到 {camera_nums} 个摄像头")
 
-            # 创建摄像头选项列表(0 到摄像头数量)
-            camera_items = [str(i) for i in range(camera_nums + 1)]
+            # 创建摄像头选项列表
+            camera_items = [str(i) for i in camera_indices]
 
             # 设置摄像头选择下拉框选项
             self.m_comboBox_select_camera.SetItems(camera_items)
@@ -223,14 +294,19 @@ class Main_Frame(Main_Ui_Frame):
 
             self.camera_capture = get_camera(
                 int(self.m_comboBox_select_camera.GetValue()))
+            if not self.camera_capture:
+                # 缓存的设备可能已拔出，重新探测一次
+                logger.warning("打开缓存的摄像头失败，重新探测摄像头")
+                camera_indices = camera_discovery.refresh()
+                if camera_indices:
+                    self.m_comboBox_select_camera.SetItems([str(i) for i in camera_indices])
+                    self.m_comboBox_select_camera.SetSelection(0)
+                    self.camera_capture = get_camera(camera_indices[0])
             if self.camera_capture:
-                # 获取 m_comboBox_select_camera 摄像头支持的分辨率列表(从最大到 720p)
-                self.resolution_list = get_camera_supported_resolutions(
-                    self.camera_capture)
-
-                # 获取该摄像头支持的所有分辨率
-                self.camera_supported_resolutions = get_camera_supported_resolutions(
-                    self.camera_capture)
+                # 获取该摄像头支持的所有分辨率（按设备缓存，首次使用时查询一次，不会释放当前摄像头）
+                self.camera_supported_resolutions = camera_capabilities.get_resolutions(
+                    int(self.m_comboBox_select_camera.GetValue()), self.camera_capture)
+                self.resolution_list = self.camera_supported_resolutions
                 logger.info(f"摄像头支持的分辨率列表: {self.camera_supported_resolutions}")
 
                 # 初始化分辨率选择下拉框
@@ -292,10 +368,17 @@ class Main_Frame(Main_Ui_Frame):
             self._prepare_display_area(debug=self.debug)
             self.is_camera_capture_running = True
 
-            frame_interval_ms = 1000 / self.fps  # ✅ 推荐这样传参清晰
+            # 采集线程只负责读帧，处理线程始终取最新帧
+            self.capture_pipeline = CapturePipeline(self.camera_capture)
+            self.capture_pipeline.start()
+
+            # 目标帧率：优先使用配置值，否则跟随摄像头报告的 CAP_PROP_FPS
+            configured_fps = self.config.getfloat('CAMERA', 'target_fps', fallback=0)
+            target_fps = resolve_target_fps(self.camera_capture, configured_fps, default_fps=self.fps)
+            logger.info(f"目标帧率: {target_fps:.1f}")
             self.capture_thread = threading.Thread(
                 target=self.update_frame,
-                args=(frame_interval_ms,self.update_frame_debug),
+                args=(target_fps,self.update_frame_debug),
                 daemon=True
             )
             self.capture_thread.start()
@@ -309,133 +392,93 @@ class Main_Frame(Main_Ui_Frame):
 
     def update_frame(self, target_fps=30,debug=False):
         """
-        更新摄像头帧的线程方法。
+        帧处理线程方法。
+
+        从采集流水线中取最新帧进行曲面展平或轮廓检测，再交给主线程显示。
+        读帧由采集线程完成，处理慢时旧帧会被丢弃而不会积压。
+        预览不对整帧做旋转：旋转合并在显示缩放中完成，整帧旋转只在保存时进行一次。
 
         Args:
-            target_fps (int): 目标帧率（每秒帧数），默认30。
+            target_fps (float): 目标帧率（每秒帧数），默认30。
         """
-        # 计算每帧之间的时间间隔（秒）
-        frame_interval_sec = 1.0 / target_fps
-        
-        last_processed_frame = None
+        # 帧率控制器：预算内休眠，超出预算时跳过错过的时间片而不休眠
+        fps_controller = FpsController(target_fps)
+        self.fps_controller = fps_controller
+        pipeline = self.capture_pipeline
 
-        # 当摄像头正常打开且捕获线程运行标志为 True 时，持续循环
-        while self.camera_capture.isOpened() and self.is_camera_capture_running:
+        # 当采集流水线运行且捕获线程运行标志为 True 时，持续循环
+        while pipeline.running and self.is_camera_capture_running:
             # 记录当前时间，用于计算处理一帧图像的耗时
-            start_time = time.time()
-
-            # 从摄像头读取一帧图像，ret 表示是否成功读取，frame 为读取的图像帧
-            ret, frame = self.camera_capture.read()
-            self.current_captured_frame=frame
-            
-
-            if ret:  # 如果成功读取到图像帧
-
-                # 复制旋转后的图像帧，作为当前捕获的图像帧
-                _frame = frame.copy()
-                # 根据设置的旋转角度对图像进行旋转
-                _frame = rotate_frame(_frame, self.image_rotation)
-
-                # # 如果启用了曲面展平功能
-                if self.is_surface_rectification_enabled:
-                    # 对图像进行曲面展平处理
-                    _frame = transform_document(_frame)
-                # 如果启用了方框检测功能
-                elif self.is_document_outline_detection_enabled:
-                    # 检测图像中的轮廓，_contour 为检测到的轮廓，frame 为处理后的图像
-                    _contour, _frame = detect_contour(_frame)
-                    if _contour is not None:  # 如果检测到轮廓
-                        # 在图像上绘制方框
-                        _frame = draw_boxes_on_image(_frame, _contour)
-                    else:
-                        logger.debug("未检测到轮廓")
-                # # 减少不必要的 UI 更新
-                # if last_processed_frame is None or not np.array_equal(_frame, last_processed_frame):
-                    
-                #     last_processed_frame = _frame
-                #     # 异步调用 update_bitmap 方法，确保在主线程中更新 UI
-                #     wx.CallAfter(self.update_bitmap, _frame)
-                wx.CallAfter(self.update_bitmap, _frame)
+            start_time = time.monotonic()
+
+            # 取环形缓冲区中的最新帧（副本），期间未取走的旧帧被丢弃
+            frame = pipeline.next_frame()
+            if frame is None:
+                continue
+            self.current_captured_frame = frame
+
+            # 检测在未旋转的帧上进行，旋转只作用于检测到的四边形和显示缩放，不再整帧旋转
+            rotation = self.image_rotation
+            _frame = frame
+            _quad = None
+            # # 如果启用了曲面展平功能
+            if self.is_surface_rectification_enabled:
+                # 对图像进行曲面展平处理
+                _frame = transform_document(frame, self.detection_width)
+            # 如果启用了方框检测功能
+            elif self.is_document_outline_detection_enabled:
+                # 只求轮廓坐标，绘制在缩放后的显示画布上，不再复制整帧
+                if self.is_outline_tracking_enabled:
+                    _quad = self.document_tracker.update(frame)
+                else:
+                    _contour = detect_document_quad(frame, detection_scale(frame, self.detection_width))
+                    _quad = _contour.reshape(4, 2) if _contour is not None else None
+                if _quad is None:
+                    logger.debug("未检测到轮廓")
+            # 缩放、旋转并转换颜色后交给 GUI 线程，未显示的旧帧会被合并
+            self.display_pipeline.submit(_frame, rotation, _quad)
+            pipeline.mark_processed()
 
             # 计算从开始读取帧到当前的处理耗时
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
             if debug:
                 logger.debug(f"处理一帧图像耗时: {elapsed:.4f} 秒")
                 logger.debug(f"读取到的图像尺寸: {frame.shape}")
-            # 计算需要休眠的时间，确保帧率稳定，若为负数则取 0
-            sleep_time = max(0, frame_interval_sec - elapsed)
-            # 线程休眠相应时间，维持固定帧率
-            time.sleep(sleep_time)
+                logger.debug(f"采集流水线计数: {pipeline.stats()}")
+                logger.debug(f"显示流水线计数: {self.display_pipeline.stats()}")
+            # 按目标帧率控制节拍；超出预算时直接处理下一帧（旧帧由环形缓冲区丢弃）
+            missed = fps_controller.wait()
+            if debug and missed:
+                logger.debug(f"处理超出帧预算，跳过 {missed} 个时间片")
+
+            achieved_fps = fps_controller.take_report()
+            if achieved_fps is not None:
+                wx.CallAfter(self.m_statusBar.SetStatusText,
+                             f"帧率: {achieved_fps:.1f} / {fps_controller.target_fps:.1f}", 1)
 
-    def update_bitmap(self, frame):
+    def update_bitmap(self, canvas):
         """
-        更新显示的位图（居中缩放版）。
-        将 frame 等比缩放并居中绘制在与显示控件尺寸一致的画布上，然后显示。
-        特点：
-            图像等比缩放，无拉伸、不变形；
-            居中显示，无论控件多大；
-            不使用 wx.Image 转换，提高性能；
-            背景为黑色，可改白色（用 np.full(..., 255, ...)）或自定义颜色。
+        更新显示的位图（在 GUI 线程中由显示流水线调用）。
+        canvas 已在处理线程中按控件尺寸等比缩放、居中并转换为 RGB，
+        这里只创建 wx.Bitmap 并设置到控件上；仅在尺寸变化时重新布局，不再整窗刷新。
         """
         if not hasattr(self, "m_bitmap_camera"):
             return
 
-        # 获取控件大小
-        camera_size = self.m_bitmap_camera.GetSize()
-        camera_width = camera_size.GetWidth()
-        camera_height = camera_size.GetHeight()
-
-        # 原始图像尺寸
-        h, w = frame.shape[:2]
-        aspect_ratio = w / h
-
-        # 计算缩放后的尺寸（保持宽高比）
-        if camera_width / camera_height > aspect_ratio:
-            # 控件的宽高比大于图像的宽高比，高度填满控件
-            new_height = camera_height
-            # 根据高度计算缩放后的宽度
-            new_width = int(camera_height * aspect_ratio)
-        else:
-            # 控件的宽高比小于等于图像的宽高比，宽度填满控件
-            new_width = camera_width
-            # 根据宽度计算缩放后的高度
-            new_height = int(camera_width / aspect_ratio)
-
-        # 缩放图像
-        resized_frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-
-        # 创建与控件一样大的背景画布（可改成白色或其他颜色）
-        # canvas = np.zeros((camera_height, camera_width, 3), dtype=np.uint8) # 白色背景
-        # canvas = np.full((camera_height, camera_width, 3), (200, 200, 200), dtype=np.uint8)  # 浅灰背景
-        
-        # 创建与控件一样大的背景画布（可改成白色或其他颜色），使用缓存
-        if self.canvas_cache is None or self.canvas_cache.shape[:2] != (camera_height, camera_width):
-            self.canvas_cache = np.full((camera_height, camera_width, 3), (200, 200, 200), dtype=np.uint8)  # 浅灰背景
-        else:
-            self.canvas_cache[:] = (200, 200, 200)  # 重置背景颜色
-
-        # 计算居中位置
-        x_offset = (camera_width - new_width) // 2
-        y_offset = (camera_height - new_height) // 2
-
-        # 将缩放后的图像粘贴到画布中心
-        self.canvas_cache[y_offset:y_offset + new_height, x_offset:x_offset + new_width] = resized_frame
-
-        # 转为 RGB（wx.Bitmap 需要 RGB 顺序）
-        canvas_rgb = cv2.cvtColor(self.canvas_cache, cv2.COLOR_BGR2RGB)
-        # 确保数组内存连续，满足 wx.Bitmap 的要求
-        canvas_rgb = np.ascontiguousarray(canvas_rgb)
-
+        height, width = canvas.shape[:2]
         # 创建 wx.Bitmap 并显示
-        self.bitmap = wx.Bitmap.FromBuffer(camera_width, camera_height, canvas_rgb)
+        self.bitmap = wx.Bitmap.FromBuffer(width, height, canvas)
         self.m_bitmap_camera.SetBitmap(self.bitmap)
-        # self.m_bitmap_camera.Refresh()
-        # 获取包含摄像头图像的 sizer
-        sizer = self.m_bitmap_camera.GetContainingSizer()
-        # 刷新 sizer，确保显示最新的位图
-        sizer.Layout()
-        # 刷新整个对话框，确保所有组件都得到正确显示
-        self.Refresh()
+
+        if self.display_bitmap_size != (width, height):
+            self.display_bitmap_size = (width, height)
+            sizer = self.m_bitmap_camera.GetContainingSizer()
+            if sizer:
+                sizer.Layout()
+
+        # 同步控件尺寸，窗口缩放后下一帧按新尺寸渲染
+        camera_size = self.m_bitmap_camera.GetSize()
+        self.display_pipeline.set_display_size(camera_size.GetWidth(), camera_size.GetHeight())
 
     def on_document_outline_detection(self, event):
         """
@@ -447,6 +490,7 @@ class Main_Frame(Main_Ui_Frame):
         """
         if self.is_document_outline_detection_enabled == False:
             # 如果当前未启用方框检测，则启用它并更新复选框状态
+            self.document_tracker.reset()
             self.m_checkBox_detect_squares.SetValue(True)
             self.is_document_outline_detection_enabled = True
             # 禁用曲面展平功能
@@ -480,6 +524,45 @@ class Main_Frame(Main_Ui_Frame):
             self.is_surface_rectification_enabled = False
         logger.info(f"切换是否曲面找平: {self.is_surface_rectification_enabled}")
 
+    def _current_group(self):
+        """按组保存时返回分组名，否则返回 None"""
+        return self.m_TextCtrl_GroupName.GetValue() if self.m_checkBox_saveByGroup.IsChecked() else None
+
+    def _save_in_background(self, path, produce, add_to_gallery=True):
+        """
+        将保存任务提交到后台写盘队列，写完后再更新状态栏和缩略图栏。
+
+        参数:
+            path (str): 保存路径
+            produce (callable): 在工作线程中生成文件内容（bytes）的函数
+            add_to_gallery (bool): 写完后是否加入缩略图栏
+        """
+        self.write_queue.submit(path, produce, tag=(self._current_group(), add_to_gallery))
+        self.m_statusBar.SetStatusText(f"正在保存: {path}")
+
+    def _on_write_done(self, path, tag):
+        """文件写入完成（在写盘线程中调用）"""
+        wx.CallAfter(self._on_file_saved, path, *tag)
+
+    def _on_file_saved(self, path, group_name, add_to_gallery):
+        if not self:  # 退出时窗口已销毁
+            return
+        self.m_statusBar.SetStatusText(f"已保存: {path}")
+        if add_to_gallery:
+            self._add_to_gallery(path, group_name)
+
+    def _on_write_error(self, path, error, tag):
+        """文件写入失败（在写盘线程中调用）"""
+        self._show_error(f"保存文件失败: {path}\n{error}")
+
+    def _on_write_pending(self, pending):
+        """待写入文件数变化（在调用线程中调用）"""
+        wx.CallAfter(self._show_pending_writes, pending)
+
+    def _show_pending_writes(self, pending):
+        if self:
+            self.m_statusBar.SetStatusText(f"待写入: {pending}" if pending else "", 2)
+
     def on_take_photo(self, event):
         """
         此方法负责拍照并保存摄像头获得的原始图像。
@@ -497,15 +580,9 @@ class Main_Frame(Main_Ui_Frame):
                 else:
                     path = get_save_path()
 
-                # 保存图像
-                frame = self.current_captured_frame
-                save_image(frame, path)
-                self.m_statusBar.SetStatusText(f"已保存图片: {path}")
-
-                if self.m_checkBox_saveByGroup.IsChecked():
-                    wx.CallAfter(self.m_thumbnailgallery.add_image, path,group_name=self.m_TextCtrl_GroupName.GetValue(),)
-                else:
-                    wx.CallAfter(self.m_thumbnailgallery.add_image, path)
+                # 保存图像：旋转、编码与写盘在后台写盘队列中完成
+                frame, rotation = self.current_captured_frame, self.image_rotation
+                self._save_in_background(path, lambda: image_writer.encode_image(rotate_frame(frame, rotation)))
             except Exception as e:
                 logger.error(f"on_take_photo 保存图像时出错: {e}")
                 self._show_error(f"保存图像失败: {e}")
@@ -531,17 +608,11 @@ class Main_Frame(Main_Ui_Frame):
                 else:
                     path = get_save_path()
                 # 保存图像
-                # 对图像进行曲面展平处理
+                # 对图像进行曲面展平处理，展平、编码与写盘在后台写盘队列中完成
                 logger.debug("保存曲面展平处理后的图像")
-                frame = transform_document(self.current_captured_frame)
-
-                save_image(frame, path)
-                self.m_statusBar.SetStatusText(f"已保存图片: {path}")
-
-                if self.m_checkBox_saveByGroup.IsChecked():
-                    wx.CallAfter(self.m_thumbnailgallery.add_image, path,group_name=self.m_TextCtrl_GroupName.GetValue(),)
-                else:
-                    wx.CallAfter(self.m_thumbnailgallery.add_image, path)
+                frame, rotation = self.current_captured_frame, self.image_rotation
+                self._save_in_background(path, lambda: image_writer.encode_image(
+                    transform_document(rotate_frame(frame, rotation), self.detection_width)))
             except Exception as e:
                 logger.error(f"on_take_document 保存图像时出错: {e}")
                 self._show_error(f"保存图像失败: {e}")
@@ -564,15 +635,27 @@ class Main_Frame(Main_Ui_Frame):
                 else:
                     path = get_save_path("pdf")
 
-                # 对图像进行曲面展平处理
+                # 对图像进行曲面展平处理，页面只压缩一次（JPEG 或黑白 G4），PDF 与图片共用压缩结果
                 logger.debug("保存曲面展平处理后的图像为 PDF 文件")
-                frame = transform_document(self.current_captured_frame)
-                save_pdf(frame, path)
-                self.m_statusBar.SetStatusText(f"保存PDF文件成功：{path}")
+                frame, rotation = self.current_captured_frame, self.image_rotation
+                compression = self.config.get('SCANNER', 'pdf_compression', fallback='jpeg')
+                dpi = self.config.getint('SCANNER', 'dpi', fallback=300)
+                save_image_too = self.config.getboolean('SCANNER', 'pdf_save_image', fallback=False)
+                group_name = self._current_group()
+
+                def produce_pdf():
+                    page = compress_page(transform_document(rotate_frame(frame, rotation), self.detection_width),
+                                         compression)
+                    if save_image_too:
+                        # 同一份压缩数据另存为图片：黑白页面为 G4 TIFF，其他为 JPEG
+                        self.write_queue.submit(f"{os.path.splitext(path)[0]}.{page.extension}",
+                                                lambda: page.data, tag=(group_name, True))
+                    return single_page_pdf(page, dpi)
+                self._save_in_background(path, produce_pdf, add_to_gallery=False)
             except Exception as e:
                 logger.error(f"on_take_pdf_doc 保存PDF文件时出错: {e}")
                 self._show_error(f"保存PDF文件失败: {e}")
-                self.m_statusBar.SetStatusText("保存PDF文件失败: {e}")
+                self.m_statusBar.SetStatusText(f"保存PDF文件失败: {e}")
         else:
             logger.error("on_take_pdf_doc 没有捕获到图像")
             return
@@ -591,12 +674,60 @@ class Main_Frame(Main_Ui_Frame):
                 path = get_save_path(suffix="pdf",prefix="合并")
 
             images_path=self.m_thumbnailgallery.get_images()
-            save_multip_pdf(images_path,path)
-            self.m_statusBar.SetStatusText(f"合并PDF文件成功：{path}")
+            # 在批量导出线程池中并行读取各页，按顺序流式写入 PDF，进度对话框可取消
+            self._run_batch_export("生成PDF", len(images_path),
+                                   lambda on_progress, cancel: save_multip_pdf(
+                                       images_path, path, on_progress=on_progress,
+                                       executor=self.batch_exporter, cancel=cancel),
+                                   f"合并PDF文件成功：{path}", '批量合并保存PDF文件时出错!')
         except Exception as e:
             logger.error(f"on_take_mutip_pdf_doc 批量合并保存PDF文件时出错: {e}")
             self._show_error('批量合并保存PDF文件时出错!')
-            self.m_statusBar.SetStatusText("合并PDF文件失败: {e}")  
+            self.m_statusBar.SetStatusText(f"合并PDF文件失败: {e}")
+
+    def _run_batch_export(self, title, total, export, success_message, error_message):
+        """
+        在后台线程中执行批量导出，显示可取消的进度对话框。
+
+        参数:
+            title (str): 对话框标题
+            total (int): 图片总数
+            export (callable): 导出函数，参数为 (on_progress, cancel)，返回是否成功
+            success_message (str): 成功时状态栏显示的信息
+            error_message (str): 失败时提示的信息
+        """
+        cancel = threading.Event()
+        dialog = wx.ProgressDialog(title, f"{title}: 0/{total}", maximum=max(total, 1), parent=self,
+                                   style=wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE |
+                                   wx.PD_ELAPSED_TIME | wx.PD_REMAINING_TIME)
+
+        def update(done, count):
+            if dialog and not cancel.is_set():
+                keep_going, _ = dialog.Update(min(done, count), f"{title}: {done}/{count}")
+                if not keep_going:
+                    cancel.set()
+
+        def finish(message):
+            if dialog:
+                dialog.Destroy()
+            if self:
+                self.m_statusBar.SetStatusText(message)
+
+        def run():
+            try:
+                ok = export(lambda done, count: wx.CallAfter(update, done, count), cancel)
+            except BatchExportCancelled:
+                wx.CallAfter(finish, f"已取消{title}")
+                return
+            except Exception as e:
+                logger.error(f"{title}出错: {e}")
+                ok = False
+            if not ok:
+                self._show_error(error_message)
+            wx.CallAfter(finish, success_message if ok else f"{title}失败")
+
+        threading.Thread(target=run, name="BatchExport", daemon=True).start()
+
     def on_merge_photos(self, event):
         """
         此方法负责将预览栏中所有图像合并为一个长图片文件。
@@ -613,62 +744,77 @@ class Main_Frame(Main_Ui_Frame):
 
 
             images_path=self.m_thumbnailgallery.get_images()
-            padding=self.config.get('SCANNER', 'merge_image_interval')
-            merge_images(images_path,path,padding=padding)
-            self.m_statusBar.SetStatusText(f"合并图片成功：{path}")
+            padding=self.config.getint('SCANNER', 'merge_image_interval', fallback=5)
+            # 在批量导出线程池中并行解码、缩放，进度对话框可取消
+            self._run_batch_export("合并图片", len(images_path),
+                                   lambda on_progress, cancel: merge_images(
+                                       images_path, path, padding=padding, on_progress=on_progress,
+                                       executor=self.batch_exporter, cancel=cancel),
+                                   f"合并图片成功：{path}", '合并图片时出错!')
         except Exception as e:
             logger.error(f"on_merge_photos 合并图片时出错: {e}")
             self._show_error('合并图片时出错!')
-            self.m_statusBar.SetStatusText("合并图片失败: {e}")
+            self.m_statusBar.SetStatusText(f"合并图片失败: {e}")
 
     def on_take_card(self, event):
         """
-        拍照并保存检测到的卡片图像
+        拍照并提交到后台执行器提取卡片图像，不阻塞界面
         """
+        if self.card_net.failed:
+            self._show_error("证件矫正模型加载失败，无法提取证件")
+            return
         if self.current_captured_frame is not None:
             try:
+                if self.m_checkBox_saveByGroup.IsChecked():
+                    group_name = self.m_TextCtrl_GroupName.GetValue()
+                    logger.info(f"保存文件到组: {group_name}")
+                    path = get_save_path(suffix="jpg", prefix="卡片", group_name=group_name)
+                else:
+                    group_name = None
+                    path = get_save_path(suffix="jpg", prefix="卡片")
 
-                frame = self.current_captured_frame
-                # outimg, corner_points_list = self.card_net.detect(frame)
-                # 调用 大模型 对读取的图像进行目标检测，返回提取好的图片
-                out= self.card_net.infer(frame)
-
-                if not out:
-                    logger.warning("未检测到任何卡片")
-                    wx.CallAfter(wx.MessageBox, "未检测到任何卡片", "提示", wx.OK | wx.ICON_INFORMATION)
-                    return
-
-                logger.info(f"检测到 {len(out)} 个卡片")
-                crops = []
-                
-                for _out in out['OUTPUT_IMGS']:
-                    _out_rgb = cv2.cvtColor(_out, cv2.COLOR_BGR2RGB)
-                    crops.append(_out_rgb)
-
-                if crops:
-                    cropped = crops[0]
-                    # cropped = cv2.resize(cropped, (800, 500)) # 保存为缩略图
-
-                    if self.m_checkBox_saveByGroup.IsChecked():
-                        logger.info(f"保存文件到组: {self.m_TextCtrl_GroupName.GetValue()}")
-                        path = get_save_path(suffix="jpg", prefix="卡片", group_name=self.m_TextCtrl_GroupName.GetValue())
-                    else:
-                        path = get_save_path(suffix="jpg", prefix="卡片")
-
-                    save_image(cropped, path)
-                    self.m_statusBar.SetStatusText(f"保存卡片图片成功：{path}")
-                    if self.m_checkBox_saveByGroup.IsChecked():
-                        wx.CallAfter(self.m_thumbnailgallery.add_image, path, group_name=self.m_TextCtrl_GroupName.GetValue(), )
-                    else:
-                        wx.CallAfter(self.m_thumbnailgallery.add_image, path)
+                # 提交快照帧，旋转、推理、裁剪与保存在后台线程完成
+                self.card_worker.submit(self.current_captured_frame, path, group_name, self.image_rotation)
             except Exception as e:
-                logger.error(f"on_take_card 保存卡片图像时出错: {e}")
+                logger.error(f"on_take_card 提交卡片提取任务时出错: {e}")
                 self._show_error(f"保存卡片图像失败: {e}")
-                self.m_statusBar.SetStatusText("保存卡片图片失败: {e}")
+                self.m_statusBar.SetStatusText(f"保存卡片图片失败: {e}")
         else:
             logger.error("on_take_card 没有捕获到图像")
             return
 
+    def _on_model_ready(self, name, elapsed):
+        """模型加载完成（在加载线程中调用）"""
+        wx.CallAfter(self.m_statusBar.SetStatusText, f"{name}加载完成（{elapsed:.1f} 秒）")
+
+    def _on_model_error(self, name, error):
+        """模型加载失败（在加载线程中调用）"""
+        wx.CallAfter(self.m_statusBar.SetStatusText, f"{name}加载失败: {error}")
+
+    def _add_to_gallery(self, path, group_name=None):
+        """文件保存完成后在主线程中将图片加入缩略图栏"""
+        if group_name:
+            self.m_thumbnailgallery.add_image(path, group_name=group_name)
+        else:
+            self.m_thumbnailgallery.add_image(path)
+
+    def _on_card_saved(self, path, group_name):
+        """证件图片保存完成（在证件提取线程中调用）"""
+        wx.CallAfter(self._add_to_gallery, path, group_name)
+
+    def _on_card_status(self, message, pending):
+        """证件提取状态变化（在证件提取线程中调用）"""
+        wx.CallAfter(self._show_card_status, message, pending)
+
+    def _show_card_status(self, message, pending):
+        """在状态栏显示证件提取状态和待处理数量"""
+        if not self:  # 退出时窗口已销毁
+            return
+        if pending > 0:
+            message = f"{message}（待处理: {pending}）" if message else f"证件提取待处理: {pending}"
+        if message:
+            self.m_statusBar.SetStatusText(message)
+
 
     def on_right_rotation(self, event):
         """
@@ -724,6 +870,7 @@ class Main_Frame(Main_Ui_Frame):
                 logger.debug(f"摄像头图像的 size: {size}")
             # 设置摄像头图像控件的尺寸为 sizer 的尺寸
             self.m_bitmap_camera.SetSize(size)
+            self.display_pipeline.set_display_size(size.GetWidth(), size.GetHeight())
             # 将摄像头显示区域的尺寸设置为与 sizer 尺寸一致
             self.camera_resolution = size  # 以 sizer 尺寸为准
     def _release_camera_resources(self):
@@ -737,8 +884,15 @@ class Main_Frame(Main_Ui_Frame):
             if hasattr(self, "capture_thread") and self.capture_thread and self.capture_thread.is_alive():
                 # 设置摄像头捕获运行标志为 False，通知线程停止运行
                 self.is_camera_capture_running = False
+                # 停止采集线程，唤醒等待新帧的处理线程
+                if self.capture_pipeline is not None:
+                    self.capture_pipeline.stop()
                 # 等待线程结束，最多等待 1 秒
                 self.capture_thread.join(timeout=1)
+            if self.capture_pipeline is not None:
+                self.capture_pipeline.stop()
+                logger.info(f"采集流水线计数: {self.capture_pipeline.stats()}")
+                self.capture_pipeline = None
             # 检查是否存在摄像头捕获对象，并且该对象不为 None
             if hasattr(self, "camera_capture") and self.camera_capture is not None:
                 # 释放摄像头资源
@@ -783,6 +937,20 @@ class Main_Frame(Main_Ui_Frame):
 
         logger.debug("摄像头线程已停止")
 
+        # 停止证件提取后台线程：已拍摄的证件提取完并提交到写盘队列后再关闭写盘队列
+        if self.card_worker.pending:
+            self.m_statusBar.SetStatusText(f"正在提取 {self.card_worker.pending} 张证件...")
+        self.card_worker.stop(timeout=30)
+
+        # 等待后台写盘队列中的文件写完
+        pending = self.write_queue.pending
+        if pending:
+            logger.info(f"等待 {pending} 个文件写入完成")
+            self.m_statusBar.SetStatusText(f"正在写入 {pending} 个文件...")
+        self.write_queue.close(timeout=30)
+        self.batch_exporter.shutdown()
+        thumbnail_service.shutdown()
+
         # 销毁主窗口
         logger.debug("正在销毁主窗口")
         self.Destroy()
@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import Future
+from loguru import logger
+
+
+class LazyModel:
+    """
+    在后台线程中加载模型。
+
+    主窗口创建时只启动加载线程，不等待 ONNX 解析完成；
+    使用方通过 get() 取模型，已加载完成时立即返回，否则等待加载结果。
+    """
+
+    def __init__(self, name, factory, on_ready=None, on_error=None):
+        """
+        参数:
+            name (str): 模型名称，用于日志和状态提示
+            factory (callable): 无参数的模型构造函数，在后台线程中调用
+            on_ready (callable): 加载成功后在加载线程中调用，参数为 (name, 耗时秒数)
+            on_error (callable): 加载失败后在加载线程中调用，参数为 (name, 异常)
+        """
+        self.name = name
+        self.factory = factory
+        self.on_ready = on_ready
+        self.on_error = on_error
+        self.future = Future()
+        self._thread = None
+
+    def start(self):
+        """启动后台加载线程（重复调用无效）"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name=f"ModelLoader-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _load(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        start_time = time.monotonic()
+        try:
+            model = self.factory()
+        except Exception as e:
+            logger.exception(f"加载模型 {self.name} 失败: {e}")
+            self.future.set_exception(e)
+            if self.on_error:
+                self.on_error(self.name, e)
+            return
+        elapsed = time.monotonic() - start_time
+        logger.info(f"模型 {self.name} 加载完成，耗时 {elapsed:.2f} 秒")
+        self.future.set_result(model)
+        if self.on_ready:
+            self.on_ready(self.name, elapsed)
+
+    @property
+    def ready(self):
+        """模型是否已成功加载"""
+        return self.future.done() and self.future.exception() is None
+
+    @property
+    def failed(self):
+        """模型是否加载失败"""
+        return self.future.done() and self.future.exception() is not None
+
+    def get(self, timeout=None):
+        """
+        获取模型；尚未加载完成时等待（未启动时会先启动加载）。
+
+        参数:
+            timeout (float): 最长等待时间（秒），None 表示一直等待
+        返回:
+            加载完成的模型对象；加载失败时抛出加载时的异常
+        """
+        self.start()
+        return self.future.result(timeout)
@@ -0,0 +1,335 @@
+import io
+import os
+import shutil
+import tempfile
+import cv2
+import numpy as np
+from PIL import Image
+from loguru import logger
+import image_writer
+
+# JPEG 图像模式对应的 PDF 颜色空间；CMYK（Adobe 反相）等其他模式重新编码为 RGB JPEG
+_COLOR_SPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB'}
+# 单页 PDF 的压缩方式：jpeg、bilevel（黑白 CCITT G4）、auto（页面本身接近黑白时用 G4）
+PAGE_COMPRESSIONS = ('jpeg', 'bilevel', 'auto')
+
+
+def _number(value):
+    """PDF 数值：最多两位小数，去掉多余的 0"""
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class CompressedPage:
+    """
+    压缩一次的页面图像，同一份数据既可写入 PDF 也可直接保存为图片文件。
+
+    属性:
+        kind (str): 'jpeg' 或 'g4'
+        data (bytes): 完整的图片文件内容（JPEG 或 G4 压缩的 TIFF）
+        stream (memoryview): 嵌入 PDF 的压缩数据（JPEG 为整个文件，TIFF 为其中唯一的条带）
+        width, height (int): 像素尺寸
+        mode (str): 'RGB'、'L' 或 '1'
+        passthrough (bool): 是否直接取自已有图片文件的压缩数据（未重新编码）
+    """
+
+    def __init__(self, kind, data, width, height, mode, stream=None, passthrough=False):
+        self.kind = kind
+        self.data = data
+        self.stream = memoryview(data) if stream is None else stream
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.passthrough = passthrough
+
+    @property
+    def extension(self):
+        """保存为图片文件时的扩展名"""
+        return 'jpg' if self.kind == 'jpeg' else 'tif'
+
+
+def _g4_strip(tiff, data):
+    """取 G4 压缩 TIFF 中唯一条带的数据；不是单条带 G4 时返回 None"""
+    if tiff.info.get('compression') != 'group4':
+        return None
+    offsets, counts = tiff.tag_v2.get(273), tiff.tag_v2.get(279)
+    if not offsets or len(offsets) != 1:
+        return None
+    return memoryview(data)[offsets[0]:offsets[0] + counts[0]]
+
+
+def encode_bilevel(binary):
+    """
+    将黑白图像（0 为黑，255 为白）压缩为 CCITT G4 单条带 TIFF。
+
+    返回:
+        CompressedPage: 压缩结果；Pillow 缺少 libtiff 或不支持单条带写入时返回 None
+    """
+    height, width = binary.shape
+    buffer = io.BytesIO()
+    try:
+        Image.fromarray(binary > 127).save(buffer, format='TIFF', compression='group4', strip_size=1 << 30)
+    except Exception as e:
+        logger.warning(f"G4 压缩失败: {e}")
+        return None
+    data = buffer.getvalue()
+    with Image.open(io.BytesIO(data)) as tiff:
+        stream = _g4_strip(tiff, data)
+    if stream is None:
+        return None
+    return CompressedPage('g4', data, width, height, '1', stream)
+
+
+def is_bilevel(frame, max_gray_ratio=0.03, max_color_ratio=0.01):
+    """
+    判断页面是否本身接近黑白（文字稿、打印件），在缩小图上统计中间灰度和彩色像素占比。
+    """
+    scale = min(1.0, 800 / max(frame.shape[:2]))
+    small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else frame
+    if small.ndim == 3:
+        chroma = small.max(axis=2).astype(np.int16) - small.min(axis=2)
+        if np.count_nonzero(chroma > 40) > chroma.size * max_color_ratio:
+            return False
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray_pixels = np.count_nonzero((small > 48) & (small < 208))
+    return gray_pixels <= small.size * max_gray_ratio
+
+
+def binarize(frame, adaptive=True):
+    """
+    将 BGR 或灰度页面二值化（0 为黑，255 为白）。
+    adaptive 为 True 时用局部自适应阈值，可抵消拍摄时的光照不均；否则用 Otsu 全局阈值。
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if not adaptive:
+        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+    block = max(15, (gray.shape[1] // 40) | 1)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block, 15)
+
+
+def compress_page(frame, compression='jpeg', color_order='bgr', options=None):
+    """
+    将页面图像压缩一次，供 PDF 和图片文件共用。
+
+    参数:
+        frame (np.ndarray): 页面图像
+        compression (str): jpeg、bilevel 或 auto，见 PAGE_COMPRESSIONS
+        color_order (str): frame 的颜色顺序，bgr 或 rgb
+        options (ImageWriteOptions): JPEG 编码设置，None 时使用全局默认设置
+    返回:
+        CompressedPage: 压缩后的页面
+    """
+    if compression not in PAGE_COMPRESSIONS:
+        logger.warning(f"不支持的 PDF 压缩方式 {compression}，使用 jpeg")
+        compression = 'jpeg'
+    if compression == 'bilevel' or (compression == 'auto' and is_bilevel(frame)):
+        page = encode_bilevel(binarize(frame, adaptive=compression == 'bilevel'))
+        if page is not None:
+            return page
+        logger.warning("无法生成 G4 黑白页面，改用 JPEG")
+    data = image_writer.encode_image(frame, '.jpg', color_order, options)
+    return CompressedPage('jpeg', data, frame.shape[1], frame.shape[0], 'L' if frame.ndim == 2 else 'RGB')
+
+
+def load_page(path):
+    """
+    读取一页图像文件，可在批量导出线程池中并行调用。
+    JPEG 和单条带 G4 压缩的黑白 TIFF 直接使用文件中的压缩数据（只读取文件头获得尺寸），
+    其他格式解码后编码为 JPEG。
+
+    返回:
+        CompressedPage: 可直接写入 PDF 的页面
+    """
+    with Image.open(path) as img:
+        if img.format == 'TIFF' and img.mode == '1':
+            with open(path, 'rb') as f:
+                data = f.read()
+            stream = _g4_strip(img, data)
+            if stream is not None:
+                return CompressedPage('g4', data, img.width, img.height, '1', stream, passthrough=True)
+        if img.format == 'JPEG' and img.mode in _COLOR_SPACES:
+            with open(path, 'rb') as f:
+                data = f.read()
+            return CompressedPage('jpeg', data, img.width, img.height, img.mode, passthrough=True)
+        frame = np.asarray(img.convert('L' if img.mode in ('1', 'L') else 'RGB'))
+    return compress_page(frame, 'jpeg', color_order='rgb')
+
+
+def single_page_pdf(page, dpi=300):
+    """
+    生成只包含一页的 PDF，页面尺寸按 dpi 由像素尺寸换算。
+
+    参数:
+        page (CompressedPage): 已压缩的页面
+        dpi (int): 扫描精度
+    返回:
+        bytes: PDF 文件内容
+    """
+    buffer = io.BytesIO()
+    with StreamingPdfWriter(buffer, dpi=dpi) as writer:
+        writer.add_page(page)
+    return buffer.getvalue()
+
+
+class StreamingPdfWriter:
+    """
+    流式多页 PDF 写入器。
+
+    每添加一页就把该页的图像、内容流和页面对象写入文件，内存中只保留各对象的偏移量，
+    关闭时写入页面树、交叉引用表（xref）和文件尾。
+    JPEG 文件直接以 DCTDecode 嵌入原始字节，不解码也不重新编码；其他格式逐页解码后编码为 JPEG。
+    输出到文件路径时先写入同目录下的临时文件，完成后重命名，失败时不会留下不完整的 PDF。
+    """
+
+    def __init__(self, path, dpi=300):
+        """
+        参数:
+            path (str | file): 输出 PDF 文件路径，或可写的二进制文件对象（如 io.BytesIO）
+            dpi (int): 图像像素与页面尺寸的换算 DPI
+        """
+        self.path = path
+        self.dpi = dpi
+        if isinstance(path, (str, os.PathLike)):
+            folder, name = os.path.split(os.path.abspath(path))
+            fd, self._tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=folder)
+            self._file = os.fdopen(fd, 'wb')
+        else:
+            self._tmp_path = None
+            self._file = path
+        self._start = self._file.tell()
+        # 对象编号 -> 文件偏移；1 为文档目录，2 为页面树，页面对象从 3 开始
+        self._offsets = {}
+        self._pages = []
+        self._next_id = 3
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    @property
+    def page_count(self):
+        return len(self._pages)
+
+    def _new_id(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _begin(self, obj_id):
+        self._offsets[obj_id] = self._file.tell() - self._start
+        self._file.write(f"{obj_id} 0 obj\n".encode('ascii'))
+
+    def _write_object(self, obj_id, body):
+        self._begin(obj_id)
+        self._file.write(body.encode('ascii'))
+        self._file.write(b'\nendobj\n')
+
+    def _write_stream(self, obj_id, header, source, length):
+        """写入流对象，source 为 bytes 或可读文件对象（按块复制）"""
+        self._begin(obj_id)
+        self._file.write(f"<< {header} /Length {length} >>\nstream\n".encode('ascii'))
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._file.write(source)
+        else:
+            shutil.copyfileobj(source, self._file)
+        self._file.write(b'\nendstream\nendobj\n')
+
+    def add_jpeg(self, source, width, height, mode='RGB', length=None):
+        """
+        以 DCTDecode 添加一页 JPEG 图像。
+
+        参数:
+            source (bytes | file): JPEG 字节或已打开的 JPEG 文件
+            width, height (int): 图像像素尺寸
+            mode (str): 图像模式，L 或 RGB
+            length (int): source 为文件对象时的字节数
+        """
+        if length is None:
+            length = len(source)
+        self._add_image(f"/ColorSpace {_COLOR_SPACES[mode]} /BitsPerComponent 8 /Filter /DCTDecode",
+                        source, length, width, height)
+
+    def add_g4(self, source, width, height, length=None):
+        """
+        以 CCITTFaxDecode 添加一页 G4 压缩的黑白图像（TIFF 条带数据，1 为白）。
+        """
+        if length is None:
+            length = len(source)
+        self._add_image(f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /CCITTFaxDecode "
+                        f"/DecodeParms << /K -1 /Columns {width} /Rows {height} /BlackIs1 true >>",
+                        source, length, width, height)
+
+    def add_page(self, page):
+        """添加一页已压缩的页面（CompressedPage），不再重新编码"""
+        if page.kind == 'g4':
+            self.add_g4(page.stream, page.width, page.height)
+        else:
+            self.add_jpeg(page.stream, page.width, page.height, page.mode)
+
+    def _add_image(self, image_header, source, length, width, height):
+        image_id, content_id, page_id = self._new_id(), self._new_id(), self._new_id()
+        self._write_stream(image_id, f"/Type /XObject /Subtype /Image /Width {width} /Height {height} {image_header}",
+                           source, length)
+        page_width = _number(width * 72 / self.dpi)
+        page_height = _number(height * 72 / self.dpi)
+        content = f"q {page_width} 0 0 {page_height} 0 0 cm /Im0 Do Q".encode('ascii')
+        self._write_stream(content_id, "", content, len(content))
+        self._write_object(page_id,
+                           f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width} {page_height}] "
+                           f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>")
+        self._pages.append(page_id)
+
+    def add_frame(self, frame, color_order='bgr', options=None):
+        """添加一页内存中的图像（灰度或三通道），编码为 JPEG 后嵌入"""
+        data = image_writer.encode_image(frame, '.jpg', color_order, options)
+        self.add_jpeg(data, frame.shape[1], frame.shape[0], 'L' if frame.ndim == 2 else 'RGB')
+
+    def add_image_file(self, path):
+        """
+        添加一页图像文件，见 load_page。
+
+        返回:
+            bool: 是否以原始压缩数据直接嵌入
+        """
+        page = load_page(path)
+        self.add_page(page)
+        return page.passthrough
+
+    def close(self):
+        """写入页面树、交叉引用表和文件尾，并将临时文件重命名为目标文件"""
+        if not self._pages:
+            self.abort()
+            raise ValueError("PDF 中没有任何页面")
+        kids = ' '.join(f"{page_id} 0 R" for page_id in self._pages)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._pages)} >>")
+        self._write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self._file.tell() - self._start
+        lines = [f"xref\n0 {self._next_id}\n", "0000000000 65535 f \n"]
+        lines += [f"{self._offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, self._next_id)]
+        lines.append(f"trailer\n<< /Size {self._next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._file.write(''.join(lines).encode('ascii'))
+        self._file.flush()
+        if self._tmp_path is None:
+            return
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"PDF 文件已写入: {self.path}（{len(self._pages)} 页）")
+
+    def abort(self):
+        """放弃写入，删除临时文件（输出到文件对象时不做处理）"""
+        if self._tmp_path is None:
+            return
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
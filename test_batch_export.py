@@ -0,0 +1,54 @@
+import random
+import threading
+import time
+
+import pytest
+
+from batch_export import BatchExportCancelled, BatchExporter, map_ordered
+
+
+def test_results_keep_input_order_with_bounded_window():
+    exporter = BatchExporter(max_workers=4)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            running[0] -= 1
+        return i * i
+
+    assert list(exporter.map_ordered(work, range(40), window=6)) == [i * i for i in range(40)]
+    assert 1 < peak[0] <= 4
+    exporter.shutdown()
+
+
+def test_cancel_stops_submitting_new_work():
+    exporter = BatchExporter(max_workers=2)
+    cancel = threading.Event()
+    started = []
+
+    def work(i):
+        started.append(i)
+        return i
+
+    results = []
+    with pytest.raises(BatchExportCancelled):
+        for value in exporter.map_ordered(work, range(100), cancel=cancel, window=4):
+            results.append(value)
+            if value == 2:
+                cancel.set()
+    assert results == [0, 1, 2]
+    assert len(started) < 10
+    exporter.shutdown()
+
+
+def test_sequential_fallback():
+    cancel = threading.Event()
+    assert list(map_ordered(str, [1, 2], cancel=cancel)) == ["1", "2"]
+    cancel.set()
+    with pytest.raises(BatchExportCancelled):
+        list(map_ordered(str, [1, 2], cancel=cancel))
@@ -0,0 +1,81 @@
+import cv2
+
+import camera_discovery
+from camera_discovery import CameraCapabilityStore, probe_supported_resolutions
+
+
+class FakeCapture:
+    """只支持固定分辨率集合的假摄像头，记录 set 调用次数。"""
+
+    def __init__(self, supported, current=(640, 480)):
+        self.supported = supported
+        self.width, self.height = current
+        self.set_calls = 0
+        self.released = False
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0
+
+    def set(self, prop, value):
+        self.set_calls += 1
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = value
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = value
+            # 驱动回落到不超过请求值的最大支持分辨率
+            fits = [r for r in self.supported if r[0] <= self.width and r[1] <= self.height]
+            self.width, self.height = max(fits, key=lambda r: r[0] * r[1]) if fits else self.supported[-1]
+        return True
+
+
+SUPPORTED = [(1920, 1080), (1280, 720), (640, 480)]
+
+
+def test_probe_restores_resolution_and_keeps_capture_open():
+    cap = FakeCapture(SUPPORTED, current=(1280, 720))
+    resolutions = probe_supported_resolutions(cap)
+    assert resolutions == SUPPORTED
+    assert (cap.width, cap.height) == (1280, 720)
+    assert not cap.released
+    # 精简探测：远少于原来的 9×11 组合
+    assert cap.set_calls < 30
+
+
+def test_capability_store_reuses_persisted_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_discovery, "list_v4l2_resolutions", lambda index: None)
+    path = tmp_path / "camera_capabilities.json"
+
+    cap = FakeCapture(SUPPORTED)
+    assert CameraCapabilityStore(path).get_resolutions(0, cap) == SUPPORTED
+    assert path.exists()
+
+    # 新进程（新实例）直接读取缓存，不再探测摄像头
+    cap = FakeCapture(SUPPORTED)
+    assert CameraCapabilityStore(path).get_resolutions(0, cap) == SUPPORTED
+    assert cap.set_calls == 0
+
+
+def test_discovery_cache_expires_without_device_signature(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_discovery, "get_device_signature", lambda: None)
+    discovery = camera_discovery.CameraDiscovery(backend=0, cache_file=tmp_path / "camera_devices.json", ttl=60)
+    probes = []
+    monkeypatch.setattr(discovery, "probe_all", lambda: probes.append(1) or [0])
+    assert discovery.available_cameras() == [0]
+    assert camera_discovery.CameraDiscovery(backend=0, cache_file=discovery.cache_file).available_cameras() == [0]
+    assert len(probes) == 1
+
+    # 超过有效期后重新探测，插入的新摄像头可以被发现
+    now = camera_discovery.time.time()
+    monkeypatch.setattr(camera_discovery.time, "time", lambda: now + 61)
+    assert discovery.available_cameras() == [0]
+    assert len(probes) == 2
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+import pytest
+
+import cammer_utils
+from cammer_utils import DocumentTracker, detect_document_quad, order_points, rotate_frame, rotate_points
+
+
+def make_scene(quad, width=1600, height=1200, seed=0):
+    """在带噪声的深色背景上绘制一张浅色文档。"""
+    rng = np.random.default_rng(seed)
+    img = rng.normal(60, 8, (height, width, 3)).clip(0, 255).astype(np.uint8)
+    cv2.fillConvexPoly(img, quad.astype(np.int32), (235, 235, 235))
+    return img
+
+
+BASE_QUAD = np.array([[300, 200], [1320, 250], [1300, 1050], [280, 1000]], np.float32)
+
+
+def test_detect_document_quad_maps_back_to_full_resolution():
+    img = make_scene(BASE_QUAD)
+    contour = detect_document_quad(img, scale=0.5)
+    assert contour is not None
+    quad = order_points(contour.reshape(4, 2).astype(np.float32))
+    assert np.abs(quad - BASE_QUAD).max() < 8
+
+
+def test_tracker_refines_moving_document_without_full_detection(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cammer_utils, "detect_document_quad",
+                        lambda *args: calls.append(args) or detect_document_quad(*args))
+    tracker = DocumentTracker(detect_width=800)
+    for k in range(5):
+        quad = BASE_QUAD + np.array([k * 4, k * 3], np.float32)
+        tracked = tracker.update(make_scene(quad, seed=k))
+        assert tracked is not None
+        assert np.abs(tracked - quad).max() < 8
+    # 只有首帧完整检测，之后都在窄带内细化
+    assert len(calls) == 1
+
+
+def test_tracker_falls_back_and_drops_lost_document():
+    tracker = DocumentTracker(detect_width=800, max_misses=1)
+    tracker.update(make_scene(BASE_QUAD))
+
+    # 文档大幅移动：窄带细化失败，回退到完整检测
+    moved = BASE_QUAD + np.array([150, 80], np.float32)
+    tracked = tracker.update(make_scene(moved, seed=1))
+    assert np.abs(tracked - moved).max() < 8
+
+    # 文档移出画面：超过 max_misses 后清除跟踪结果
+    empty = make_scene(np.zeros((4, 2), np.float32), seed=2)
+    tracker.update(empty)
+    assert tracker.update(empty) is None
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_rotate_points_matches_rotate_frame(rotation):
+    img = np.arange(30 * 40 * 3, dtype=np.uint32).reshape(30, 40, 3)
+    points = np.array([[0, 0], [39, 0], [39, 29], [5, 17]], np.float32)
+    rotated = rotate_frame(img, rotation)
+    mapped = rotate_points(points, rotation, 40, 30).astype(np.int64)
+    for (x, y), (u, v) in zip(points.astype(np.int64), mapped):
+        assert (img[y, x] == rotated[v, u]).all()
@@ -0,0 +1,208 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import capture_pipeline
+from capture_pipeline import CapturePipeline, FpsController, FrameRingBuffer, resolve_target_fps
+
+
+class HookedFrame(np.ndarray):
+    """copy() 时先调用 hook 的帧，用于模拟处理线程复制期间采集线程继续写入。"""
+
+    hook = None
+
+    def copy(self, *args, **kwargs):
+        if self.hook is not None:
+            self.hook()
+        return np.asarray(self).copy(*args, **kwargs)
+
+
+class FakeCapture:
+    """每次 read 把帧序号写入整帧，记录收到的目标缓冲区。"""
+
+    def __init__(self, shape=(4, 6, 3), delay=0):
+        self.shape = shape
+        self.delay = delay
+        self.count = 0
+        self.buffers = []
+        self.forbidden = ()
+
+    def isOpened(self):
+        return True
+
+    def read(self, buffer=None):
+        assert all(buffer is not frame for frame in self.forbidden), "覆盖了最新帧或正在读取的帧"
+        time.sleep(self.delay)
+        self.buffers.append(buffer)
+        self.count += 1
+        if buffer is None:
+            buffer = np.empty(self.shape, np.int32).view(HookedFrame)
+        buffer[:] = self.count
+        return True, buffer
+
+
+def test_ring_reuses_slots_and_counts_dropped_frames():
+    ring = FrameRingBuffer(slots=3)
+    capture = FakeCapture()
+    for _ in range(5):
+        assert ring.grab(capture)
+    # 只有前 3 次分配新帧，之后 cap.read 写入已有槽位
+    assert capture.buffers[:3] == [None] * 3
+    assert all(buffer is not None for buffer in capture.buffers[3:])
+
+    seq, frame = ring.take_latest()
+    assert seq == 5 and frame[0, 0, 0] == 5
+    assert ring.dropped == 4
+
+    ring.grab(capture)
+    assert ring.take_latest(seq)[0] == 6
+    assert ring.dropped == 4
+
+
+def test_ring_never_writes_latest_or_reading_slot():
+    ring = FrameRingBuffer(slots=3)
+    capture = FakeCapture()
+    for _ in range(3):
+        ring.grab(capture)
+    reading = ring.slots[ring._latest]
+
+    def grab_while_copying():
+        # 复制最新帧期间采集线程连续写入：既不能写正在读取的槽位，也不能写刚写好的最新帧
+        for _ in range(6):
+            capture.forbidden = (reading, ring.slots[ring._latest])
+            assert ring.grab(capture)
+        capture.forbidden = ()
+
+    HookedFrame.hook = staticmethod(grab_while_copying)
+    try:
+        seq, frame = ring.take_latest()
+    finally:
+        HookedFrame.hook = None
+    assert seq == 3 and np.all(frame == 3)
+    assert ring.seq == 9
+
+
+def test_take_latest_times_out_and_close_wakes_reader():
+    ring = FrameRingBuffer()
+    assert ring.take_latest(timeout=0.01) is None
+
+    results = []
+    reader = threading.Thread(target=lambda: results.append(ring.take_latest()))
+    reader.start()
+    ring.close()
+    reader.join(1)
+    assert not reader.is_alive() and results == [None]
+    with pytest.raises(ValueError):
+        FrameRingBuffer(slots=2)
+
+
+def test_pipeline_stats_count_captured_processed_and_dropped():
+    pipeline = CapturePipeline(FakeCapture())
+    for _ in range(3):
+        pipeline.ring.grab(pipeline.capture)
+    assert pipeline.next_frame()[0, 0, 0] == 3
+    pipeline.mark_processed()
+    # 没有新帧时超时返回 None
+    assert pipeline.next_frame(timeout=0.01) is None
+    pipeline.ring.grab(pipeline.capture)
+    assert pipeline.next_frame()[0, 0, 0] == 4
+    pipeline.mark_processed()
+    assert pipeline.stats() == {'captured': 4, 'processed': 2, 'dropped': 2}
+
+
+def test_pipeline_thread_delivers_newer_frames_until_stopped():
+    pipeline = CapturePipeline(FakeCapture(delay=0.001))
+    pipeline.start()
+    values = [int(pipeline.next_frame(timeout=1)[0, 0, 0]) for _ in range(3)]
+    pipeline.stop()
+    assert values == sorted(values) and len(set(values)) == 3
+    assert not pipeline.running
+    assert pipeline.next_frame(timeout=0.01) is None
+    stats = pipeline.stats()
+    assert stats['captured'] >= 3 and stats['dropped'] == values[-1] - 3
+
+
+class FakeClock:
+    """替换 capture_pipeline 中的 time 模块：sleep 只推进时钟并记录休眠时长。"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(capture_pipeline, "time", clock)
+    return clock
+
+
+def test_fps_controller_sleeps_to_the_next_slot(clock):
+    controller = FpsController(10)
+    for _ in range(5):
+        clock.now += 0.02  # 每帧处理 20 毫秒
+        assert controller.wait() == 0
+    # 首帧只确定节拍，之后每帧休眠到下一个 100 毫秒时间片
+    assert clock.sleeps == pytest.approx([0.08] * 4)
+    assert clock.now == pytest.approx(100.42)
+
+
+def test_fps_controller_skips_missed_slots_without_sleeping(clock):
+    controller = FpsController(10)
+    controller.wait()
+    clock.now += 0.35  # 超出预算，错过 2 个时间片
+    assert controller.wait() == 2
+    assert controller.skipped == 2 and clock.sleeps == []
+    # 重新对齐到下一个时间片，而不是补回错过的帧
+    clock.now += 0.01
+    assert controller.wait() == 0
+    assert clock.sleeps == pytest.approx([0.04])
+
+
+def test_fps_controller_reports_achieved_fps_once_per_interval(clock):
+    controller = FpsController(30, report_interval=1.0)
+    assert controller.take_report() is None
+    for _ in range(21):
+        clock.now += 0.05  # 处理耗时 50 毫秒，只能达到 20 fps
+        controller.wait()
+    assert controller.take_report() == pytest.approx(20)
+    assert controller.take_report() is None
+    with pytest.raises(ValueError):
+        FpsController(0)
+
+
+class FpsCapture:
+    def __init__(self, fps):
+        self.fps = fps
+
+    def get(self, prop):
+        assert prop == cv2.CAP_PROP_FPS
+        if isinstance(self.fps, Exception):
+            raise self.fps
+        return self.fps
+
+
+@pytest.mark.parametrize("configured,camera_fps,expected", [
+    (15, 60, 15.0),  # 配置值优先
+    (0, 25, 25.0),  # 跟随摄像头
+    (0, 0, 30.0),  # 摄像头未报告帧率
+    (0, 1000, 30.0),  # 异常大的值
+    (0, -1, 30.0),
+    (0, RuntimeError("驱动错误"), 30.0),
+])
+def test_resolve_target_fps(configured, camera_fps, expected):
+    assert resolve_target_fps(FpsCapture(camera_fps), configured, default_fps=30) == expected
+
+
+def test_resolve_target_fps_without_capture():
+    assert resolve_target_fps(None, 0, default_fps=24) == 24.0
@@ -0,0 +1,344 @@
+import gc
+import os
+import weakref
+
+import cv2
+import numpy as np
+import pytest
+
+import card_correction_utils
+from card_correction_utils import card_correction
+from inference_engine import InferenceSettings
+
+
+def reference_max_pool2d(input, kernel_size, stride=1, padding=0):
+    """原始的逐窗口循环实现，作为向量化版本的对照基准。"""
+    batch_size, channels, in_height, in_width = input.shape
+    k_height, k_width = kernel_size
+    out_height = int((in_height + 2 * padding - k_height) / stride) + 1
+    out_width = int((in_width + 2 * padding - k_width) / stride) + 1
+    out = np.zeros((batch_size, channels, out_height, out_width), dtype=np.float32)
+    index = np.zeros((batch_size, channels, out_height, out_width), dtype=np.int64)
+    if padding > 0:
+        input_ = np.zeros((batch_size, channels, in_height + 2 * padding, in_width + 2 * padding), dtype=np.float32)
+        input_[:, :, padding:padding + in_height, padding:padding + in_width] = input
+        input = input_
+    for b in range(batch_size):
+        for c in range(channels):
+            for i in range(out_height):
+                for j in range(out_width):
+                    start_i = i * stride
+                    start_j = j * stride
+                    Xi = input[b, c, start_i: start_i + k_height, start_j: start_j + k_width]
+                    k = np.argmax(Xi)
+                    Ia = max(k // k_height + start_i - padding, 0)
+                    Ib = max(k % k_width + start_j - padding, 0)
+                    out[b, c, i, j] = np.max(Xi)
+                    index[b, c, i, j] = Ia * in_width + Ib
+    return out, index
+
+
+@pytest.fixture
+def net():
+    # 后处理相关方法不依赖模型，跳过 readNet 直接构造实例
+    mynet = card_correction.__new__(card_correction)
+    mynet.K = 10
+    mynet._inverse_transforms = {}
+    return mynet
+
+
+def make_heatmap(seed, batch=1, size=192, peaks=6):
+    """生成带若干高斯峰和平台区域的热力图，模拟 sigmoid 后的模型输出。"""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[:size, :size]
+    heat = rng.random((batch, 1, size, size), dtype=np.float32) * 0.05
+    for b in range(batch):
+        for _ in range(peaks):
+            cy, cx = rng.integers(0, size, 2)
+            sigma = rng.uniform(2, 8)
+            heat[b, 0] += np.exp(-((ys - cy) ** 2 + (xs - cx) ** 2) / (2 * sigma ** 2)).astype(np.float32)
+    # 量化制造相等的相邻值，覆盖 argmax 取第一个最大值的情况
+    return np.round(heat / heat.max() * 50) / 50
+
+
+@pytest.mark.parametrize("stride,padding", [(1, 1), (1, 0), (2, 1), (3, 0)])
+def test_max_pool2d_matches_reference(net, stride, padding):
+    heat = make_heatmap(0, batch=2, size=48)
+    expected_out, expected_index = reference_max_pool2d(heat, (3, 3), stride=stride, padding=padding)
+
+    out = net.max_pool2d(heat, (3, 3), stride=stride, padding=padding)
+    out_i, index = net.max_pool2d(heat, (3, 3), stride=stride, padding=padding, return_indices=True)
+
+    np.testing.assert_array_equal(out, expected_out)
+    np.testing.assert_array_equal(out_i, expected_out)
+    np.testing.assert_array_equal(index, expected_index)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bbox_decode_detections_unchanged(net, seed):
+    heat = make_heatmap(seed)
+    rng = np.random.default_rng(seed + 100)
+    wh = rng.normal(size=(1, 8, 192, 192)).astype(np.float32) * 20
+    reg = rng.random((1, 2, 192, 192), dtype=np.float32)
+
+    hmax, _ = reference_max_pool2d(heat, (3, 3), stride=1, padding=1)
+    keep = (hmax == heat).astype(np.float32)
+    np.testing.assert_array_equal(net._nms(heat)[1], keep)
+
+    reference = card_correction.__new__(card_correction)
+    reference.max_pool2d = lambda x, k, stride=1, padding=0: reference_max_pool2d(x, k, stride, padding)[0]
+    expected, expected_inds = reference.bbox_decode(heat, wh, reg=reg, K=net.K)
+    detections, inds = net.bbox_decode(heat, wh, reg=reg, K=net.K)
+
+    np.testing.assert_array_equal(inds, expected_inds)
+    np.testing.assert_array_equal(detections, expected)
+
+
+def make_outputs(seed, batch, size=48):
+    """按模型输出顺序 (angle, ftype, wh, reg, hm) 构造合成的原始输出（sigmoid 之前）。"""
+    rng = np.random.default_rng(seed)
+    hm = make_heatmap(seed, batch=batch, size=size, peaks=3) * 8 - 4
+    # 四个角点相对中心的固定偏移，保证裁剪区域有效
+    offsets = np.array([6, 4, -6, 4, -6, -4, 6, -4], np.float32)
+    wh = np.broadcast_to(offsets.reshape(1, 8, 1, 1), (batch, 8, size, size)).copy()
+    reg = rng.random((batch, 2, size, size), dtype=np.float32)
+    angle = rng.normal(size=(batch, 4, size, size)).astype(np.float32)
+    ftype = rng.normal(size=(batch, 2, size, size)).astype(np.float32)
+    return [angle, ftype, wh, reg, hm]
+
+
+class FakeModel:
+    """记录 forward 调用次数的假模型；fixed_batch 为 True 时模拟只支持批大小 1 的模型。"""
+
+    def __init__(self, outputs, fixed_batch=False):
+        self.outputs = outputs
+        self.fixed_batch = fixed_batch
+        self.calls = 0
+
+    def setInput(self, blob):
+        self.blob = blob
+
+    def forward(self, names):
+        self.calls += 1
+        batch = self.blob.shape[0]
+        if self.fixed_batch and batch > 1:
+            raise cv2.error("batch size mismatch")
+        index = int(self.blob[0, 0, 0, 0]) if self.fixed_batch else slice(None)
+        return [out[index:index + 1] if self.fixed_batch else out for out in self.outputs]
+
+
+def make_batch_net(outputs, fixed_batch=False):
+    mynet = card_correction.__new__(card_correction)
+    mynet.K = 10
+    mynet.obj_score = 0.5
+    mynet.use_nms = True
+    mynet.out_height = mynet.out_width = outputs[0].shape[-1]
+    mynet.outlayer_names = []
+    mynet.model = FakeModel(outputs, fixed_batch)
+    mynet._inverse_transforms = {}
+    return mynet
+
+
+def test_postprocess_batch_matches_single_image():
+    outputs = make_outputs(0, batch=3)
+    net = make_batch_net(outputs)
+    images = [np.full((h, w, 3), i * 40, np.uint8) for i, (h, w) in enumerate([(300, 400), (480, 360), (200, 200)])]
+    centers = [np.array([img.shape[1] / 2, img.shape[0] / 2], np.float32) for img in images]
+    scales = [float(max(img.shape[:2])) for img in images]
+
+    batched = net.postprocess_batch(outputs, images, centers, scales)
+    assert len(batched) == 3
+    for i, result in enumerate(batched):
+        single = net.postprocess_batch([out[i:i + 1] for out in outputs], images[i:i + 1], centers[i:i + 1], scales[i:i + 1])[0]
+        assert len(result["OUTPUT_IMGS"]) == len(single["OUTPUT_IMGS"]) > 0
+        for key in ("POLYGONS", "SCORES", "LABELS", "LAYOUT", "CENTER"):
+            np.testing.assert_allclose(result[key], single[key], rtol=1e-6)
+
+
+def test_forward_batch_falls_back_for_fixed_batch_model():
+    outputs = make_outputs(1, batch=3)
+    net = make_batch_net(outputs, fixed_batch=True)
+    # 第一通道首元素编码图像序号，假模型据此返回对应输出
+    blob = np.zeros((3, 3, 8, 8), np.float32)
+    blob[:, 0, 0, 0] = np.arange(3)
+
+    merged = net.forward_batch(blob)
+    assert net.batch_supported is False
+    for out, expected in zip(merged, outputs):
+        np.testing.assert_array_equal(out, expected)
+
+    # 记住模型不支持批量后，不再尝试批量前向
+    calls = net.model.calls
+    net.forward_batch(blob)
+    assert net.model.calls == calls + 3
+
+
+def reference_bbox_post_process(net, bbox, c, s, h, w):
+    """原始实现：每组坐标重新计算逆仿射矩阵，逐点变换。"""
+    def transform_preds(coords, center, scale, output_size):
+        target_coords = np.zeros(coords.shape)
+        trans = net.get_affine_transform(center, scale, 0, output_size, inv=1)
+        for p in range(coords.shape[0]):
+            target_coords[p, 0:2] = net.affine_transform(coords[p, 0:2], trans)
+        return target_coords
+
+    for i in range(bbox.shape[0]):
+        for cols in (slice(0, 2), slice(2, 4), slice(4, 6), slice(6, 8), slice(10, 12)):
+            bbox[i, :, cols] = transform_preds(bbox[i, :, cols], c[i], s[i], (w, h))
+    return bbox
+
+
+def test_bbox_post_process_matches_per_point_reference(net):
+    rng = np.random.default_rng(3)
+    bbox = (rng.random((2, 10, 13)) * 192).astype(np.float32)
+    centers = [np.array([320., 240.], np.float32), np.array([960., 540.], np.float32)]
+    scales = [640.0, 1920.0]
+
+    expected = reference_bbox_post_process(net, bbox.copy(), centers, scales, 192, 192)
+    result = net.bbox_post_process(bbox.copy(), centers, scales, 192, 192)
+    np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-3)
+    # 同一输入尺寸的逆仿射矩阵只计算一次
+    assert net.get_inverse_transform(centers[0], scales[0], (192, 192)) is \
+        net.get_inverse_transform(centers[0].copy(), scales[0], (192, 192))
+
+
+def test_inverse_transform_cache_does_not_keep_instance_alive():
+    mynet = make_batch_net(make_outputs(0, batch=1))
+    mynet.get_inverse_transform((320.0, 240.0), 640.0, (192, 192))
+    ref = weakref.ref(mynet)
+    del mynet
+    gc.collect()
+    assert ref() is None
+
+
+class DummyNet:
+    def getUnconnectedOutLayersNames(self):
+        return ()
+
+
+def reference_preprocess(net, img, resize_shape):
+    """原始实现：copyMakeBorder 填充后逐步转换、归一化、转置。"""
+    im, new_w, new_h, left, top = net.ResizePad(img, resize_shape[0])
+    im = (im.astype(np.float32) / 255.0 - net.mean) / net.std
+    im = np.expand_dims(im.transpose((2, 0, 1)), axis=0)
+    return im.astype(np.float32), new_w, new_h, left, top
+
+
+def test_preprocess_matches_reference_and_reuses_buffers(monkeypatch):
+    monkeypatch.setattr(cv2.dnn, "readNet", lambda path: DummyNet())
+    mynet = card_correction("dummy.onnx")
+    rng = np.random.default_rng(0)
+    first = None
+    for h, w in [(480, 640), (480, 640), (900, 600), (768, 768)]:
+        img = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+        expected = reference_preprocess(mynet, img, mynet.resize_shape)
+        result = mynet.preprocess(img, mynet.resize_shape)
+        assert result[1:] == expected[1:]
+        np.testing.assert_allclose(result[0], expected[0], rtol=1e-5, atol=1e-5)
+        # 输入张量在多次调用之间复用
+        first = result[0] if first is None else first
+        assert result[0] is first
+
+
+class ShapeNet(DummyNet):
+    """按输入尺寸返回 1/4 大小热力图的假模型。"""
+
+    def setInput(self, blob):
+        self.shape = blob.shape
+
+    def forward(self, names):
+        h, w = self.shape[2] // 4, self.shape[3] // 4
+        return [np.zeros((1, c, h, w), np.float32) for c in (4, 2, 8, 2, 1)]
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    loaded = []
+
+    def fake_load_model(path, settings=None, input_shape=None):
+        loaded.append((path, settings.engine if settings else None))
+        return ShapeNet()
+
+    monkeypatch.setattr(card_correction_utils, "load_model", fake_load_model)
+    return loaded
+
+
+def test_variant_derives_geometry_and_engine(tmp_path, monkeypatch, loaded):
+    (tmp_path / "card_correction_int8.onnx").write_bytes(b"")
+    monkeypatch.setattr(card_correction_utils.importlib.util, "find_spec", lambda name: object())
+    net = card_correction_utils.create_card_correction('int8_512', model_dir=str(tmp_path))
+    assert net.resize_shape == [512, 512]
+    assert (net.out_height, net.out_width) == (128, 128)
+    assert loaded == [(os.path.join(str(tmp_path), 'card_correction_int8.onnx'), 'onnxruntime')]
+
+
+def test_warmup_disabled_skips_forward(tmp_path, loaded):
+    (tmp_path / "card_correction.onnx").write_bytes(b"")
+    net = card_correction_utils.create_card_correction('fp32_512', str(tmp_path), InferenceSettings(warmup=False))
+    assert (net.out_height, net.out_width) == (128, 128)
+    assert not hasattr(net.model, "shape")  # 没有调用 setInput
+
+
+@pytest.mark.parametrize("has_file,has_engine", [(False, True), (True, False)])
+def test_unavailable_variant_falls_back_to_fp32(tmp_path, monkeypatch, loaded, has_file, has_engine):
+    (tmp_path / "card_correction.onnx").write_bytes(b"")
+    if has_file:
+        (tmp_path / "card_correction_int8.onnx").write_bytes(b"")
+    monkeypatch.setattr(card_correction_utils.importlib.util, "find_spec",
+                        lambda name: object() if has_engine else None)
+    net = card_correction_utils.create_card_correction('int8', model_dir=str(tmp_path))
+    assert net.resize_shape == [768, 768]
+    assert loaded == [(os.path.join(str(tmp_path), 'card_correction.onnx'), None)]
+
+
+def reference_nms(dets, thresh):
+    """原始实现：逐对检查中心点是否落在更高分的四边形内。"""
+    if len(dets) < 2:
+        return dets
+    keep = []
+    for i in range(len(dets)):
+        if dets[i][8] < thresh:
+            break
+        max_score_index = -1
+        ctx = (dets[i][0] + dets[i][2] + dets[i][4] + dets[i][6]) / 4
+        cty = (dets[i][1] + dets[i][3] + dets[i][5] + dets[i][7]) / 4
+        for j in range(len(dets)):
+            if i == j or dets[j][8] < thresh:
+                break
+            x1, y1, x2, y2, x3, y3, x4, y4 = dets[j][:8]
+            a = (x2 - x1) * (cty - y1) - (y2 - y1) * (ctx - x1)
+            b = (x3 - x2) * (cty - y2) - (y3 - y2) * (ctx - x2)
+            c = (x4 - x3) * (cty - y3) - (y4 - y3) * (ctx - x3)
+            d = (x1 - x4) * (cty - y4) - (y1 - y4) * (ctx - x4)
+            if (a > 0 and b > 0 and c > 0 and d > 0) or (a < 0 and b < 0 and c < 0 and d < 0):
+                if dets[i][8] > dets[j][8] and max_score_index < 0:
+                    max_score_index = i
+                elif dets[i][8] < dets[j][8]:
+                    max_score_index = -2
+                    break
+        if max_score_index > -1:
+            keep.append(dets[max_score_index])
+        elif max_score_index == -1:
+            keep.append(dets[i])
+    return np.array(keep)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nms_matches_reference(net, seed):
+    rng = np.random.default_rng(seed)
+    # 若干张证件，每张有几个相互重叠的候选框
+    dets = []
+    for _ in range(3):
+        cx, cy = rng.uniform(30, 160, 2)
+        for _ in range(3):
+            jitter = rng.normal(0, 3, 2)
+            w, h = rng.uniform(10, 25, 2)
+            quad = np.array([[-w, -h], [w, -h], [w, h], [-w, h]]) + [cx, cy] + jitter
+            dets.append(np.concatenate([quad.reshape(-1), [rng.uniform(0.2, 1.0)], np.zeros(4)]))
+    dets = np.array(dets, np.float32)
+    dets = dets[np.argsort(-dets[:, 8], kind="stable")]
+
+    expected = reference_nms(dets, 0.5)
+    result = net.nms(dets, 0.5)
+    np.testing.assert_array_equal(result, expected.reshape(-1, dets.shape[1]))
+    assert len(result) <= 3
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import write_queue
+from card_worker import CardExtractionWorker, reading_order
+from write_queue import WriteBehindQueue
+
+
+def card_boxes(rows, cols, width=300, height=190, gap=40, skew=0):
+    """按行排列的证件检测框，每行内从左到右纵向偏移 skew 像素（模拟摆放歪斜）"""
+    boxes = []
+    for r in range(rows):
+        for c in range(cols):
+            x0 = 50 + c * (width + gap)
+            y0 = 50 + r * (height + gap) + c * skew
+            boxes.append([x0, y0, x0 + width, y0 + height])
+    return np.array(boxes, np.float32)
+
+
+def test_reading_order_groups_skewed_rows_left_to_right():
+    boxes = card_boxes(2, 3, skew=25)
+    # 打乱输入顺序，结果仍按从上到下、从左到右排列
+    shuffled = [4, 0, 5, 2, 1, 3]
+    order = reading_order(boxes[shuffled])
+    assert [shuffled[i] for i in order] == [0, 1, 2, 3, 4, 5]
+
+    # 向上倾斜的行（右侧证件更靠上）同样按行分组
+    boxes = card_boxes(2, 3, skew=-25)
+    order = reading_order(boxes[::-1])
+    assert [5 - i for i in order] == [0, 1, 2, 3, 4, 5]
+    assert reading_order(np.zeros((0, 4))) == []
+
+
+class FakeNet:
+    def __init__(self, count, delay=0):
+        self.count = count
+        self.delay = delay
+
+    def infer(self, frame):
+        time.sleep(self.delay)
+        crops = [np.full((20, 30, 3), 40 * i, np.uint8) for i in range(self.count)]
+        return {'OUTPUT_IMGS': crops, 'BBOX': card_boxes(1, self.count)}
+
+
+def failing_writes(monkeypatch, suffix):
+    """让以 suffix 结尾的文件写入失败，写盘队列不等待重试"""
+    original = write_queue.atomic_write
+
+    def atomic_write(path, data):
+        if path.endswith(suffix):
+            raise OSError("磁盘已满")
+        return original(path, data)
+
+    monkeypatch.setattr(write_queue, "atomic_write", atomic_write)
+    return WriteBehindQueue(retries=1, retry_delay=0)
+
+
+def run_task(worker, frame, path):
+    done = threading.Event()
+    statuses = []
+
+    def on_status(message, pending):
+        statuses.append(message)
+        if pending == 0:
+            done.set()
+
+    worker.on_status = on_status
+    assert worker.submit(frame, path)
+    assert done.wait(5)
+    worker.stop()
+    return statuses[-1]
+
+
+def test_multi_card_reports_only_written_files(tmp_path, monkeypatch):
+    queue = failing_writes(monkeypatch, "_2.jpg")
+    saved = []
+    worker = CardExtractionWorker(FakeNet(3), on_saved=lambda path, group: saved.append(path), multi_card=True,
+                                  write_queue=queue)
+    message = run_task(worker, np.zeros((100, 100, 3), np.uint8), str(tmp_path / "卡片.jpg"))
+
+    assert saved == [str(tmp_path / "卡片_1.jpg"), str(tmp_path / "卡片_3.jpg")]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["卡片_1.jpg", "卡片_3.jpg"]
+    assert message.startswith("保存 2/3 张卡片图片成功")
+
+
+def test_single_card_write_error_is_reported(tmp_path, monkeypatch):
+    queue = failing_writes(monkeypatch, ".jpg")
+    saved = []
+    worker = CardExtractionWorker(FakeNet(1), on_saved=lambda path, group: saved.append(path), write_queue=queue)
+    message = run_task(worker, np.zeros((100, 100, 3), np.uint8), str(tmp_path / "卡片.jpg"))
+    assert saved == []
+    assert message == "保存卡片图片失败: 磁盘已满"
+
+
+def test_stop_finishes_queued_captures(tmp_path):
+    saved = []
+    worker = CardExtractionWorker(FakeNet(1, delay=0.05), on_saved=lambda path, group: saved.append(path))
+    paths = [str(tmp_path / f"卡片{i}.jpg") for i in range(3)]
+    for path in paths:
+        assert worker.submit(np.zeros((100, 100, 3), np.uint8), path)
+    assert worker.stop(timeout=5)
+    assert not worker.submit(np.zeros((100, 100, 3), np.uint8), str(tmp_path / "迟到.jpg"))
+    assert saved == paths
+    assert all(os.path.exists(path) for path in paths)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from cammer_utils import rotate_frame, rotate_points
+from display_pipeline import DisplayPipeline, fit_frame_to_canvas
+
+
+def make_frame(value=0, width=400, height=200):
+    frame = np.random.default_rng(value).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frame[:20, :40] = (0, 0, 255)  # 左上角红色（BGR），用于确认旋转方向
+    return frame
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_fit_matches_rotating_the_full_frame_first(rotation):
+    frame = make_frame()
+    quad = np.array([[50, 30], [350, 40], [340, 170], [60, 160]], np.float32)
+    rotated = rotate_frame(frame, rotation)
+    width, height = rotated.shape[1] // 2, rotated.shape[0] // 2
+
+    canvas = fit_frame_to_canvas(frame, width, height, rotation=rotation, quad=quad)
+    expected = fit_frame_to_canvas(rotated, width, height, quad=rotate_points(quad, rotation, 400, 200))
+    np.testing.assert_array_equal(canvas, expected)
+    assert canvas.flags['C_CONTIGUOUS'] and canvas.shape == (height, width, 3)
+
+
+def test_fit_letterboxes_and_reuses_canvas():
+    canvas = np.zeros((300, 300, 3), np.uint8)
+    result = fit_frame_to_canvas(make_frame(), 300, 300, canvas, background=(1, 2, 3))
+    assert result is canvas
+    # 400x200 缩放到 300x150，上下各留 75 像素背景
+    np.testing.assert_array_equal(canvas[:75].reshape(-1, 3), [(1, 2, 3)] * 75 * 300)
+    np.testing.assert_array_equal(canvas[80, 5], (255, 0, 0))  # 转换为 RGB
+
+
+class Scheduler:
+    """记录待执行的 CallAfter，由测试决定何时在“GUI 线程”执行。"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, func):
+        self.calls.append(func)
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for func in calls:
+            func()
+
+
+def test_pending_updates_are_coalesced_to_the_newest_frame():
+    shown = []
+    scheduler = Scheduler()
+    pipeline = DisplayPipeline(lambda canvas: shown.append(canvas.copy()), call_after=scheduler)
+    pipeline.set_display_size(200, 100)
+
+    frames = [np.full((200, 400, 3), value, np.uint8) for value in (10, 20, 30, 40)]
+    for frame in frames:
+        pipeline.submit(frame)
+    # 上一帧尚未显示时只保留一个待执行的 CallAfter
+    assert len(scheduler.calls) == 1
+    scheduler.run()
+    assert len(shown) == 1 and np.all(shown[0] == 40)
+    assert pipeline.stats() == {'rendered': 4, 'shown': 1, 'coalesced': 3}
+
+    # 显示完成后下一帧重新安排显示
+    pipeline.submit(frames[0])
+    assert len(scheduler.calls) == 1
+    scheduler.run()
+    assert np.all(shown[-1] == 10)
+    assert pipeline.stats()['shown'] == 2
+
+
+def test_canvases_are_recycled():
+    canvases = set()
+    scheduler = Scheduler()
+    pipeline = DisplayPipeline(lambda canvas: canvases.add(id(canvas)), call_after=scheduler)
+    pipeline.set_display_size(200, 100)
+    for value in range(10):
+        pipeline.submit(np.full((200, 400, 3), value, np.uint8))
+        pipeline.submit(np.full((200, 400, 3), value, np.uint8))
+        scheduler.run()
+    assert len(canvases) <= 3
+    # 未设置显示尺寸前不渲染
+    idle = DisplayPipeline(lambda canvas: None, call_after=scheduler)
+    idle.submit(make_frame())
+    assert scheduler.calls == [] and idle.rendered == 0
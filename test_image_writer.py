@@ -0,0 +1,40 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image, JpegImagePlugin
+
+from image_writer import ImageWriteOptions, encode_image, write_image
+
+
+def make_frame():
+    frame = np.zeros((64, 96, 3), np.uint8)
+    frame[:, :32] = (255, 0, 0)  # BGR 蓝色
+    frame[:, 64:] = (0, 0, 255)  # BGR 红色
+    return frame
+
+
+@pytest.mark.parametrize("color_order", ["bgr", "rgb"])
+def test_color_order_is_explicit(color_order):
+    frame = make_frame()
+    data = encode_image(frame if color_order == "bgr" else frame[:, :, ::-1], ".png", color_order)
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    np.testing.assert_array_equal(decoded, frame)
+
+
+@pytest.mark.parametrize("subsampling,expected", [("444", 0), ("422", 1), ("420", 2)])
+def test_jpeg_options(subsampling, expected):
+    options = ImageWriteOptions(quality=80, subsampling=subsampling, progressive=True)
+    image = Image.open(io.BytesIO(encode_image(make_frame(), ".jpg", options=options)))
+    assert JpegImagePlugin.get_sampling(image) == expected
+    assert image.info.get("progressive")
+
+
+def test_write_image_supports_non_ascii_path(tmp_path):
+    path = tmp_path / "卡片_1.jpg"
+    size = write_image(make_frame(), str(path))
+    assert path.stat().st_size == size > 0
+    decoded = cv2.imdecode(np.fromfile(str(path), np.uint8), cv2.IMREAD_COLOR)
+    # 左侧仍为蓝色（BGR 顺序正确）
+    assert decoded[32, 10, 0] > 200 and decoded[32, 10, 2] < 50
@@ -0,0 +1,66 @@
+import configparser
+
+import cv2
+
+import inference_engine
+from inference_engine import InferenceSettings, load_model
+
+
+class RecordingNet:
+    def __init__(self):
+        self.backend = self.target = None
+        self.inputs = []
+
+    def setPreferableBackend(self, backend):
+        self.backend = backend
+
+    def setPreferableTarget(self, target):
+        self.target = target
+
+    def getUnconnectedOutLayersNames(self):
+        return ("out",)
+
+    def setInput(self, blob):
+        self.inputs.append(blob.shape)
+
+    def forward(self, names):
+        return [None]
+
+
+def test_settings_from_inference_section():
+    config = configparser.ConfigParser()
+    config.read_dict({'INFERENCE': {'engine': 'OpenCV', 'backend': 'opencv', 'target': 'cpu',
+                                    'num_threads': '4', 'warmup': '0'}})
+    settings = InferenceSettings.from_config(config)
+    assert (settings.engine, settings.backend, settings.num_threads, settings.warmup) == ('opencv', 'opencv', 4, False)
+
+
+def test_load_model_applies_backend_and_warms_up(monkeypatch):
+    net = RecordingNet()
+    monkeypatch.setattr(cv2.dnn, "readNet", lambda path: net)
+    monkeypatch.setattr(cv2, "setNumThreads", lambda n: None)
+    settings = InferenceSettings(backend='opencv', target='cpu', num_threads=4)
+
+    assert load_model("model.onnx", settings, input_shape=(1, 3, 64, 64)) is net
+    assert (net.backend, net.target) == (cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU)
+    assert net.inputs == [(1, 3, 64, 64)]
+
+
+def test_unavailable_backend_falls_back_to_default(monkeypatch):
+    net = RecordingNet()
+    monkeypatch.setattr(cv2.dnn, "readNet", lambda path: net)
+    monkeypatch.setattr(cv2.dnn, "getAvailableTargets", lambda backend: [])
+    load_model("model.onnx", InferenceSettings(backend='openvino', warmup=False))
+    assert (net.backend, net.target) == (cv2.dnn.DNN_BACKEND_DEFAULT, cv2.dnn.DNN_TARGET_CPU)
+    assert net.inputs == []
+
+
+def test_missing_onnxruntime_falls_back_to_opencv(monkeypatch):
+    net = RecordingNet()
+    monkeypatch.setattr(cv2.dnn, "readNet", lambda path: net)
+
+    def no_onnxruntime(*args):
+        raise ImportError("onnxruntime")
+
+    monkeypatch.setattr(inference_engine, "OnnxRuntimeNet", no_onnxruntime)
+    assert load_model("model.onnx", InferenceSettings(engine='onnxruntime', warmup=False)) is net
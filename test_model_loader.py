@@ -0,0 +1,31 @@
+import threading
+
+import pytest
+
+from model_loader import LazyModel
+
+
+def test_get_waits_for_background_load():
+    release = threading.Event()
+    ready = []
+    model = LazyModel("model", lambda: release.wait() and "net", on_ready=lambda name, elapsed: ready.append(name))
+    model.start()
+    assert not model.ready
+
+    release.set()
+    assert model.get(timeout=2) == "net"
+    assert model.ready and not model.failed
+    assert ready == ["model"]
+
+
+def test_load_failure_is_reported_and_raised():
+    errors = []
+
+    def broken():
+        raise RuntimeError("bad model")
+
+    model = LazyModel("model", broken, on_error=lambda name, e: errors.append(str(e)))
+    with pytest.raises(RuntimeError):
+        model.get(timeout=2)
+    assert model.failed and not model.ready
+    assert errors == ["bad model"]
@@ -0,0 +1,90 @@
+import io
+import re
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from pdf_writer import StreamingPdfWriter, compress_page, single_page_pdf
+
+
+def write_images(folder):
+    frame = np.zeros((300, 600, 3), np.uint8)
+    frame[:, 300:] = (0, 0, 255)
+    jpeg = folder / "页1.jpg"
+    jpeg.write_bytes(cv2.imencode(".jpg", frame)[1].tobytes())
+    png = folder / "页2.png"
+    png.write_bytes(cv2.imencode(".png", frame[:150])[1].tobytes())
+    return jpeg, png
+
+
+def check_xref(data):
+    """交叉引用表中的每个偏移都指向对应编号的对象"""
+    xref_offset = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    lines = data[xref_offset:].split(b"\n")
+    count = int(lines[1].split()[1])
+    for obj_id in range(1, count):
+        offset = int(lines[2 + obj_id][:10])
+        assert data[offset:].startswith(f"{obj_id} 0 obj".encode())
+
+
+def test_jpeg_pages_are_embedded_without_reencoding(tmp_path):
+    jpeg, png = write_images(tmp_path)
+    output = tmp_path / "合并.pdf"
+    with StreamingPdfWriter(str(output), dpi=150) as writer:
+        assert writer.add_image_file(str(jpeg))
+        assert not writer.add_image_file(str(png))
+
+    data = output.read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    assert jpeg.read_bytes() in data
+    assert len(re.findall(rb"/Type /Page\b", data)) == 2
+    assert b"/Count 2" in data
+    # 600x300 像素在 150 DPI 下为 288x144 磅
+    assert b"/MediaBox [0 0 288 144]" in data
+    check_xref(data)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["合并.pdf", "页1.jpg", "页2.png"]
+
+
+def test_failed_write_leaves_no_files(tmp_path):
+    output = tmp_path / "out.pdf"
+    with pytest.raises(ValueError):
+        with StreamingPdfWriter(str(output)) as writer:
+            writer.add_frame(np.zeros((10, 10), np.uint8))
+            raise ValueError("中途失败")
+    assert list(tmp_path.iterdir()) == []
+
+
+def make_text_page():
+    page = np.full((400, 300), 255, np.uint8)
+    for y in range(40, 360, 30):
+        cv2.line(page, (30, y), (270, y), 0, 3)
+    return page
+
+
+def test_bilevel_page_is_compressed_once_and_shared(tmp_path):
+    page = compress_page(cv2.cvtColor(make_text_page(), cv2.COLOR_GRAY2BGR), "bilevel")
+    assert page.kind == "g4" and page.extension == "tif"
+    # 同一份数据保存为图片后可解码回原黑白图像
+    decoded = np.array(Image.open(io.BytesIO(page.data)).convert("L"))
+    np.testing.assert_array_equal(decoded, make_text_page())
+
+    data = single_page_pdf(page, dpi=200)
+    assert bytes(page.stream) in data
+    assert b"/CCITTFaxDecode" in data and b"/K -1 /Columns 300 /Rows 400" in data
+    assert b"/MediaBox [0 0 108 144]" in data
+    check_xref(data)
+
+    # 多页 PDF 直接嵌入 G4 TIFF 的条带数据
+    tiff = tmp_path / "page.tif"
+    tiff.write_bytes(page.data)
+    with StreamingPdfWriter(str(tmp_path / "out.pdf")) as writer:
+        assert writer.add_image_file(str(tiff))
+
+
+def test_auto_compression_keeps_photos_as_jpeg():
+    rng = np.random.default_rng(0)
+    photo = cv2.GaussianBlur(rng.integers(0, 255, (200, 200, 3), dtype=np.uint8), (15, 15), 5)
+    assert compress_page(photo, "auto").kind == "jpeg"
+    assert compress_page(make_text_page(), "auto").kind == "g4"
@@ -0,0 +1,72 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+import thumbnail_service
+from thumbnail_service import ThumbnailCache, ThumbnailService, load_thumbnail
+
+
+def write_image(path, width=1600, height=1200):
+    frame = np.zeros((height, width, 3), np.uint8)
+    frame[:, : width // 2] = (0, 0, 255)  # 左半红色（BGR）
+    cv2.imwrite(str(path), frame)
+    return str(path)
+
+
+def test_load_thumbnail_keeps_aspect_and_colour(tmp_path):
+    thumbnail = load_thumbnail(write_image(tmp_path / "a.jpg"), (256, 256))
+    assert thumbnail.shape == (192, 256, 3)
+    assert thumbnail[96, 20, 0] > 200 and thumbnail[96, 20, 2] < 50  # RGB 顺序
+
+
+def test_cache_key_tracks_file_changes(tmp_path):
+    path = write_image(tmp_path / "a.jpg")
+    cache = ThumbnailCache(tmp_path / "cache")
+    cache.put(path, (128, 128), load_thumbnail(path, (128, 128)))
+    assert cache.get(path, (128, 128)).shape == (96, 128, 3)
+    assert cache.get(path, (256, 256)) is None
+    write_image(tmp_path / "a.jpg", 800, 800)
+    os.utime(path, ns=(0, 10 ** 18))
+    assert cache.get(path, (128, 128)) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    paths = [write_image(tmp_path / f"{i}.jpg", 400 + i, 300) for i in range(4)]
+    cache = ThumbnailCache(tmp_path / "cache", max_bytes=10 ** 9)
+    sizes = []
+    for i, path in enumerate(paths[:3]):
+        cache.put(path, (64, 64), load_thumbnail(path, (64, 64)))
+        entry = os.path.join(cache.folder, cache.key(path, (64, 64)) + ".jpg")
+        os.utime(entry, ns=(i * 10 ** 9, i * 10 ** 9))
+        sizes.append(os.path.getsize(entry))
+    # 命中第 0 个使其变为最近使用，再写入第 4 个时淘汰最久未使用的第 1 个
+    assert cache.get(paths[0], (64, 64)) is not None
+    cache.max_bytes = sum(sizes) + 10
+    cache.put(paths[3], (64, 64), load_thumbnail(paths[3], (64, 64)))
+    assert cache.get(paths[1], (64, 64)) is None
+    assert cache.get(paths[0], (64, 64)) is not None
+    assert cache.get(paths[3], (64, 64)) is not None
+
+
+def test_service_decodes_once_then_uses_cache(tmp_path, monkeypatch):
+    path = write_image(tmp_path / "a.jpg")
+    calls = []
+    original = thumbnail_service.load_thumbnail
+    monkeypatch.setattr(thumbnail_service, "load_thumbnail", lambda *a: calls.append(a) or original(*a))
+    service = ThumbnailService(ThumbnailCache(tmp_path / "cache"))
+    done = threading.Event()
+    results = []
+
+    def callback(p, thumbnail):
+        results.append((p, thumbnail.shape))
+        done.set()
+
+    for _ in range(2):
+        done.clear()
+        service.request(path, (256, 256), callback)
+        assert done.wait(5)
+    service.shutdown()
+    assert results == [(path, (192, 256, 3))] * 2
+    assert len(calls) == 1
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+from batch_export import BatchExporter
+from utils import merge_images, save_multip_pdf
+
+
+def write_image(path, width, height, bgr):
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[:] = bgr
+    cv2.imwrite(str(path), frame, [cv2.IMWRITE_JPEG_QUALITY, 100])
+    return str(path)
+
+
+def test_merge_vertical_with_string_padding(tmp_path):
+    paths = [write_image(tmp_path / "a.png", 200, 100, (255, 0, 0)),
+             write_image(tmp_path / "b.jpg", 100, 50, (0, 0, 255))]
+    output = tmp_path / "merged.png"
+    progress = []
+    assert merge_images(paths, str(output), padding="5", on_progress=lambda *p: progress.append(p))
+    assert progress == [(1, 2), (2, 2)]
+
+    merged = cv2.imread(str(output))
+    assert merged.shape == (155, 200, 3)
+    np.testing.assert_array_equal(merged[50, 100], (255, 0, 0))
+    np.testing.assert_array_equal(merged[102, 100], (255, 255, 255))  # 间距为背景色
+    assert merged[130, 100, 2] > 240 and merged[130, 20].min() == 255  # 较窄的图片居中
+
+
+def test_merge_horizontal_downscales_to_target_height(tmp_path):
+    paths = [write_image(tmp_path / f"{i}.jpg", 1600, 1200, (0, 200, 0)) for i in range(3)]
+    output = tmp_path / "merged.jpg"
+    assert merge_images(paths, str(output), direction="horizontal", target_size=300, padding=0)
+    merged = cv2.imread(str(output))
+    assert merged.shape == (300, 1200, 3)
+    assert abs(int(merged[150, 600, 1]) - 200) < 8
+
+
+def test_parallel_export_matches_sequential(tmp_path):
+    paths = [write_image(tmp_path / f"{i}.jpg", 320 + 40 * i, 240, (40 * i, 100, 200)) for i in range(6)]
+    exporter = BatchExporter(max_workers=3)
+    for name, executor in (("seq", None), ("par", exporter)):
+        assert merge_images(paths, str(tmp_path / f"{name}.png"), target_size=200, executor=executor)
+        assert save_multip_pdf(paths, str(tmp_path / f"{name}.pdf"), executor=executor)
+    exporter.shutdown()
+    np.testing.assert_array_equal(cv2.imread(str(tmp_path / "seq.png")), cv2.imread(str(tmp_path / "par.png")))
+    assert (tmp_path / "seq.pdf").read_bytes() == (tmp_path / "par.pdf").read_bytes()
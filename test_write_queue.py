@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+import write_queue
+from image_writer import atomic_write
+from write_queue import WriteBehindQueue
+
+
+def test_atomic_write_replaces_without_leaving_temp_files(tmp_path):
+    path = tmp_path / "扫描_1.jpg"
+    path.write_bytes(b"old")
+    assert atomic_write(str(path), b"new data") == 8
+    assert path.read_bytes() == b"new data"
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_retry_then_report_done(tmp_path, monkeypatch):
+    failures = [OSError("磁盘忙")]
+
+    def flaky_write(path, data):
+        if failures:
+            raise failures.pop()
+        return atomic_write(path, data)
+
+    monkeypatch.setattr(write_queue, "atomic_write", flaky_write)
+    done, pending = [], []
+    queue = WriteBehindQueue(retry_delay=0, on_done=lambda p, tag: done.append((p, tag)),
+                             on_pending=pending.append)
+    path = str(tmp_path / "a.jpg")
+    assert queue.submit(path, lambda: b"jpeg", tag="组1").result(timeout=5) == 4
+    assert queue.close(timeout=5)
+    assert done == [(path, "组1")]
+    assert pending[0] == 1 and pending[-1] == 0
+    with pytest.raises(RuntimeError):
+        queue.submit(path, lambda: b"jpeg")
+
+
+def test_error_reported_after_retries(tmp_path):
+    errors = []
+    queue = WriteBehindQueue(retries=1, retry_delay=0, on_error=lambda p, e, tag: errors.append(p))
+    path = str(tmp_path / "missing" / "a.jpg")
+    with pytest.raises(OSError):
+        queue.submit(path, lambda: b"jpeg").result(timeout=5)
+    assert errors == [path]
+    assert queue.pending == 0
+
+
+def test_flush_waits_for_pending_writes(tmp_path):
+    release = threading.Event()
+    queue = WriteBehindQueue(max_workers=1)
+
+    def produce():
+        release.wait(5)
+        return b"pdf"
+
+    for i in range(3):
+        queue.submit(str(tmp_path / f"{i}.pdf"), produce)
+    assert not queue.flush(timeout=0.05)
+    assert queue.pending == 3
+    release.set()
+    assert queue.flush(timeout=5)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.pdf", "1.pdf", "2.pdf"]
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from PIL import Image
+from loguru import logger
+from app_config import CONFIG_FILE
+from image_writer import ImageWriteOptions, atomic_write, encode_image
+
+# 缩略图磁盘缓存目录，与配置文件放在同一目录
+THUMBNAIL_CACHE_DIR = CONFIG_FILE.parent / "thumbnail_cache"
+# 缩略图缓存的 JPEG 编码设置
+_CACHE_OPTIONS = ImageWriteOptions(quality=90)
+
+
+def scaled_size(size, max_size):
+    """按最大尺寸等比缩放，返回 (宽, 高)"""
+    w, h = size
+    mw, mh = max_size
+    scale = min(mw / w, mh / h)
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+def load_thumbnail(path, max_size):
+    """
+    解码缩略图（RGB）。先用 draft() 让 JPEG 解码器直接输出 1/2、1/4 或 1/8 尺寸，
+    再缩放到 max_size 以内，不解码全分辨率图像。
+    """
+    with Image.open(path) as img:
+        size = scaled_size(img.size, max_size)
+        img.draft('RGB', size)
+        img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+        return np.asarray(img)
+
+
+class ThumbnailCache:
+    """
+    缩略图磁盘缓存。
+
+    以 图片路径 + 修改时间 + 文件大小 + 缩略图尺寸 为键，图片修改后自动失效；
+    命中时更新缓存文件的修改时间，总大小超过上限时按修改时间淘汰最久未使用的缓存（LRU）。
+    """
+
+    def __init__(self, folder=THUMBNAIL_CACHE_DIR, max_bytes=64 * 1024 * 1024):
+        """
+        参数:
+            folder (str | Path): 缓存目录
+            max_bytes (int): 缓存总大小上限（字节）
+        """
+        self.folder = str(folder)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+
+    def key(self, path, max_size):
+        """缓存键；图片不存在时返回 None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        source = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_size[0]}x{max_size[1]}"
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.folder, f"{key}.jpg")
+
+    def get(self, path, max_size):
+        """
+        读取缓存的缩略图。
+
+        返回:
+            np.ndarray: RGB 缩略图；未命中返回 None
+        """
+        key = self.key(path, max_size)
+        if key is None:
+            return None
+        cache_file = self._file(key)
+        try:
+            data = np.fromfile(cache_file, dtype=np.uint8)
+            os.utime(cache_file)
+        except OSError:
+            return None
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return None if frame is None else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def put(self, path, max_size, thumbnail):
+        """写入缩略图（RGB），超出大小上限时淘汰最久未使用的缓存"""
+        key = self.key(path, max_size)
+        if key is None:
+            return
+        data = encode_image(thumbnail, '.jpg', color_order='rgb', options=_CACHE_OPTIONS)
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            if self._total is None:
+                self._total = sum(entry.stat().st_size for entry in self._entries())
+            self._total += atomic_write(self._file(key), data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        with os.scandir(self.folder) as entries:
+            return [entry for entry in entries if entry.is_file() and entry.name.endswith('.jpg')]
+
+    def _evict(self):
+        # 淘汰到上限的 90%，避免每次写入都触发淘汰
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        total = sum(entry.stat().st_size for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        self._total = total
+        logger.debug(f"淘汰 {removed} 个缩略图缓存，当前 {total / 1024 / 1024:.1f} MB")
+
+
+class ThumbnailService:
+    """
+    后台生成缩略图。
+
+    缩略图栏添加图片时先显示占位图，缩略图在工作线程中从磁盘缓存读取或缩小解码生成，
+    完成后调用回调；回调在工作线程中调用，界面更新由调用方通过 wx.CallAfter 转到主线程。
+    """
+
+    def __init__(self, cache=None, max_workers=2):
+        """
+        参数:
+            cache (ThumbnailCache): 磁盘缓存，None 表示不缓存
+            max_workers (int): 解码线程数
+        """
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Thumbnail")
+
+    def get(self, path, max_size):
+        """在当前线程中取得缩略图（RGB），优先读取磁盘缓存"""
+        if self.cache is not None:
+            thumbnail = self.cache.get(path, max_size)
+            if thumbnail is not None:
+                return thumbnail
+        thumbnail = load_thumbnail(path, max_size)
+        if self.cache is not None:
+            try:
+                self.cache.put(path, max_size, thumbnail)
+            except Exception as e:
+                logger.warning(f"写入缩略图缓存失败: {e}")
+        return thumbnail
+
+    def request(self, path, max_size, callback):
+        """
+        提交缩略图任务。
+
+        参数:
+            path (str): 图片路径
+            max_size (tuple): 缩略图最大尺寸 (宽, 高)
+            callback (callable): 完成后在工作线程中调用，参数为 (path, RGB 缩略图)；生成失败时缩略图为 None
+        返回:
+            concurrent.futures.Future
+        """
+        return self._executor.submit(self._run, path, max_size, callback)
+
+    def _run(self, path, max_size, callback):
+        try:
+            thumbnail = self.get(path, max_size)
+        except Exception as e:
+            logger.error(f"生成缩略图失败: {path}: {e}")
+            thumbnail = None
+        callback(path, thumbnail)
+        return thumbnail
+
+    def shutdown(self):
+        """关闭线程池，丢弃尚未开始的任务"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 缩略图栏共用的缩略图服务
+thumbnail_service = ThumbnailService(ThumbnailCache())
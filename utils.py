@@ -1,4 +1,3 @@
-import wx
 import os
 import sys
 import platform
@@ -8,7 +7,11 @@ from loguru import logger
 import time
 from PIL import Image
 from datetime import datetime
-from app_config import get_config, save_config
+from app_config import CONFIG_FILE, get_config, save_config
+from inference_engine import load_model
+import image_writer
+from pdf_writer import StreamingPdfWriter, compress_page, load_page, single_page_pdf
+from batch_export import BatchExportCancelled, map_ordered
 # 定义一个装饰器，用于计算函数的执行时间
 def measure_time(func):
     def wrapper(*args, **kwargs):
@@ -45,6 +48,8 @@ def load_icon(name):
     :return: wx.Icon
     """
     import platform
+    # 只有加载图标需要 wx，导出、合并等函数在没有 GUI 的环境中也可使用
+    import wx
 
     icon = None
     system = platform.system()
@@ -79,6 +84,24 @@ def load_icon(name):
 
 
 
+# get_save_path 使用的保存配置缓存：(config.ini 修改时间, 保存目录, 命名格式)，配置文件变化时才重新读取
+_save_settings = None
+# 已确认存在的保存目录，避免每次拍照都调用 makedirs
+_created_dirs = set()
+
+
+def _get_save_settings():
+    global _save_settings
+    try:
+        mtime = CONFIG_FILE.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    if _save_settings is None or _save_settings[0] != mtime or mtime is None:
+        config = get_config()
+        _save_settings = (mtime, config.get('PATHS', 'save_location'), config.get('PATHS', 'save_naming_format'))
+    return _save_settings[1], _save_settings[2]
+
+
 def get_save_path(suffix="jpg",group_name=None,prefix=None):
     """
     根据配置生成带时间戳的文件保存路径。
@@ -89,11 +112,8 @@ def get_save_path(suffix="jpg",group_name=None,prefix=None):
     返回:
         str: 完整的文件保存路径
     """
-    # 从配置中获取保存路径
-    config=get_config()
-    save_location = config.get('PATHS', 'save_location')
-    # 从配置中获取保存文件命名格式
-    naming_format = config.get('PATHS', 'save_naming_format')
+    # 从配置中获取保存路径和保存文件命名格式（缓存，config.ini 修改后自动重新读取）
+    save_location, naming_format = _get_save_settings()
     # 生成带时间戳的文件名
     timestamp = datetime.now().strftime(naming_format)
     # 拼接文件名
@@ -106,7 +126,9 @@ def get_save_path(suffix="jpg",group_name=None,prefix=None):
     if group_name:
         save_location = os.path.join(save_location, group_name)
     # 确保保存路径存在
-    os.makedirs(save_location, exist_ok=True)
+    if save_location not in _created_dirs or not os.path.isdir(save_location):
+        os.makedirs(save_location, exist_ok=True)
+        _created_dirs.add(save_location)
 
     # 构建保存文件的完整路径
     path = os.path.join(save_location, file_name)
@@ -114,30 +136,60 @@ def get_save_path(suffix="jpg",group_name=None,prefix=None):
     logger.info(f"生成保存路径: {path}")
     return path
 
-def save_image(frame, path):
+def save_image(frame, path, color_order='bgr'):
     """
     保存捕获的图像到指定路径。
 
     参数:
-        frame (np.ndarray): OpenCV BGR 格式的图像帧。
+        frame (np.ndarray): 图像帧，默认为 OpenCV BGR 格式。
         path (str): 图像文件的完整保存路径。
+        color_order (str): frame 的颜色顺序，'bgr' 或 'rgb'。
     """
     try:
-        # 将 BGR 格式的 OpenCV 图像转换为 RGB 格式
-        # rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        # 创建 wx.Image 对象
-        image = wx.Image(frame.shape[1], frame.shape[0])
-        image.SetData(frame.tobytes())
-        # 保存图像到指定路径
+        # 使用 OpenCV 编码（JPEG 质量、色度抽样等取自 [SCANNER] 配置），不依赖 wx，也不额外复制整帧
         logger.info(f"保存图像: {path}")
-        image.SaveFile(path, wx.BITMAP_TYPE_JPEG)
+        image_writer.write_image(frame, path, color_order=color_order)
     except Exception as e:
         logger.error(f"保存图像失败: {e}")
 
-def merge_images(image_paths, output_path, direction='vertical', target_size=None, padding=10, bg_color=(255, 255, 255)):
+def _scaled_size(size, direction, target_size):
+    """按拼接方向计算统一宽度（纵向）或统一高度（横向）后的尺寸"""
+    width, height = size
+    if target_size is None:
+        return width, height
+    if direction == 'vertical':
+        return target_size, max(1, int(height * target_size / width))
+    return max(1, int(width * target_size / height)), target_size
+
+
+def _paste_merge_image(path, size, dst):
+    """
+    解码一张图片，缩放到 size 后直接写入画布区域 dst（BGR）。
+    无需缩放时用 OpenCV 直接解码为 BGR；缩小时先用 draft() 让 JPEG 解码器直接输出 1/2、1/4 或 1/8 尺寸，
+    再用 LANCZOS 缩放到精确尺寸。
+    """
+    with Image.open(path) as img:
+        if img.size == size:
+            frame = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+            if frame is not None and frame.shape[:2] == dst.shape[:2]:
+                dst[:] = frame
+                return
+        if size[0] < img.width and size[1] < img.height:
+            img.draft('RGB', size)
+        img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+        cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR, dst=dst)
+
+
+def merge_images(image_paths, output_path, direction='vertical', target_size=None, padding=10, bg_color=(255, 255, 255),
+                 on_progress=None, executor=None, cancel=None):
     """
     将多张图片合并为一张长图（支持纵向/横向、统一宽高、边距）并保存。
 
+    分两遍处理：第一遍只读取图片文件头得到尺寸并计算布局，第二遍逐张解码、缩放并写入输出画布，
+    同一时刻只保留一张源图片（并行时为每个线程一张），内存占用约为输出图像加源图片。
+
     参数:
     - image_paths: 图片路径列表
     - output_path: 合并后的输出路径
@@ -145,140 +197,166 @@ def merge_images(image_paths, output_path, direction='vertical', target_size=Non
     - target_size: 统一宽度或高度，单位：像素。例如 target_size=600，
         - 如果 direction='vertical'，则统一宽度
         - 如果 direction='horizontal'，则统一高度
-    - padding: 每张图片之间的间距（像素）
+    - padding: 每张图片之间的间距（像素），可为配置文件中读取的字符串
     - bg_color: 背景颜色 (R, G, B)，默认白色
+    - on_progress: 每合并一张图片调用一次，参数为 (已完成数, 总数)
+    - executor: BatchExporter，提供时并行解码、缩放，各图片直接写入画布中互不重叠的区域
+    - cancel: threading.Event，置位后放弃合并并抛出 BatchExportCancelled
+
+    返回:
+    - bool: 是否合并成功
     """
     if not image_paths:
         raise ValueError("图片路径列表为空！")
+    if direction not in ('vertical', 'horizontal'):
+        raise ValueError("参数 direction 只能为 'vertical' 或 'horizontal'")
 
     try:
-        # 打开图片
-        images = []
+        padding = int(padding)
+
+        # 第一遍：只读取文件头，计算每张图片缩放后的尺寸
+        layout = []
         for path in image_paths:
             try:
-                img = Image.open(path).convert("RGB")
-                images.append(img)
+                with Image.open(path) as img:
+                    layout.append((path, _scaled_size(img.size, direction, target_size)))
             except Exception as e:
-                print(f"跳过无法打开的图片: {path}，错误: {e}")
+                logger.warning(f"跳过无法打开的图片: {path}，错误: {e}")
 
-        if not images:
+        if not layout:
             raise RuntimeError("没有可用的图片进行合并。")
 
-        # 可选缩放：统一宽度或高度
-        if target_size is not None:
-            resized_images = []
-            for img in images:
-                if direction == 'vertical':
-                    # 统一宽度，等比缩放高度
-                    w_percent = target_size / img.width
-                    new_height = int(img.height * w_percent)
-                    resized = img.resize((target_size, new_height), Image.LANCZOS)
-                elif direction == 'horizontal':
-                    # 统一高度，等比缩放宽度
-                    h_percent = target_size / img.height
-                    new_width = int(img.width * h_percent)
-                    resized = img.resize((new_width, target_size), Image.LANCZOS)
-                else:
-                    raise ValueError("参数 direction 必须为 'vertical' 或 'horizontal'")
-                resized_images.append(resized)
-            images = resized_images
-
-        # 计算合并后图片尺寸
+        # 计算合并后图片尺寸，画布按 BGR 分配，编码时无需再转换颜色
+        sizes = [size for _, size in layout]
         if direction == 'vertical':
-            max_width = max(img.width for img in images)
-            total_height = sum(img.height for img in images) + padding * (len(images) - 1)
-            merged_image = Image.new("RGB", (max_width, total_height), bg_color)
+            width = max(w for w, _ in sizes)
+            height = sum(h for _, h in sizes) + padding * (len(sizes) - 1)
+        else:
+            width = sum(w for w, _ in sizes) + padding * (len(sizes) - 1)
+            height = max(h for _, h in sizes)
+        canvas = np.empty((height, width, 3), np.uint8)
+        canvas[:] = bg_color[::-1]
+
+        # 第二遍：逐张解码并写入画布中各自的区域
+        slots = []
+        offset = 0
+        for path, (w, h) in layout:
+            if direction == 'vertical':
+                x, y = (width - w) // 2, offset
+            else:
+                x, y = offset, (height - h) // 2
+            slots.append((path, (w, h), canvas[y:y + h, x:x + w]))
+            offset += (h if direction == 'vertical' else w) + padding
 
-            y = 0
-            for img in images:
-                merged_image.paste(img, ((max_width - img.width) // 2, y))
-                y += img.height + padding
+        def paste(slot):
+            path, size, dst = slot
+            try:
+                _paste_merge_image(path, size, dst)
+            except Exception as e:
+                logger.warning(f"跳过无法解码的图片: {path}，错误: {e}")
 
-        elif direction == 'horizontal':
-            max_height = max(img.height for img in images)
-            total_width = sum(img.width for img in images) + padding * (len(images) - 1)
-            merged_image = Image.new("RGB", (total_width, max_height), bg_color)
+        for done, _ in enumerate(map_ordered(paste, slots, executor, cancel), 1):
+            if on_progress:
+                on_progress(done, len(slots))
 
-            x = 0
-            for img in images:
-                merged_image.paste(img, (x, (max_height - img.height) // 2))
-                x += img.width + padding
+        image_writer.write_image(canvas, output_path)
+        logger.info(f"图片合并成功，保存为: {output_path}")
+        return True
 
-        else:
-            raise ValueError("参数 direction 只能为 'vertical' 或 'horizontal'")
+    except BatchExportCancelled:
+        logger.info(f"已取消合并图片: {output_path}")
+        raise
+    except Exception as e:
+        logger.exception(f"图片合并失败: {e}")
+        return False
 
-        merged_image.save(output_path)
-        print(f"图片合并成功，保存为: {output_path}")
 
-    except Exception as e:
-        print(f"图片合并失败: {e}")
+def encode_pdf(frame, dpi=300, compression='jpeg'):
+    """
+    将 OpenCV BGR 图像压缩一次并生成单页 PDF，返回文件内容，供后台写盘队列原子写入。
+
+    参数:
+        frame (np.ndarray): OpenCV BGR 格式的图像帧。
+        dpi (int): 扫描精度，决定 PDF 页面尺寸。
+        compression (str): jpeg、bilevel（黑白 G4）或 auto。
+    返回:
+        bytes: PDF 文件内容
+    """
+    return single_page_pdf(compress_page(frame, compression), dpi)
 
 
-def save_pdf(frame, path, dpi=300):
+def save_pdf(frame, path, dpi=300, compression='jpeg'):
     """
-    通过 PIL 保存为 PDF。
+    保存为单页 PDF，图像只压缩一次并直接嵌入，页面尺寸按 dpi 换算。
 
     参数:
-        frames (list of np.ndarray): OpenCV BGR 格式的图像帧列表。
+        frame (np.ndarray): OpenCV BGR 格式的图像帧。
         path (str): PDF 文件的保存路径。
         dpi (int): 输出 PDF 的 DPI。
+        compression (str): jpeg、bilevel（黑白 G4）或 auto。
     """
     try:
-
-        # 转换为 RGB 并创建 PIL 图像对象
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb_frame)  # 自动识别为 RGB
-
-
-        # 保存为 PDF（第一张图为基准）
-        pil_img.save(path, append_images=pil_img, resolution=dpi)
-
+        image_writer.atomic_write(path, encode_pdf(frame, dpi, compression))
         logger.info(f"PDF 文件已成功保存至: {path}")
 
     except Exception as e:
         logger.exception(f"生成 PDF 失败: {e}")
 
-def save_multip_pdf(image_paths, output_path, dpi=300):
+def _try_load_page(path):
+    try:
+        return load_page(path)
+    except Exception as e:
+        logger.warning(f"跳过无法打开的图片: {path}，错误: {e}")
+        return None
+
+
+def save_multip_pdf(image_paths, output_path, dpi=300, on_progress=None, executor=None, cancel=None):
     """
     将多张图片合并为一个多页 PDF 文件，支持设置 DPI。
+    逐页流式写入，JPEG 图片直接嵌入原始数据，内存占用与页数无关。
 
     参数:
     - image_paths: 图片路径列表（如 ['img1.png', 'img2.jpg', ...]）
     - output_path: 输出 PDF 文件路径（如 'output.pdf'）
     - dpi: 输出 PDF 的每英寸点数，决定图像在 PDF 中的实际尺寸（默认 300）
+    - on_progress: 每写完一页调用一次，参数为 (已完成页数, 总页数)
+    - executor: BatchExporter，提供时并行读取、编码各页，按原顺序写入
+    - cancel: threading.Event，置位后放弃写入并抛出 BatchExportCancelled
+
+    返回:
+    - bool: 是否生成成功
     """
     try:
         if not image_paths:
             raise ValueError("图片路径列表为空！")
 
-        images = []
-        for path in image_paths:
-            img = Image.open(path)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-
-        # 保存 PDF，设置 dpi（通过 resolution 参数）
-        images[0].save(
-            output_path,
-            save_all=True,
-            append_images=images[1:],
-            resolution=dpi
-        )
+        with StreamingPdfWriter(output_path, dpi=dpi) as writer:
+            pages = map_ordered(_try_load_page, image_paths, executor, cancel)
+            for i, page in enumerate(pages, 1):
+                if page is not None:
+                    writer.add_page(page)
+                if on_progress:
+                    on_progress(i, len(image_paths))
 
         logger.info(f"PDF 文件已成功保存至: {output_path}")
+        return True
+    except BatchExportCancelled:
+        logger.info(f"已取消生成 PDF: {output_path}")
+        raise
     except Exception as e:
         logger.exception(f"生成 PDF 失败: {e}")
+        return False
 
 
 class SCRFD():
-    def __init__(self, onnxmodel, confThreshold=0.6, nmsThreshold=0.5):
+    def __init__(self, onnxmodel, confThreshold=0.6, nmsThreshold=0.5, settings=None):
         """
         初始化 SCRFD 类的实例。
 
         :param onnxmodel: ONNX 模型文件的路径
         :param confThreshold: 分类置信度阈值，默认为 0.5
         :param nmsThreshold: 非极大值抑制（NMS）的 IoU 阈值，默认为 0.5
+        :param settings: 推理引擎设置（InferenceSettings），None 时使用 OpenCV DNN 默认设置
         """
         # 输入图像的宽度
         self.inpWidth = 640
@@ -288,8 +366,8 @@ class SCRFD():
         self.confThreshold = confThreshold
         # 非极大值抑制的 IoU 阈值，用于去除重叠的检测框
         self.nmsThreshold = nmsThreshold
-        # 加载 ONNX 模型
-        self.net = cv2.dnn.readNet(onnxmodel)
+        # 按推理设置加载 ONNX 模型并预热
+        self.net = load_model(onnxmodel, settings, input_shape=(1, 3, self.inpHeight, self.inpWidth))
         # 是否保持图像的宽高比，默认为 True
         self.keep_ratio = True
         # 特征金字塔网络（FPN）的特征图数量
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+from image_writer import atomic_write
+
+
+class WriteBehindQueue:
+    """
+    后台写盘队列。
+
+    拍照保存时 GUI 线程只提交快照和保存路径，旋转、展平、编码与写盘都在工作线程池中完成。
+    每个文件先写临时文件再重命名（原子写入），写入失败按退避间隔重试。
+    与 LazyModel 一样，回调在工作线程中调用，界面更新由调用方通过 wx.CallAfter 转到主线程。
+    """
+
+    def __init__(self, max_workers=2, retries=3, retry_delay=0.2, on_done=None, on_error=None, on_pending=None):
+        """
+        参数:
+            max_workers (int): 并行编码、写盘的线程数
+            retries (int): 写盘失败后的重试次数
+            retry_delay (float): 首次重试前的等待时间（秒），之后每次加倍
+            on_done (callable): 写入成功后调用，参数为 (path, tag)
+            on_error (callable): 编码或写入最终失败后调用，参数为 (path, 异常, tag)
+            on_pending (callable): 待写入数量变化时调用，参数为 (pending)
+        """
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_pending = on_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="WriteBehind")
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+
+    @property
+    def pending(self):
+        """排队中与正在写入的文件数"""
+        with self._idle:
+            return self._pending
+
+    def submit(self, path, produce, tag=None):
+        """
+        提交一个写盘任务。
+
+        参数:
+            path (str): 目标文件路径
+            produce (callable): 无参数函数，在工作线程中调用，返回文件内容 bytes
+            tag: 原样传给回调的附加信息（如分组名）
+        返回:
+            concurrent.futures.Future: 结果为写入的字节数
+        """
+        with self._idle:
+            if self._closed:
+                raise RuntimeError("写盘队列已关闭")
+            self._pending += 1
+            pending = self._pending
+        self._notify_pending(pending)
+        return self._executor.submit(self._write, path, produce, tag)
+
+    def _write(self, path, produce, tag):
+        try:
+            data = produce()
+            size = self._write_with_retry(path, data)
+            logger.info(f"已写入文件: {path}（{size / 1024:.0f} KB）")
+            if self.on_done:
+                self.on_done(path, tag)
+            return size
+        except Exception as e:
+            logger.error(f"写入文件失败: {path}: {e}")
+            if self.on_error:
+                self.on_error(path, e, tag)
+            raise
+        finally:
+            with self._idle:
+                self._pending -= 1
+                pending = self._pending
+                self._idle.notify_all()
+            self._notify_pending(pending)
+
+    def _write_with_retry(self, path, data):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                return atomic_write(path, data)
+            except OSError as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"写入 {path} 失败（第 {attempt + 1} 次）: {e}，{delay:.1f} 秒后重试")
+                time.sleep(delay)
+                delay *= 2
+
+    def _notify_pending(self, pending):
+        if self.on_pending:
+            self.on_pending(pending)
+
+    def flush(self, timeout=None):
+        """
+        等待已提交的任务全部完成。
+
+        参数:
+            timeout (float): 最长等待时间（秒），None 表示一直等待
+        返回:
+            bool: 全部完成返回 True，超时返回 False
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout=None):
+        """
+        等待已提交的任务（包括任务执行中追加提交的任务）写完，之后拒绝新任务并关闭线程池。
+        应在不再从界面提交任务后调用。
+
+        返回:
+            bool: 全部写完返回 True；超时返回 False，剩余任务在后台继续执行
+        """
+        flushed = self.flush(timeout)
+        with self._idle:
+            self._closed = True
+        if not flushed:
+            logger.warning(f"退出时仍有 {self.pending} 个文件未写完")
+        self._executor.shutdown(wait=False)
+        return flushed